@@ -1,14 +1,15 @@
 from __future__ import annotations
 
+import json
+import re
 from typing import Dict
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 
+from agents.hedging import LLMUnavailable, invoke_llm
+from agents.prompts import LazyPrompt
+from agents.usage import check_budget, usage_entry
 from graph.state import DealGraphState
 
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-
-CLAUSE_PROMPT = ChatPromptTemplate.from_messages([
+CLAUSE_PROMPT = LazyPrompt([
     ("system", """
 You are a legal document parser.
 
@@ -25,19 +26,49 @@ Each object MUST have exactly two keys:
     ("human", "DEAL TEXT:\n{deal_text}")
 ])
 
+def _parses_as_list(text: str) -> bool:
+    cleaned = (text or "").strip()
+    cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned)
+    cleaned = re.sub(r"\s*```$", "", cleaned)
+    try:
+        return isinstance(json.loads(cleaned), list)
+    except Exception:
+        return False
+
 def clause_agent(state: DealGraphState) -> Dict:
     deal = state["deal"]
-    trace = state.get("execution_trace", [])
 
-    resp = llm.invoke(CLAUSE_PROMPT.format(deal_text=deal.raw_text))
+    packed = state.get("packed_extraction")
+    if packed:
+        # bulk mode: already extracted together with other small deals (agents/packing.py)
+        return {
+            "raw_clause_extraction": packed["raw_clause_extraction"],
+            "clause_parse_ok": True,
+            "execution_trace": ["clause_agent:packed"],
+            "current_node": "clauses",
+        }
+
+    prompt = CLAUSE_PROMPT.format(deal_text=deal.raw_text)
+    try:
+        check_budget(state, "clause", prompt)
+        resp = invoke_llm("clause", prompt, tier=state.get("model_tier"))
+    except LLMUnavailable:
+        # degraded: no clause list; risk extraction still sees the raw text
+        return {
+            "raw_clause_extraction": "[]",
+            "degraded": True,
+            "degraded_nodes": ["clauses"],
+            "execution_trace": ["clause_agent"],
+            "current_node": "clauses",
+        }
 
     return {
         # raw output only; normalize will parse and update deal.clauses
+        # (clause_analysis is no longer written: it duplicated this string)
         "raw_clause_extraction": resp.content,
+        "clause_parse_ok": _parses_as_list(resp.content),
+        "llm_usage": [usage_entry("clause", state.get("model_tier"), prompt, resp)],
 
-        # optional: keep if you want; otherwise remove
-        "clause_analysis": resp.content,
-
-        "execution_trace": trace + ["clause_agent"],
+        "execution_trace": ["clause_agent"],
         "current_node": "clauses",
     }
@@ -0,0 +1,318 @@
+# agents/clients.py
+"""
+Central registry for the agents' chat-model clients.
+
+- Clients are built lazily on the first `get_llm()` call (no import-time cost).
+- All clients share one keep-alive HTTP connection pool, across agents and
+  threads; agents with identical model settings share one chat-model object.
+- Each agent can be configured with its own model / timeout / retry budget.
+- Calls are retried on 429 / 5xx / connection errors with capped exponential
+  backoff and full jitter (honouring Retry-After), so concurrent batch runs
+  don't retry in lock-step.
+- `client_stats()` reports requests, new connections, TLS handshakes, pool
+  reuse and retries.
+
+Configuration (environment, per agent overrides the global default):
+
+    DEALGRAPH_MODEL / DEALGRAPH_<AGENT>_MODEL          e.g. DEALGRAPH_RISK_MODEL=gpt-4o-mini
+    DEALGRAPH_FAST_MODEL / DEALGRAPH_<AGENT>_FAST_MODEL  model for the "fast" routing tier
+    DEALGRAPH_TIMEOUT / DEALGRAPH_<AGENT>_TIMEOUT      seconds per request
+    DEALGRAPH_MAX_RETRIES / DEALGRAPH_<AGENT>_MAX_RETRIES
+    DEALGRAPH_DEADLINE / DEALGRAPH_<AGENT>_DEADLINE    node deadline in seconds (0 = none)
+    DEALGRAPH_HEDGE_PERCENTILE / DEALGRAPH_<AGENT>_HEDGE_PERCENTILE  (0 = no hedging)
+    DEALGRAPH_MAX_CONNECTIONS, DEALGRAPH_KEEPALIVE_CONNECTIONS
+    DEALGRAPH_RPM, DEALGRAPH_TPM, DEALGRAPH_RATE_LIMITS  (agents/scheduler.py)
+"""
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_FAST_MODEL = "gpt-4o-mini"
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_RETRIES = 4
+
+AGENTS = ("clause", "risk", "negotiation", "judge")
+
+# Per-node deadlines (seconds) before the deterministic degraded path kicks in.
+DEFAULT_DEADLINES = {"clause": 60.0, "risk": 45.0, "negotiation": 45.0, "judge": 30.0, "packed": 90.0}
+DEFAULT_HEDGE_PERCENTILE = 95.0
+
+# Routing tiers (graph/routing.py): "strong" is the agent's configured model.
+TIERS = ("fast", "strong")
+
+# USD per 1M tokens: (input, output). Used for cost estimates only.
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+# typical completion sizes per agent and chars per token, for pre-call estimates
+TYPICAL_OUTPUT_TOKENS = {"clause": 400, "risk": 500, "negotiation": 400, "judge": 200, "packed": 1500}
+CHARS_PER_TOKEN = 4
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+BACKOFF_BASE_S = 0.5
+BACKOFF_CAP_S = 20.0
+
+
+def _env(name: str, agent: Optional[str]) -> Optional[str]:
+    if agent:
+        value = os.getenv(f"DEALGRAPH_{agent.upper()}_{name}")
+        if value:
+            return value
+    return os.getenv(f"DEALGRAPH_{name}") or None
+
+
+def agent_config(agent: str, tier: Optional[str] = None) -> Dict[str, Any]:
+    model = _env("MODEL", agent) or DEFAULT_MODEL
+    if tier == "fast":
+        model = _env("FAST_MODEL", agent) or DEFAULT_FAST_MODEL
+    return {
+        "model": model,
+        "timeout": float(_env("TIMEOUT", agent) or DEFAULT_TIMEOUT),
+        "max_retries": int(_env("MAX_RETRIES", agent) or DEFAULT_MAX_RETRIES),
+        "deadline": float(_env("DEADLINE", agent) or DEFAULT_DEADLINES.get(agent, 0.0)),
+        "hedge_percentile": float(_env("HEDGE_PERCENTILE", agent) or DEFAULT_HEDGE_PERCENTILE),
+    }
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, MODEL_PRICES[DEFAULT_MODEL])
+    return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+
+def response_usage(resp: Any) -> Optional[Tuple[int, int]]:
+    """(input_tokens, output_tokens) reported by the provider, or None."""
+    usage = getattr(resp, "usage_metadata", None)
+    if usage:
+        return int(usage.get("input_tokens", 0) or 0), int(usage.get("output_tokens", 0) or 0)
+    usage = (getattr(resp, "response_metadata", None) or {}).get("token_usage")
+    if usage:
+        return int(usage.get("prompt_tokens", 0) or 0), int(usage.get("completion_tokens", 0) or 0)
+    return None
+
+
+def _retry_status(exc: BaseException) -> Optional[int]:
+    """HTTP status for retryable errors, 0 for connection/timeouts, None otherwise."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status if status in RETRY_STATUS else None
+    name = type(exc).__name__
+    if name in {"APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout",
+                "ConnectTimeout", "RemoteProtocolError", "TimeoutException"}:
+        return 0
+    return None
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, exc: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential backoff; a server Retry-After is a lower bound."""
+    delay = random.uniform(0.0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * (2 ** attempt)))
+    hint = _retry_after(exc) if exc is not None else None
+    if hint is not None:
+        delay = max(delay, min(hint, BACKOFF_CAP_S))
+    return delay
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.counters: Dict[str, int] = {
+            "http_requests": 0,
+            "new_connections": 0,
+            "tls_handshakes": 0,
+            "llm_calls": 0,
+            "retries": 0,
+            "failures": 0,
+            "hedges_fired": 0,
+            "hedge_wins": 0,
+            "deadline_misses": 0,
+        }
+        self.per_agent: Dict[str, Dict[str, int]] = {}
+
+    def incr(self, key: str, agent: Optional[str] = None, n: int = 1) -> None:
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+            if agent:
+                bucket = self.per_agent.setdefault(agent, {})
+                bucket[key] = bucket.get(key, 0) + n
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.counters)
+            out["per_agent"] = {a: dict(v) for a, v in self.per_agent.items()}
+        requests = out["http_requests"]
+        out["reused_connections"] = max(0, requests - out["new_connections"])
+        out["reuse_ratio"] = round(out["reused_connections"] / requests, 4) if requests else 0.0
+        return out
+
+
+class RetryingLLM:
+    """
+    Per-agent handle over a shared chat model: retries + call accounting.
+    Anything other than invoke() / stream() is delegated to the underlying model.
+    """
+
+    def __init__(self, agent: str, model: Any, max_retries: int, stats: _Stats):
+        self.agent = agent
+        self.model = model
+        self.max_retries = max_retries
+        self._stats = stats
+
+    def _call(self, fn: Callable[[], Any]) -> Any:
+        self._stats.incr("llm_calls", self.agent)
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                status = _retry_status(e)
+                if status is None or attempt >= self.max_retries:
+                    self._stats.incr("failures", self.agent)
+                    raise
+                self._stats.incr("retries", self.agent)
+                time.sleep(backoff_delay(attempt, e))
+                attempt += 1
+
+    def invoke(self, prompt: Any, *args: Any, **kwargs: Any) -> Any:
+        return self._call(lambda: self.model.invoke(prompt, *args, **kwargs))
+
+    def stream(self, prompt: Any, *args: Any, **kwargs: Any) -> Iterator[Any]:
+        """
+        Stream chunks; retried only until the first chunk arrives (a partial
+        stream can't be replayed without duplicating output downstream).
+        """
+        def first() -> Tuple[Iterator[Any], Any]:
+            it = iter(self.model.stream(prompt, *args, **kwargs))
+            return it, next(it, None)
+
+        it, head = self._call(first)
+        if head is None:
+            return
+        yield head
+        yield from it
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+
+class ClientRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Any] = {}
+        self._models: Dict[Tuple[str, float], Any] = {}
+        self._http_client: Any = None
+        self.stats = _Stats()
+        # Optional hook: wrap(agent, build) -> client. Used by evals/replay.py to
+        # intercept calls; `build` constructs the real client only when invoked.
+        self.wrapper: Optional[Callable[[str, Callable[[], Any]], Any]] = None
+
+    # ---- shared HTTP pool ----
+    def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.stats.incr("new_connections")
+        elif event == "connection.start_tls.complete":
+            self.stats.incr("tls_handshakes")
+
+    def _on_request(self, request: Any) -> None:
+        self.stats.incr("http_requests")
+        request.extensions["trace"] = self._trace
+
+    def http_client(self) -> Any:
+        if self._http_client is None:
+            import httpx
+
+            limits = httpx.Limits(
+                max_connections=int(os.getenv("DEALGRAPH_MAX_CONNECTIONS", "64")),
+                max_keepalive_connections=int(os.getenv("DEALGRAPH_KEEPALIVE_CONNECTIONS", "32")),
+                keepalive_expiry=60.0,
+            )
+            self._http_client = httpx.Client(
+                limits=limits,
+                timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=10.0),
+                event_hooks={"request": [self._on_request]},
+            )
+        return self._http_client
+
+    # ---- clients ----
+    def _model(self, model: str, timeout: float) -> Any:
+        key = (model, timeout)
+        if key not in self._models:
+            from langchain_openai import ChatOpenAI
+
+            self._models[key] = ChatOpenAI(
+                model=model,
+                temperature=0,
+                timeout=timeout,
+                max_retries=0,  # retries are owned by RetryingLLM
+                stream_usage=True,  # token usage on the final chunk (agents/usage.py)
+                http_client=self.http_client(),
+            )
+        return self._models[key]
+
+    def _build(self, agent: str, tier: Optional[str] = None) -> Any:
+        cfg = agent_config(agent, tier)
+        with self._lock:
+            model = self._model(cfg["model"], cfg["timeout"])
+        return RetryingLLM(agent, model, cfg["max_retries"], self.stats)
+
+    def get(self, agent: str, tier: Optional[str] = None) -> Any:
+        key = f"{agent}:{tier}" if tier and tier != "strong" else agent
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        build = lambda: self._build(agent, tier)
+        client = self.wrapper(agent, build) if self.wrapper else build()
+        with self._lock:
+            return self._clients.setdefault(key, client)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            self._models.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+
+
+registry = ClientRegistry()
+
+
+def get_llm(agent: str, tier: Optional[str] = None) -> Any:
+    return registry.get(agent, tier)
+
+
+def set_wrapper(wrapper: Optional[Callable[[str, Callable[[], Any]], Any]]) -> None:
+    """Install (or clear) a client wrapper; drops already-built clients."""
+    registry.wrapper = wrapper
+    registry.reset()
+
+
+def reset_clients() -> None:
+    registry.reset()
+
+
+def client_stats() -> Dict[str, Any]:
+    return registry.stats.snapshot()
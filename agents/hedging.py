@@ -0,0 +1,259 @@
+# agents/hedging.py
+"""
+Deadline-bounded, hedged LLM calls.
+
+`invoke_llm(agent, prompt)` runs the call on a shared worker pool:
+- once the call has been outstanding longer than the agent's observed latency
+  percentile (DEALGRAPH_HEDGE_PERCENTILE, default p95), a duplicate request is
+  fired and the first successful answer wins;
+- when the node deadline (DEALGRAPH_<AGENT>_DEADLINE) passes, DeadlineExceeded
+  is raised so the node can fall back to its deterministic degraded path.
+
+Losing or abandoned requests are not cancelled (HTTP calls can't be
+interrupted from another thread); their results are simply discarded.
+
+`stream_llm(agent, prompt, on_chunk)` is the streaming counterpart: the
+deadline still applies, but streams are never hedged (a duplicate stream
+would feed the same consumer twice).
+
+Both wait for rate-limit capacity (agents/scheduler.py) before a request
+goes out; the wait counts against the deadline, and a hedge is only fired
+when capacity is available right away. The winner's token estimate is
+reconciled against its reported usage. Discarded requests that were sent
+(the losing side of a hedge, anything abandoned at the deadline) stay
+charged at their estimate: the provider counts their tokens too. Only a
+request that never left the worker queue is refunded.
+"""
+from __future__ import annotations
+
+import contextvars
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+from agents.clients import _retry_status, agent_config, get_llm, registry, response_usage
+from agents.scheduler import RateLimitTimeout, scheduler
+
+# below this many samples the percentile is not trusted; hedge at deadline / 2
+MIN_SAMPLES = 20
+WINDOW = 256
+
+
+class LLMUnavailable(RuntimeError):
+    """The model could not produce an answer in time (or at all)."""
+
+
+class DeadlineExceeded(LLMUnavailable, TimeoutError):
+    pass
+
+
+class LatencyTracker:
+    """Rolling per-agent latency window used to pick the hedge delay."""
+
+    def __init__(self, window: int = WINDOW):
+        self._window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(agent, deque(maxlen=self._window)).append(seconds)
+
+    def percentile(self, agent: str, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(agent, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        idx = min(len(samples) - 1, max(0, math.ceil(p / 100.0 * len(samples)) - 1))
+        return samples[idx]
+
+
+latency = LatencyTracker()
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DEALGRAPH_LLM_WORKERS", "32")),
+    thread_name_prefix="dealgraph-llm",
+)
+
+
+def _timed(llm: Any, prompt: Any) -> Tuple[Any, float]:
+    t0 = time.monotonic()
+    resp = llm.invoke(prompt)
+    return resp, time.monotonic() - t0
+
+
+def _acquire(agent: str, model: str, prompt: Any, end: Optional[float], deadline: float) -> int:
+    try:
+        return scheduler.acquire(model, agent, prompt, timeout=None if end is None else max(0.0, end - time.monotonic()))
+    except RateLimitTimeout:
+        registry.stats.incr("deadline_misses", agent)
+        raise DeadlineExceeded(f"{agent} LLM call waited out its {deadline:.1f}s deadline for rate-limit capacity")
+
+
+def _reconcile(model: str, charged: int, resp: Any) -> None:
+    if charged:
+        usage = response_usage(resp)
+        scheduler.reconcile(model, charged, sum(usage) if usage else None)
+
+
+def _abandon(model: str, charges: Dict[Future, int]) -> None:
+    """Drop discarded requests; refund the ones that were never sent."""
+    for fut, charged in charges.items():
+        # cancel() only succeeds while the request is still queued on the pool
+        if fut.cancel() and charged:
+            scheduler.reconcile(model, charged, 0)
+
+
+def _hedge_delay(agent: str, percentile: float, deadline: float) -> Optional[float]:
+    if percentile <= 0:
+        return None
+    observed = latency.percentile(agent, percentile)
+    if observed is not None:
+        return observed
+    return deadline / 2.0 if deadline > 0 else None
+
+
+def invoke_llm(
+    agent: str,
+    prompt: Any,
+    deadline: Optional[float] = None,
+    tier: Optional[str] = None,
+) -> Any:
+    cfg = agent_config(agent, tier)
+    deadline = cfg["deadline"] if deadline is None else deadline
+    # fast and strong models have different latency profiles
+    label = f"{agent}:{tier}" if tier and tier != "strong" else agent
+    hedge_after = _hedge_delay(label, cfg["hedge_percentile"], deadline)
+    llm = get_llm(agent, tier)
+    model = cfg["model"]
+
+    def submit() -> Future:
+        # copy the caller's context so ContextVars (e.g. eval cassettes) follow the call
+        return _executor.submit(contextvars.copy_context().run, _timed, llm, prompt)
+
+    start = time.monotonic()
+    end = start + deadline if deadline > 0 else None
+    charged = _acquire(agent, model, prompt, end, deadline)
+    primary = submit()
+    pending: Set[Future] = {primary}
+    # token estimate charged per request, settled by _reconcile / _abandon
+    charges: Dict[Future, int] = {primary: charged}
+    hedged = False
+    last_exc: Optional[BaseException] = None
+
+    while pending:
+        now = time.monotonic()
+        timeouts = []
+        if not hedged and hedge_after is not None:
+            timeouts.append(max(0.0, start + hedge_after - now))
+        if end is not None:
+            timeouts.append(max(0.0, end - now))
+        done, pending = wait(pending, timeout=min(timeouts) if timeouts else None,
+                             return_when=FIRST_COMPLETED)
+
+        for fut in done:
+            try:
+                resp, elapsed = fut.result()
+            except Exception as e:
+                last_exc = e
+                continue
+            latency.record(label, elapsed)
+            if fut is not primary:
+                registry.stats.incr("hedge_wins", agent)
+            _reconcile(model, charges.pop(fut), resp)
+            _abandon(model, charges)
+            return resp
+
+        now = time.monotonic()
+        if end is not None and now >= end:
+            _abandon(model, charges)
+            registry.stats.incr("deadline_misses", agent)
+            raise DeadlineExceeded(f"{agent} LLM call exceeded its {deadline:.1f}s deadline")
+        if pending and not hedged and hedge_after is not None and now - start >= hedge_after:
+            hedged = True
+            try:
+                # a hedge is an extra request: only when there is capacity right now
+                hedge_charged = scheduler.acquire(model, agent, prompt, timeout=0.0)
+            except RateLimitTimeout:
+                continue
+            hedge = submit()
+            charges[hedge] = hedge_charged
+            pending.add(hedge)
+            registry.stats.incr("hedges_fired", agent)
+
+    # every attempt failed; the requests went out, so their estimates stand
+    if last_exc is not None and _retry_status(last_exc) is not None:
+        raise LLMUnavailable(f"{agent} LLM call failed: {last_exc}") from last_exc
+    raise last_exc  # type: ignore[misc]
+
+
+def _chunk_text(chunk: Any) -> str:
+    content = getattr(chunk, "content", chunk)
+    return content if isinstance(content, str) else ""
+
+
+def _consume(
+    llm: Any, prompt: Any, on_chunk: Callable[[str], None], stop: threading.Event
+) -> Tuple[float, Optional[Tuple[int, int]]]:
+    t0 = time.monotonic()
+    usage: Optional[Tuple[int, int]] = None
+    for chunk in llm.stream(prompt):
+        if stop.is_set():
+            # unlike invoke(), an abandoned stream can be closed between chunks
+            break
+        # providers report usage on (usually) the final chunk
+        got = response_usage(chunk)
+        if got is not None:
+            usage = got if usage is None else (usage[0] + got[0], usage[1] + got[1])
+        on_chunk(_chunk_text(chunk))
+    return time.monotonic() - t0, usage
+
+
+def stream_llm(
+    agent: str,
+    prompt: Any,
+    on_chunk: Callable[[str], None],
+    deadline: Optional[float] = None,
+    tier: Optional[str] = None,
+) -> Optional[Tuple[int, int]]:
+    """
+    Feed the model's token stream to `on_chunk` (called on a worker thread).
+    Returns the (input, output) token usage reported on the stream, if any.
+    Raises DeadlineExceeded / LLMUnavailable like invoke_llm; chunks delivered
+    before the failure have already been consumed.
+    """
+    cfg = agent_config(agent, tier)
+    deadline = cfg["deadline"] if deadline is None else deadline
+    label = f"{agent}:{tier}" if tier and tier != "strong" else agent
+    llm = get_llm(agent, tier)
+    model = cfg["model"]
+
+    end = time.monotonic() + deadline if deadline > 0 else None
+    charged = _acquire(agent, model, prompt, end, deadline)
+    stop = threading.Event()
+    fut = _executor.submit(contextvars.copy_context().run, _consume, llm, prompt, on_chunk, stop)
+    usage: Optional[Tuple[int, int]] = None
+    try:
+        done, _ = wait({fut}, timeout=None if end is None else max(0.0, end - time.monotonic()))
+        if not done:
+            stop.set()
+            registry.stats.incr("deadline_misses", agent)
+            raise DeadlineExceeded(f"{agent} LLM stream exceeded its {deadline:.1f}s deadline")
+        try:
+            elapsed, usage = fut.result()
+        except Exception as e:
+            if _retry_status(e) is not None:
+                raise LLMUnavailable(f"{agent} LLM stream failed: {e}") from e
+            raise
+        latency.record(label, elapsed)
+        return usage
+    finally:
+        # reported usage wins; a cut-off or failed stream keeps its estimate
+        if usage:
+            scheduler.reconcile(model, charged, sum(usage))
+        else:
+            _abandon(model, {fut: charged})
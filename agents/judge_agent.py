@@ -2,16 +2,14 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Dict, Any, List
-
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+from typing import Dict, Any, List, Optional
 
+from agents.hedging import LLMUnavailable, invoke_llm
+from agents.prompts import LazyPrompt
+from agents.usage import check_budget, usage_entry
 from graph.state import DealGraphState
 
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-
-JUDGE_PROMPT = ChatPromptTemplate.from_messages([
+JUDGE_PROMPT = LazyPrompt([
     ("system", """
 You are the Judge / Synthesis Agent for a commercial deal risk system.
 
@@ -56,53 +54,135 @@ def _safe_json_loads(text: str) -> Dict[str, Any]:
     cleaned = re.sub(r"\s*```$", "", cleaned)
     return json.loads(cleaned)
 
-def judge_agent(state: DealGraphState) -> Dict:
-    trace = state.get("execution_trace", [])
+INSUFFICIENT_DETAIL_CHARS = 300
+CORE_CATEGORIES = ["Termination", "Liability", "Service Changes"]
+
+def is_insufficient_detail(deal_text: str, risk_items: List[Any]) -> bool:
+    return len(deal_text or "") < INSUFFICIENT_DETAIL_CHARS or not risk_items
+
+# Decision thresholds; memory/policy_sim.py replays history against variants.
+DEFAULT_POLICY: Dict[str, Any] = {
+    "reject_score": 60.0,          # risk_score >= -> REJECT
+    "reject_core_high": 2,         # High items in CORE_CATEGORIES >= -> REJECT
+    "reject_high_liability": True,
+    "reject_high_termination": True,
+    "edits_score": 30.0,           # risk_score >= -> APPROVE_WITH_EDITS
+    "edits_core_high": 1,          # High core items >= -> APPROVE_WITH_EDITS
+}
+
+def decide_recommendation(
+    risk_items: List[Any],
+    risk_score: float,
+    policy: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Deterministic decision policy. The LLM never decides the outcome.
+    """
+    policy = policy or DEFAULT_POLICY
+    core_high = [
+        r for r in risk_items
+        if r.get("severity") == "High"
+        and r.get("category") in CORE_CATEGORIES
+    ]
+    high_count = len(core_high)
+    has_high_liability = any(r.get("severity") == "High" and r.get("category") == "Liability" for r in risk_items)
+    has_high_termination = any(r.get("severity") == "High" and r.get("category") == "Termination" for r in risk_items)
 
+    if (
+        risk_score >= policy["reject_score"]
+        or high_count >= policy["reject_core_high"]
+        or (has_high_liability and policy["reject_high_liability"])
+        or (has_high_termination and policy["reject_high_termination"])
+    ):
+        return "REJECT"
+    elif risk_score >= policy["edits_score"] or high_count >= policy["edits_core_high"]:
+        return "APPROVE_WITH_EDITS"
+    return "APPROVE"
+
+def policy_confidence(recommendation: str) -> float:
+    return 0.80 if recommendation != "REJECT" else 0.75
+
+def templated_rationale(
+    risk_items: List[Any], risk_score: float, recommendation: str, perspective: str = "customer"
+) -> str:
+    """
+    Deterministic rationale used when no LLM rationale is available.
+    """
+    favorable = f"{perspective.title()}-Favorable"
+    notable = [
+        r for r in risk_items
+        if r.get("severity") in ("High", "Medium") and r.get("direction") != favorable
+    ]
+    notable.sort(key=lambda r: 0 if r.get("severity") == "High" else 1)
+    if notable:
+        risks = "; ".join(
+            f"{r.get('category')} ({r.get('severity')}): {str(r.get('evidence') or '').rstrip('.')}"
+            for r in notable[:3]
+        )
+        drivers = f"Main drivers: {risks}."
+    else:
+        drivers = f"No medium or high {perspective}-unfavorable risks were identified."
+    return (
+        f"Policy recommendation {recommendation} at risk score {risk_score:.1f} "
+        f"from {len(risk_items)} structured risk(s). {drivers}"
+    )
+
+def judge_policy(state: DealGraphState, perspective: str = "customer") -> Dict:
+    """
+    Judge output from the deterministic policy alone (templated rationale).
+    """
     risk_items = state.get("risk_items", []) or []
     risk_score = float(state.get("risk_score", 0.0) or 0.0)
-    precedents = state.get("supporting_precedents", []) or []
-    negotiation_notes = state.get("negotiation_analysis") or "None"
     deal_text = getattr(state.get("deal"), "raw_text", "") or ""
 
-    # Guardrail FIRST
-    if len(deal_text) < 300 or not risk_items:
+    if is_insufficient_detail(deal_text, risk_items):
         return {
             "recommendation": "APPROVE_WITH_EDITS",
             "rationale": "Insufficient detail provided.",
             "confidence": 0.60,
-            "execution_trace": trace + ["judge_agent"],
+            "execution_trace": ["judge_agent"],
             "current_node": "judge",
         }
 
-    structured_risks = _format_structured_risks(risk_items)
-    precedents_text = "\n".join([f"- {p}" for p in precedents]) if precedents else "None"
+    recommendation = decide_recommendation(risk_items, risk_score)
+    return {
+        "recommendation": recommendation,
+        "rationale": templated_rationale(risk_items, risk_score, recommendation, perspective),
+        "confidence": float(policy_confidence(recommendation)),
+        "execution_trace": ["judge_agent"],
+        "current_node": "judge",
+    }
 
-    # Deterministic decision policy
-    core_high = [
-        r for r in risk_items
-        if r.get("severity") == "High"
-        and r.get("category") in ["Termination", "Liability", "Service Changes"]
-    ]
-    high_count = len(core_high)
-    has_high_liability = any(r.get("severity") == "High" and r.get("category") == "Liability" for r in risk_items)
-    has_high_termination = any(r.get("severity") == "High" and r.get("category") == "Termination" for r in risk_items)
+def judge_agent(state: DealGraphState) -> Dict:
+    risk_items = state.get("risk_items", []) or []
+    risk_score = float(state.get("risk_score", 0.0) or 0.0)
+    precedents = state.get("supporting_precedents", []) or []
+    negotiation_notes = state.get("negotiation_analysis") or "None"
+    deal_text = getattr(state.get("deal"), "raw_text", "") or ""
 
-    if risk_score >= 60 or high_count >= 2 or has_high_liability or has_high_termination:
-        recommendation = "REJECT"
-    elif risk_score >= 30 or high_count == 1:
-        recommendation = "APPROVE_WITH_EDITS"
-    else:
-        recommendation = "APPROVE"
+    # Guardrail FIRST, then the deterministic policy; the LLM writes rationale only
+    decision = judge_policy(state)
+    if is_insufficient_detail(deal_text, risk_items):
+        return decision
 
-    confidence = 0.80 if recommendation != "REJECT" else 0.75
+    structured_risks = _format_structured_risks(risk_items)
+    precedents_text = "\n".join([f"- {p}" for p in precedents]) if precedents else "None"
 
-    resp = llm.invoke(JUDGE_PROMPT.format(
+    prompt = JUDGE_PROMPT.format(
         risk_score=f"{risk_score:.1f}",
         structured_risks=structured_risks,
         precedents=precedents_text,
         negotiation_notes=negotiation_notes
-    ))
+    )
+    try:
+        check_budget(state, "judge", prompt)
+        resp = invoke_llm("judge", prompt, tier=state.get("model_tier"))
+    except LLMUnavailable:
+        # degraded: the recommendation is already deterministic; keep the templated rationale
+        decision["rationale"] = "[Degraded: LLM rationale unavailable] " + decision["rationale"]
+        decision["degraded"] = True
+        decision["degraded_nodes"] = ["judge"]
+        return decision
 
     try:
         obj = _safe_json_loads(resp.content)
@@ -113,10 +193,6 @@ def judge_agent(state: DealGraphState) -> Dict:
         # last-resort fallback (should be rare)
         rationale = "Rationale could not be parsed as JSON. Treat this as a judge formatting failure."
 
-    return {
-        "recommendation": recommendation,
-        "rationale": rationale,
-        "confidence": float(confidence),
-        "execution_trace": trace + ["judge_agent"],
-        "current_node": "judge",
-    }
+    decision["rationale"] = rationale
+    decision["llm_usage"] = [usage_entry("judge", state.get("model_tier"), prompt, resp)]
+    return decision
@@ -1,14 +1,13 @@
 from __future__ import annotations
 
 from typing import Dict
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 
+from agents.hedging import LLMUnavailable, invoke_llm
+from agents.prompts import LazyPrompt
+from agents.usage import check_budget, usage_entry
 from graph.state import DealGraphState
 
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-
-NEGOTIATION_PROMPT = ChatPromptTemplate.from_messages([
+NEGOTIATION_PROMPT = LazyPrompt([
     ("system", """
 You are a negotiation strategy analyst for commercial contracts.
 
@@ -35,8 +34,19 @@ DEAL CLAUSES (if available):
 """)
 ])
 
+def _templated_negotiation_notes(risk_items) -> str:
+    asks = [
+        r for r in risk_items or []
+        if r.get("severity") in ("High", "Medium") and r.get("direction") == "Customer-Unfavorable"
+    ]
+    if not asks:
+        return "No customer-unfavorable medium/high risks to renegotiate."
+    return "\n".join(
+        f"{i}. {r.get('category')}: renegotiate \"{r.get('evidence')}\" ({r.get('severity')} risk)."
+        for i, r in enumerate(asks, 1)
+    )
+
 def negotiation_agent(state: DealGraphState) -> Dict:
-    trace = state.get("execution_trace", [])
     deal = state["deal"]
 
     risks = state.get("extracted_risks", {})          # ✅ normalized dict
@@ -53,15 +63,27 @@ def negotiation_agent(state: DealGraphState) -> Dict:
         if getattr(deal, "clauses", None) else "None"
     )
 
-    resp = llm.invoke(NEGOTIATION_PROMPT.format(
+    prompt = NEGOTIATION_PROMPT.format(
         risks=risks_text,
         precedents=precedents_text,
         clauses=clauses_text
-    ))
+    )
+    try:
+        check_budget(state, "negotiation", prompt)
+        resp = invoke_llm("negotiation", prompt, tier=state.get("model_tier"))
+    except LLMUnavailable:
+        return {
+            "negotiation_analysis": _templated_negotiation_notes(state.get("risk_items")),
+            "degraded": True,
+            "degraded_nodes": ["negotiation"],
+            "execution_trace": ["negotiation_agent"],
+            "current_node": "negotiation",
+        }
 
     return {
         "negotiation_analysis": resp.content,
-        "execution_trace": trace + ["negotiation_agent"],
+        "llm_usage": [usage_entry("negotiation", state.get("model_tier"), prompt, resp)],
+        "execution_trace": ["negotiation_agent"],
         "current_node": "negotiation",
     }
 
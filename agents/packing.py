@@ -0,0 +1,156 @@
+# agents/packing.py
+"""
+Multi-deal prompt packing for small contracts (bulk mode).
+
+Short order forms and amendments are a few hundred characters; for them the
+fixed clause / risk system prompts and the per-request overhead cost more
+than the deal itself. In bulk mode (`python -m graph.batch --pack`) small
+deals are packed into one combined clause + risk extraction request:
+
+    === DEAL <id> ===
+    <deal text>
+    === END DEAL <id> ===
+
+and the model answers {"deals": [{"id", "clauses": [...], "risks": [...]}]}.
+`split_packed()` cuts the response back into each deal's
+raw_clause_extraction / risk_analysis, which the deal's graph run takes
+from state["packed_extraction"] instead of calling the clause and risk
+agents. Deals whose entry is missing, duplicated or malformed (or whose
+whole request failed) get no packed extraction: they are retried
+individually through the regular per-deal clause / risk calls.
+
+The packed call's token usage is split across its deals by text length, so
+per-deal accounting (agents/usage.py) still adds up.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from agents.hedging import LLMUnavailable, invoke_llm
+from agents.prompts import LazyPrompt
+from agents.usage import usage_entry
+
+# deals up to this size are packed; a request holds at most PACK_MAX_DEALS / PACK_MAX_CHARS
+PACK_MAX_DEAL_CHARS = 1500
+PACK_MAX_DEALS = 8
+PACK_MAX_CHARS = 6000
+
+PACKED_PROMPT = LazyPrompt([
+    ("system", """
+You are a legal document parser and risk analyst for commercial contracts.
+
+You receive SEVERAL independent deals, each between "=== DEAL <id> ===" and
+"=== END DEAL <id> ===". Analyze every deal on its own; never mix text from
+different deals.
+
+For each deal:
+- "clauses": ONLY explicitly stated clauses, as objects with exactly two keys:
+  "type" (one of Payment, Termination, Liability, Indemnification, IP, Confidentiality,
+  Security, Data Protection, Jurisdiction, Renewal, SLA, Other) and "text"
+  (verbatim or near-verbatim clause text)
+- "risks": ONLY risks explicitly supported by that deal's text, as objects with
+  "category" (Payment|Termination|Liability|SLA|Service Changes|IP|Jurisdiction|Other),
+  "risk" (short description), "evidence" (verbatim or near-verbatim snippet),
+  "severity" (Low|Medium|High), "direction" (Customer-Favorable|Balanced|Customer-Unfavorable)
+- Do NOT infer missing terms.
+
+Output MUST be valid JSON only (no markdown, no commentary), one entry per deal:
+{{"deals": [{{"id": "<id>", "clauses": [...], "risks": [...]}}]}}
+"""),
+    ("human", "{deals}")
+])
+
+
+def is_small(deal_text: str) -> bool:
+    return len(deal_text or "") <= PACK_MAX_DEAL_CHARS
+
+
+def pack(deals: List[Dict[str, str]]) -> List[List[Dict[str, str]]]:
+    """Greedy, order-preserving packs of small deals ({"deal_id", "deal_text"})."""
+    packs: List[List[Dict[str, str]]] = []
+    current: List[Dict[str, str]] = []
+    size = 0
+    for deal in deals:
+        n = len(deal["deal_text"])
+        if current and (len(current) >= PACK_MAX_DEALS or size + n > PACK_MAX_CHARS):
+            packs.append(current)
+            current, size = [], 0
+        current.append(deal)
+        size += n
+    if current:
+        packs.append(current)
+    return packs
+
+
+def packed_prompt(deals: List[Dict[str, str]]) -> str:
+    blocks = [f"=== DEAL {d['deal_id']} ===\n{d['deal_text'].strip()}\n=== END DEAL {d['deal_id']} ===" for d in deals]
+    return PACKED_PROMPT.format(deals="\n\n".join(blocks))
+
+
+def split_packed(text: str, deal_ids: List[str]) -> Dict[str, Dict[str, str]]:
+    """Well-formed entries of a packed response, by deal id (the rest are retried individually)."""
+    cleaned = (text or "").strip()
+    cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned)
+    cleaned = re.sub(r"\s*```$", "", cleaned)
+    try:
+        entries = json.loads(cleaned).get("deals")
+    except Exception:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    wanted = set(deal_ids)
+    seen: Dict[str, int] = {}
+    out: Dict[str, Dict[str, str]] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        deal_id = str(entry.get("id"))
+        seen[deal_id] = seen.get(deal_id, 0) + 1
+        clauses, risks = entry.get("clauses"), entry.get("risks")
+        if deal_id not in wanted or not isinstance(clauses, list) or not isinstance(risks, list):
+            continue
+        if not all(isinstance(c, dict) for c in clauses) or not all(isinstance(r, dict) for r in risks):
+            continue
+        out[deal_id] = {
+            "raw_clause_extraction": json.dumps(clauses, ensure_ascii=False),
+            "risk_analysis": json.dumps({"risks": risks}, ensure_ascii=False),
+        }
+    # an id answered twice can't be attributed safely
+    return {k: v for k, v in out.items() if seen[k] == 1}
+
+
+def _share_usage(entry: Dict[str, Any], share: float) -> Dict[str, Any]:
+    return {
+        **entry,
+        "input_tokens": round(entry["input_tokens"] * share),
+        "output_tokens": round(entry["output_tokens"] * share),
+        "cost_usd": round(entry["cost_usd"] * share, 8),
+    }
+
+
+def extract_packed(deals: List[Dict[str, str]], tier: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    One packed extraction request for `deals`. Returns the state patch for
+    each deal's graph run: {"llm_usage": [its share of the call]} plus
+    "packed_extraction" when its entry parsed. Empty when the call failed.
+    """
+    prompt = packed_prompt(deals)
+    try:
+        resp = invoke_llm("packed", prompt, tier=tier)
+    except LLMUnavailable:
+        return {}
+
+    parsed = split_packed(resp.content, [d["deal_id"] for d in deals])
+    entry = usage_entry("packed", tier, prompt, resp)
+    total = sum(len(d["deal_text"]) for d in deals) or 1
+    out = {}
+    for d in deals:
+        # deals retried individually still carry their share of the packed call
+        patch: Dict[str, Any] = {"llm_usage": [_share_usage(entry, len(d["deal_text"]) / total)]}
+        if d["deal_id"] in parsed:
+            patch["packed_extraction"] = parsed[d["deal_id"]]
+        out[d["deal_id"]] = patch
+    return out
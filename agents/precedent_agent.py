@@ -1,9 +1,17 @@
 from __future__ import annotations
-from typing import Dict, Any, List, Tuple
+import heapq
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
+from graph.normalize import build_risk_vector, normalize_risk_list
+from graph.prepass import deterministic_risks
 from graph.state import DealGraphState
-from memory.deal_history import load_history
-from memory.similarity import jaccard
+from memory.deal_history import history_path, iter_history, parse_namespaces, snapshot_filter
+from memory.precedent_cache import cache as precedent_cache
+from memory.similarity import Vocabulary, jaccard_many
 
 TOP_K = 3
 
@@ -48,31 +56,234 @@ def _snapshot_to_text(s: Dict[str, Any]) -> str:
     risk_text = "\n".join(list(risks.values())) if isinstance(risks, dict) else ""
     return f"CLAUSES:\n{clause_text}\n\nRISKS:\n{risk_text}".strip()
 
-def precedent_agent(state: DealGraphState) -> Dict:
-    trace = state.get("execution_trace", [])
-    history = load_history()
+# best similarity either score can reach; k of these end a streaming scan early
+PERFECT_SCORE = 1.0
+
+def top_k(
+    scored: Iterable[Tuple[float, Dict[str, Any]]],
+    k: Optional[int],
+) -> List[Tuple[float, Dict[str, Any]]]:
+    """
+    Highest-scoring (score, item) pairs with score > 0, best first; ties keep
+    input order (same result as a stable sort). With k set, memory is O(k):
+    a min-heap of (score, -seq) and the scan stops once it holds k perfect
+    scores, since later ties can't displace earlier items.
+    """
+    if not k:
+        out = [(score, item) for score, item in scored if score > 0]
+        out.sort(key=lambda x: x[0], reverse=True)
+        return out
+
+    heap: List[Tuple[float, int, Dict[str, Any]]] = []
+    perfect = 0
+    for seq, (score, item) in enumerate(scored):
+        if score <= 0:
+            continue
+        entry = (score, -seq, item)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+        else:
+            continue
+        if score >= PERFECT_SCORE:
+            perfect += 1
+            if perfect >= k:
+                break
+    heap.sort(key=lambda e: (e[0], e[1]), reverse=True)
+    return [(score, item) for score, _, item in heap]
+
+def rank_by_vector(
+    query_vec: Dict[str, str],
+    history: Iterable[Dict[str, Any]],
+    limit: Optional[int] = None,
+) -> List[Tuple[float, Dict[str, Any]]]:
+    scored = (
+        (_risk_vector_similarity(query_vec, item.get("risk_vector", {}) or {}), item)
+        for item in history
+    )
+    return top_k(scored, limit)
+
+def rank_by_text(
+    query: str,
+    history: Iterable[Dict[str, Any]],
+    limit: Optional[int] = None,
+) -> List[Tuple[float, Dict[str, Any]]]:
+    return top_k(_text_scores(query, history), limit)
+
+# records scored per jaccard_many call while streaming a shard
+TEXT_BATCH = 1024
+
+def _text_scores(query: str, history: Iterable[Dict[str, Any]]) -> Iterable[Tuple[float, Dict[str, Any]]]:
+    # the query is tokenized once; each batch is one vectorized pass
+    vocab = Vocabulary()
+    q = vocab.encode(query)
+    batch: List[Dict[str, Any]] = []
+    for item in history:
+        batch.append(item)
+        if len(batch) >= TEXT_BATCH:
+            yield from zip(jaccard_many(q, [_snapshot_to_text(i) for i in batch], vocab), batch)
+            batch = []
+    if batch:
+        yield from zip(jaccard_many(q, [_snapshot_to_text(i) for i in batch], vocab), batch)
+
+# -------------------------
+# Namespaced shards
+# -------------------------
+# Each tenant / business-unit namespace is its own history file. A query scans
+# only the requested namespaces, each shard returns its own top-k, and the
+# merged top-k is exact (the global top-k is a subset of the shard top-ks).
+#
+#   DEALGRAPH_SHARD_POOL=thread|process|none   fan-out for multi-shard queries
+#   DEALGRAPH_SHARD_WORKERS=4
+
+SHARD_POOLS = ("thread", "process", "none")
+
+_pool_lock = threading.Lock()
+_pools: Dict[str, Executor] = {}
+
+def _shard_pool() -> str:
+    pool = os.getenv("DEALGRAPH_SHARD_POOL", "thread").lower()
+    return pool if pool in SHARD_POOLS else "thread"
+
+def _executor(kind: str) -> Executor:
+    with _pool_lock:
+        if kind not in _pools:
+            workers = int(os.getenv("DEALGRAPH_SHARD_WORKERS", "4"))
+            if kind == "process":
+                # spawn: the graph runs nodes on threads, fork would copy their locks
+                _pools[kind] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                _pools[kind] = ThreadPoolExecutor(workers, thread_name_prefix="dealgraph-shard")
+        return _pools[kind]
+
+def _rank_shard(
+    mode: str,
+    query: Any,
+    namespace: str,
+    k: int,
+    filters: Optional[Dict[str, Any]] = None,
+    paths: Optional[Dict[str, str]] = None,
+) -> List[Tuple[float, Dict[str, Any]]]:
+    # streamed: a shard is never materialized, only its top-k heap is kept
+    path = history_path(namespace, paths)
+    keep = snapshot_filter(filters)
+    if mode == "vector":
+        # identical vectors are common: cached per signature, patched on append
+        ranked = precedent_cache.ranked(path, query, k, filters, keep, _risk_vector_similarity,
+                                        lambda: rank_by_vector(query, iter_history(path, keep), k))
+    else:
+        # snapshot texts are encoded once per shard, not re-tokenized per query
+        ranked = precedent_cache.ranked_text(path, query, k, keep, _snapshot_to_text,
+                                             lambda: rank_by_text(query, iter_history(path, keep), k))
+    for _, item in ranked:
+        item.setdefault("namespace", namespace)
+    return ranked
 
+def search_namespaces(
+    mode: str,
+    query: Any,
+    namespaces: List[str],
+    k: int,
+    pool: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    paths: Optional[Dict[str, str]] = None,
+) -> List[Tuple[float, Dict[str, Any]]]:
+    """
+    mode: "vector" (query = risk vector) or "text" (query = text); merged top-k.
+    filters: see memory.deal_history.snapshot_filter.
+    paths: state["history_paths"] (see memory.deal_history.history_path).
+    """
+    pool = pool or _shard_pool()
+    if len(namespaces) == 1 or pool == "none":
+        per_shard = [_rank_shard(mode, query, ns, k, filters, paths) for ns in namespaces]
+    else:
+        n = len(namespaces)
+        per_shard = list(_executor(pool).map(
+            _rank_shard, [mode] * n, [query] * n, namespaces, [k] * n, [filters] * n, [paths] * n,
+        ))
+    # nlargest is stable: ties keep namespace order, like a single sorted scan
+    return heapq.nlargest(k, (s for shard in per_shard for s in shard), key=lambda x: x[0])
+
+# -------------------------
+# Speculative retrieval
+# -------------------------
+# A deterministic pre-pass over deal.raw_text predicts the risk vector at graph
+# entry, so the history scan overlaps the clause/risk LLM calls. The final
+# node reuses the candidate pool if the prediction was exact, re-ranks the
+# pool if it was close, and only rescans history on a miss.
+
+SPECULATIVE_POOL = 25
+# below this provisional-vs-final similarity the pool is not trusted
+RERANK_MIN_SIMILARITY = 0.5
+
+_spec_lock = threading.Lock()
+_spec_counts = {"hit": 0, "rerank": 0, "miss": 0}
+
+def _record_speculation(outcome: str) -> None:
+    with _spec_lock:
+        _spec_counts[outcome] += 1
+
+def speculation_stats() -> Dict[str, Any]:
+    with _spec_lock:
+        counts = dict(_spec_counts)
+    total = sum(counts.values())
+    counts["total"] = total
+    counts["hit_rate"] = round(counts["hit"] / total, 4) if total else 0.0
+    counts["reuse_rate"] = round((counts["hit"] + counts["rerank"]) / total, 4) if total else 0.0
+    return counts
+
+def provisional_risk_vector(raw_text: str) -> Dict[str, str]:
+    _, items = normalize_risk_list(deterministic_risks(raw_text))
+    return build_risk_vector(items)
+
+def speculative_precedent(state: DealGraphState) -> Dict:
+    """
+    Graph-entry node running in parallel with LLM extraction.
+    Must not write keys the parallel branch writes (e.g. current_node).
+    """
+    vec = provisional_risk_vector(state["deal"].raw_text)
+    namespaces = parse_namespaces(state.get("namespaces"))
+    filters = state.get("precedent_filters")
+    pool = search_namespaces("vector", vec, namespaces, SPECULATIVE_POOL, filters=filters,
+                             paths=state.get("history_paths")) if vec else []
+    return {
+        "speculation": {"vector": vec, "candidates": pool},
+        "execution_trace": ["speculate"],
+    }
+
+def _from_speculation(state: DealGraphState, query_vec: Dict[str, str]) -> Tuple[str, Optional[List[Tuple[float, Dict[str, Any]]]]]:
+    spec = state.get("speculation") or {}
+    spec_vec = spec.get("vector") or {}
+    pool = spec.get("candidates") or []
+    if spec_vec == query_vec:
+        return "hit", list(pool)
+    if pool and _risk_vector_similarity(spec_vec, query_vec) >= RERANK_MIN_SIMILARITY:
+        return "rerank", rank_by_vector(query_vec, [item for _, item in pool])
+    return "miss", None
+
+def precedent_agent(state: DealGraphState) -> Dict:
     # NEW: vector-first
     query_vec = state.get("risk_vector", {}) or {}
 
-    scored: List[Tuple[float, Dict[str, Any]]] = []
-    if query_vec:
-        for item in history:
-            cand_vec = item.get("risk_vector", {}) or {}
-            score = _risk_vector_similarity(query_vec, cand_vec)
-            if score > 0:
-                scored.append((score, item))
+    scored: Optional[List[Tuple[float, Dict[str, Any]]]] = None
+    outcome: Optional[str] = None
+    if query_vec and state.get("speculation") is not None:
+        outcome, scored = _from_speculation(state, query_vec)
+        _record_speculation(outcome)
+
+    namespaces = parse_namespaces(state.get("namespaces"))
+    filters = state.get("precedent_filters")
+    paths = state.get("history_paths")
+    if scored is None:
+        scored = search_namespaces("vector", query_vec, namespaces, TOP_K, filters=filters,
+                                   paths=paths) if query_vec else []
 
     # Fallback to old text similarity if vectors unavailable or no matches
     if not scored:
-        query = _build_query_text(state)
-        for item in history:
-            candidate = _snapshot_to_text(item)
-            score = jaccard(query, candidate)
-            if score > 0:
-                scored.append((score, item))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
+        scored = search_namespaces("text", _build_query_text(state), namespaces, TOP_K, filters=filters,
+                                   paths=paths)
+
     top = scored[:TOP_K]
 
     supporting_precedents: List[str] = []
@@ -92,8 +303,9 @@ def precedent_agent(state: DealGraphState) -> Dict:
             if isinstance(risks, dict) and risks:
                 snippet = next(iter(risks.values()))
 
+        ns_str = f" ns={item.get('namespace')}" if len(namespaces) > 1 else ""
         supporting_precedents.append(
-            f"[{score:.2f}] deal={deal_id} rec={rec}{vec_str} :: {snippet}"
+            f"[{score:.2f}]{ns_str} deal={deal_id} rec={rec}{vec_str} :: {snippet}"
         )
 
     precedent_analysis = (
@@ -105,6 +317,7 @@ def precedent_agent(state: DealGraphState) -> Dict:
     return {
         "supporting_precedents": supporting_precedents,
         "precedent_analysis": precedent_analysis,
-        "execution_trace": trace + ["precedent_agent"],
+        "speculation_outcome": outcome,
+        "execution_trace": ["precedent_agent"],
         "current_node": "precedent",
     }
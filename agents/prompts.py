@@ -0,0 +1,36 @@
+# agents/prompts.py
+from __future__ import annotations
+
+import threading
+from typing import Any, List, Tuple
+
+
+class LazyPrompt:
+    """
+    ChatPromptTemplate built on first use, so importing an agent module does
+    not import langchain_core. Exposes the template API the agents rely on.
+    """
+
+    def __init__(self, messages: List[Tuple[str, str]]):
+        self.messages = messages
+        self._template: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def template(self) -> Any:
+        if self._template is None:
+            with self._lock:
+                if self._template is None:
+                    from langchain_core.prompts import ChatPromptTemplate
+
+                    self._template = ChatPromptTemplate.from_messages(self.messages)
+        return self._template
+
+    def format(self, **kwargs: Any) -> str:
+        return self.template.format(**kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # anything else (format_messages, input_variables, ...) -> real template
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.template, name)
@@ -2,17 +2,22 @@
 from __future__ import annotations
 
 import json
+import os
 import re
-from typing import Dict, Any
-
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+import threading
+from typing import Dict, Any, List, Optional
 
+from agents.hedging import LLMUnavailable, invoke_llm, stream_llm
+from agents.prompts import LazyPrompt
+from agents.usage import check_budget, usage_entry
+from graph.normalize import normalize_risk_item
+from graph.prepass import deterministic_risk_analysis
+from graph.records import RiskItem
+from graph.relevance import relevance_enabled, relevance_filter
 from graph.state import DealGraphState
+from graph.stream_json import RiskArrayParser
 
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-
-RISK_PROMPT = ChatPromptTemplate.from_messages([
+RISK_PROMPT = LazyPrompt([
     ("system", """
 You are a senior legal risk analyst specializing in commercial contracts.
 
@@ -43,7 +48,7 @@ EXTRACTED CLAUSES (if any):
 """)
 ])
 
-def _try_parse_risk_json(text: str) -> Dict[str, Any]:
+def _parse_risk_json(text: str) -> Optional[Dict[str, Any]]:
     cleaned = text.strip()
     cleaned = re.sub(r"^```(?:json)?\s*", "", cleaned)
     cleaned = re.sub(r"\s*```$", "", cleaned)
@@ -53,28 +58,125 @@ def _try_parse_risk_json(text: str) -> Dict[str, Any]:
             return obj
     except Exception:
         pass
-    return {"risks": []}
+    return None
+
+def _try_parse_risk_json(text: str) -> Dict[str, Any]:
+    return _parse_risk_json(text) or {"risks": []}
+
+def stream_enabled(state: DealGraphState) -> bool:
+    if "stream_risks" in state:
+        return bool(state["stream_risks"])
+    return os.getenv("DEALGRAPH_STREAM_RISKS", "").lower() in {"1", "true", "yes"}
+
+def _stream_risks(prompt: Any, tier: Optional[str]) -> Dict:
+    """
+    Parse the token stream incrementally; every completed `risks` element is
+    normalized as soon as it closes, while later tokens are still arriving.
+
+    A stream cut off by its deadline (or a failed connection) keeps the
+    elements that already closed and marks the node degraded; LLMUnavailable
+    only propagates when nothing parsed.
+    """
+    parser = RiskArrayParser()
+    raw: List[Dict[str, Any]] = []
+    items: List[RiskItem] = []
+    lock = threading.Lock()  # the abandoned stream may still deliver one chunk
+
+    def on_chunk(text: str) -> None:
+        with lock:
+            for r in parser.feed(text):
+                raw.append(r)
+                item = normalize_risk_item(r)
+                if item is not None:
+                    items.append(item)
+
+    try:
+        usage = stream_llm("risk", prompt, on_chunk, tier=tier)
+    except LLMUnavailable:
+        with lock:
+            if not raw:
+                raise
+            return {
+                "risk_analysis": json.dumps({"risks": list(raw)}, ensure_ascii=False),
+                "risk_parse_ok": False,
+                "streamed_risk_items": list(items),
+                "degraded": True,
+                "degraded_nodes": ["risk"],
+                "llm_usage": [usage_entry("risk", tier, prompt, completion=parser.text)],
+            }
+    llm_usage = [usage_entry("risk", tier, prompt, usage=usage, completion=parser.text)]
+
+    if not parser.complete and not raw:
+        # nothing streamed cleanly; fall back to the whole-text parse
+        parsed = _parse_risk_json(parser.text)
+        return {
+            "risk_analysis": json.dumps(parsed or {"risks": []}, ensure_ascii=False),
+            "risk_parse_ok": parsed is not None,
+            "streamed_risk_items": None,
+            "llm_usage": llm_usage,
+        }
+    # a malformed tail keeps every element that already parsed
+    return {
+        "risk_analysis": json.dumps({"risks": raw}, ensure_ascii=False),
+        "risk_parse_ok": parser.complete and not parser.malformed,
+        "streamed_risk_items": items,
+        "llm_usage": llm_usage,
+    }
 
 def risk_agent(state: DealGraphState) -> Dict:
     deal = state["deal"]
-    trace = state.get("execution_trace", [])
+
+    packed = state.get("packed_extraction")
+    if packed:
+        return {
+            "risk_analysis": packed["risk_analysis"],
+            "risk_parse_ok": True,
+            "streamed_risk_items": None,
+            "execution_trace": ["risk_agent:packed"],
+            "current_node": "risk",
+        }
 
     clauses_text = (
         "\n".join([f"- {c.type}: {c.text}" for c in getattr(deal, "clauses", [])])
         if getattr(deal, "clauses", None) else "None"
     )
-
-    resp = llm.invoke(RISK_PROMPT.format(
-        deal_text=deal.raw_text,
+    deal_text, relevance = deal.raw_text, None
+    if relevance_enabled(state):
+        # only risk-relevant sentences (+ context) reach the LLM (graph/relevance.py)
+        deal_text, relevance = relevance_filter(deal.raw_text)
+    prompt = RISK_PROMPT.format(
+        deal_text=deal_text,
         clauses=clauses_text
-    ))
+    )
+
+    try:
+        check_budget(state, "risk", prompt)
+        if stream_enabled(state):
+            out = _stream_risks(prompt, state.get("model_tier"))
+            out.update({"relevance": relevance, "execution_trace": ["risk_agent"], "current_node": "risk"})
+            return out
+        resp = invoke_llm("risk", prompt, tier=state.get("model_tier"))
+    except LLMUnavailable:
+        # degraded: sentence-level deterministic classification of the raw text
+        return {
+            "risk_analysis": deterministic_risk_analysis(deal.raw_text),
+            "streamed_risk_items": None,
+            "degraded": True,
+            "degraded_nodes": ["risk"],
+            "execution_trace": ["risk_agent"],
+            "current_node": "risk",
+        }
 
     # Store as JSON string (guaranteed parseable downstream)
-    parsed = _try_parse_risk_json(resp.content)
-    risk_analysis = json.dumps(parsed, ensure_ascii=False)
+    parsed = _parse_risk_json(resp.content)
+    risk_analysis = json.dumps(parsed or {"risks": []}, ensure_ascii=False)
 
     return {
         "risk_analysis": risk_analysis,
-        "execution_trace": trace + ["risk_agent"],
+        "risk_parse_ok": parsed is not None,
+        "streamed_risk_items": None,
+        "relevance": relevance,
+        "llm_usage": [usage_entry("risk", state.get("model_tier"), prompt, resp)],
+        "execution_trace": ["risk_agent"],
         "current_node": "risk",
     }
@@ -0,0 +1,269 @@
+# agents/scheduler.py
+"""
+Rate-limit-aware scheduling of LLM calls (RPM / TPM token buckets).
+
+Every call made through agents.hedging first acquires one request and its
+estimated tokens (prompt length + the agent's typical completion) from the
+buckets of its model. Calls that don't fit wait in a per-model priority
+queue instead of going out and coming back as 429s:
+
+1. deals already in flight (they made a call before) go first, oldest
+   deal first: finishing started deals maximizes completed deals/minute;
+2. then deals that haven't started, shortest deal first.
+
+After the call, the bucket is corrected with the tokens actually used
+(agents/usage.py accounting), so estimates don't drift.
+
+The deal a call belongs to comes from a ContextVar: batch runners wrap each
+deal in `deal_scope(deal_id, chars)` (it follows the call into LangGraph's
+and the hedging pool's threads), or route a compiled graph's invoke through
+`scheduled(app)`, which scopes every run by its state's deal. Calls outside any scope rank as new deals
+of unknown size.
+
+Configuration (0 / unset = unlimited, and then acquire() returns at once):
+
+    DEALGRAPH_RPM, DEALGRAPH_TPM            default limits per model
+    DEALGRAPH_RATE_LIMITS="gpt-4o-mini=500:200000,gpt-3.5-turbo=3500:90000"
+                                            per-model RPM:TPM overrides
+
+`scheduler_stats()` reports queue depth (current / max), waits and wait
+time (total, p50, p95) per model.
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from agents.clients import CHARS_PER_TOKEN, TYPICAL_OUTPUT_TOKENS
+
+# buckets hold this many seconds' worth of the per-minute limit (the burst size)
+BURST_SECONDS = 10.0
+WAIT_WINDOW = 1024
+
+
+class RateLimitTimeout(TimeoutError):
+    """No capacity before the caller's deadline."""
+
+
+class DealTicket:
+    """Scheduling identity of one deal: arrival order, size, in flight or not."""
+
+    _seq = itertools.count()
+
+    def __init__(self, deal_id: Any, chars: int):
+        self.deal_id = deal_id
+        self.chars = chars
+        self.seq = next(self._seq)
+        self.started = False
+
+    def priority(self) -> Tuple[int, float]:
+        if self.started:
+            return 0, self.seq
+        return 1, self.chars
+
+
+_deal: contextvars.ContextVar[Optional[DealTicket]] = contextvars.ContextVar("dealgraph_deal", default=None)
+
+
+@contextlib.contextmanager
+def deal_scope(deal_id: Any, chars: int) -> Iterator[DealTicket]:
+    ticket = DealTicket(deal_id, chars)
+    token = _deal.set(ticket)
+    try:
+        yield ticket
+    finally:
+        _deal.reset(token)
+
+
+def scheduled(app: Any) -> Any:
+    """Route `app.invoke` through deal_scope, keyed by state["deal"] (runs without one are unscoped)."""
+    original = app.invoke
+
+    @functools.wraps(original)
+    def invoke(state, config=None, **kwargs):
+        deal = (state or {}).get("deal")
+        if deal is None:
+            return original(state, config, **kwargs)
+        with deal_scope(deal.deal_id, len(deal.raw_text or "")):
+            return original(state, config, **kwargs)
+
+    app.invoke = invoke
+    return app
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute * burst_seconds / 60.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (requests bigger than the bucket need a full bucket)."""
+        need = min(amount, self.capacity) - self.tokens
+        return max(0.0, need / self.rate) if self.rate > 0 else math.inf
+
+
+class ModelLimiter:
+    """RPM + TPM buckets and the priority queue for one model."""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.buckets = {}
+        if rpm > 0:
+            self.buckets["requests"] = TokenBucket(rpm)
+        if tpm > 0:
+            self.buckets["tokens"] = TokenBucket(tpm)
+        self.cond = threading.Condition()
+        self.queue: List[Tuple[Tuple[int, float], int]] = []
+        self._arrival = itertools.count()
+        self.max_depth = 0
+        self.acquired = 0
+        self.waited = 0
+        self.wait_total_s = 0.0
+        self.waits: Deque[float] = deque(maxlen=WAIT_WINDOW)
+
+    def acquire(self, tokens: int, priority: Tuple[int, float], timeout: Optional[float] = None) -> float:
+        """Block until this call may go out; returns the seconds waited."""
+        need = {"requests": 1.0, "tokens": float(tokens)}
+        start = time.monotonic()
+        end = start + timeout if timeout is not None else None
+        with self.cond:
+            entry = (priority, next(self._arrival))
+            heapq.heappush(self.queue, entry)
+            self.max_depth = max(self.max_depth, len(self.queue))
+            try:
+                while True:
+                    now = time.monotonic()
+                    for b in self.buckets.values():
+                        b.refill(now)
+                    delay = max(self.buckets[k].wait_for(need[k]) for k in self.buckets)
+                    if self.queue[0] == entry and delay <= 0:
+                        for k, b in self.buckets.items():
+                            b.tokens -= need[k]
+                        break
+                    if end is not None and now >= end:
+                        raise RateLimitTimeout(f"no rate-limit capacity within {timeout:.1f}s")
+                    # only the head can be released by refill; others wait for a notify
+                    wake = delay if self.queue[0] == entry else None
+                    if end is not None:
+                        wake = min(wake, end - now) if wake is not None else end - now
+                    self.cond.wait(wake)
+            finally:
+                self.queue.remove(entry)
+                heapq.heapify(self.queue)
+                self.cond.notify_all()
+
+            waited = time.monotonic() - start
+            self.acquired += 1
+            if waited > 0.001:
+                self.waited += 1
+            self.wait_total_s += waited
+            self.waits.append(waited)
+        return waited
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        """Charge (or refund) the difference between estimated and actual tokens."""
+        bucket = self.buckets.get("tokens")
+        if bucket is None or actual == estimated:
+            return
+        with self.cond:
+            bucket.tokens = min(bucket.capacity, bucket.tokens - (actual - estimated))
+            self.cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.cond:
+            waits = sorted(self.waits)
+            pct = lambda p: round(waits[min(len(waits) - 1, int(p * len(waits)))], 4) if waits else 0.0
+            return {
+                "queue_depth": len(self.queue),
+                "max_queue_depth": self.max_depth,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "wait_total_s": round(self.wait_total_s, 4),
+                "wait_p50_s": pct(0.50),
+                "wait_p95_s": pct(0.95),
+            }
+
+
+def _parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    out = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        model, limits = part.split("=", 1)
+        rpm, _, tpm = limits.partition(":")
+        out[model.strip()] = (float(rpm or 0), float(tpm or 0))
+    return out
+
+
+class Scheduler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, Optional[ModelLimiter]] = {}
+        self.configure()
+
+    def configure(self, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                  per_model: Optional[Dict[str, Tuple[float, float]]] = None) -> None:
+        """(Re)read limits; arguments override the environment. Resets the buckets."""
+        with self._lock:
+            self.rpm = float(os.getenv("DEALGRAPH_RPM") or 0) if rpm is None else rpm
+            self.tpm = float(os.getenv("DEALGRAPH_TPM") or 0) if tpm is None else tpm
+            self.per_model = _parse_limits(os.getenv("DEALGRAPH_RATE_LIMITS", "")) if per_model is None else per_model
+            self._limiters = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 or self.tpm > 0 or any(r > 0 or t > 0 for r, t in self.per_model.values())
+
+    def limiter(self, model: str) -> Optional[ModelLimiter]:
+        limiter = self._limiters.get(model, False)
+        if limiter is not False:
+            return limiter
+        with self._lock:
+            if model not in self._limiters:
+                rpm, tpm = self.per_model.get(model, (self.rpm, self.tpm))
+                self._limiters[model] = ModelLimiter(rpm, tpm) if rpm > 0 or tpm > 0 else None
+            return self._limiters[model]
+
+    def acquire(self, model: str, agent: str, prompt: Any, timeout: Optional[float] = None) -> int:
+        """Wait for capacity for one call; returns the token estimate charged (0 when unlimited)."""
+        limiter = self.limiter(model)
+        if limiter is None:
+            return 0
+        tokens = len(str(prompt or "")) // CHARS_PER_TOKEN + TYPICAL_OUTPUT_TOKENS.get(agent, 400)
+        ticket = _deal.get()
+        priority = ticket.priority() if ticket is not None else (1, math.inf)
+        limiter.acquire(tokens, priority, timeout)
+        if ticket is not None:
+            ticket.started = True
+        return tokens
+
+    def reconcile(self, model: str, estimated: int, actual: Optional[int]) -> None:
+        limiter = self.limiter(model)
+        if limiter is not None and estimated and actual is not None:
+            limiter.reconcile(estimated, actual)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {model: lim.stats() for model, lim in limiters.items() if lim is not None}
+
+
+scheduler = Scheduler()
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    return scheduler.stats()
@@ -0,0 +1,239 @@
+# agents/usage.py
+"""
+Token / cost accounting and budget-aware admission control.
+
+Every LLM call made by an agent node is recorded as one entry in
+state["llm_usage"] (a list reducer):
+
+    {"agent", "model", "tier", "input_tokens", "output_tokens",
+     "cost_usd", "estimated"}
+
+Tokens come from the response's usage metadata; when the provider sends
+none they are estimated from the prompt / completion length and the entry
+is marked `estimated`. `usage_summary()` rolls the entries up per deal (and
+per agent) for the snapshot.
+
+Budgets (USD, estimated with agents.clients.MODEL_PRICES):
+
+- per deal: state["budget_usd"]. route_node picks the cheapest tier that
+  fits the deal's estimated cost ("fast", or "rules" = no LLM calls, every
+  node takes its deterministic fallback); before each call `check_budget`
+  raises BudgetExceeded (an LLMUnavailable) when spend so far plus the
+  call's estimate would exceed the budget.
+- per run: a RunBudget shared by a batch. `admit()` reserves each deal's
+  estimated cost before it starts and hands the graph a per-deal budget
+  that fits what is left. Deals that no longer fit are downgraded to a
+  cheaper tier or, with defer=True, deferred (not run). `settle()` returns
+  the unused part of the reservation once the actual spend is known.
+  `BatchBudget` bundles the per-deal ceiling, the run budget and the defer
+  choice for the batch runners (graph/batch.py, evals/run_parallel.py);
+  `BatchBudget.reserve(raw_text)` admits one deal and settles its spend.
+"""
+from __future__ import annotations
+
+import contextlib
+import math
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from agents.clients import CHARS_PER_TOKEN, TYPICAL_OUTPUT_TOKENS, agent_config, estimate_cost, response_usage
+from agents.hedging import LLMUnavailable
+
+# the "rules" tier makes no LLM calls (deterministic fallbacks only)
+RULES_TIER = "rules"
+# reservations cover the estimate plus this margin (completions vary in length)
+RESERVE_MARGIN = 1.25
+
+
+class BudgetExceeded(LLMUnavailable):
+    """The call would exceed the deal's budget; the node degrades instead."""
+
+
+def _tokens(text: Any) -> int:
+    return len(str(text or "")) // CHARS_PER_TOKEN
+
+
+def call_estimate(agent: str, prompt: Any, tier: Optional[str] = None) -> float:
+    """Estimated USD for one call: the prompt plus a typical completion."""
+    if tier == RULES_TIER:
+        return 0.0
+    model = agent_config(agent, tier)["model"]
+    return estimate_cost(model, _tokens(prompt), TYPICAL_OUTPUT_TOKENS.get(agent, 400))
+
+
+def usage_entry(agent: str, tier: Optional[str], prompt: Any, resp: Any = None,
+                usage: Optional[Tuple[int, int]] = None, completion: Optional[str] = None) -> Dict[str, Any]:
+    """Accounting entry for one finished call (resp for invoke, usage/completion for streams)."""
+    model = agent_config(agent, tier)["model"]
+    if usage is None and resp is not None:
+        usage = response_usage(resp)
+    estimated = usage is None
+    if estimated:
+        text = completion if completion is not None else getattr(resp, "content", "")
+        usage = (_tokens(prompt), _tokens(text))
+    input_tokens, output_tokens = usage
+    return {
+        "agent": agent,
+        "model": model,
+        "tier": tier or "strong",
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost_usd": round(estimate_cost(model, input_tokens, output_tokens), 8),
+        "estimated": estimated,
+    }
+
+
+def spent_usd(state: Dict[str, Any]) -> float:
+    return sum(e.get("cost_usd", 0.0) for e in state.get("llm_usage") or [])
+
+
+def check_budget(state: Dict[str, Any], agent: str, prompt: Any) -> None:
+    """Raise BudgetExceeded when this call doesn't fit the deal's remaining budget."""
+    tier = state.get("model_tier")
+    if tier == RULES_TIER:
+        raise BudgetExceeded(f"{agent}: deal routed to the rules-only tier by its budget")
+    budget = state.get("budget_usd")
+    if budget is None:
+        return
+    spent = spent_usd(state)
+    estimate = call_estimate(agent, prompt, tier)
+    if spent + estimate > budget:
+        raise BudgetExceeded(
+            f"{agent}: estimated ${estimate:.6f} on top of ${spent:.6f} spent exceeds the ${budget:.6f} budget"
+        )
+
+
+def usage_summary(entries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-deal totals plus a per-agent breakdown."""
+    out: Dict[str, Any] = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+                           "estimated_calls": 0, "by_agent": {}}
+    for e in entries:
+        agent = out["by_agent"].setdefault(e["agent"], {"calls": 0, "input_tokens": 0, "output_tokens": 0,
+                                                         "cost_usd": 0.0})
+        for bucket in (out, agent):
+            bucket["calls"] += 1
+            bucket["input_tokens"] += e["input_tokens"]
+            bucket["output_tokens"] += e["output_tokens"]
+            bucket["cost_usd"] = round(bucket["cost_usd"] + e["cost_usd"], 8)
+        out["estimated_calls"] += 1 if e.get("estimated") else 0
+    return out
+
+
+class RunBudget:
+    """Spend ceiling shared by the deals of one batch run (thread-safe)."""
+
+    def __init__(self, limit_usd: float):
+        self.limit_usd = float(limit_usd)
+        self.reserved_usd = 0.0
+        self.spent_usd = 0.0
+        self.deferred = 0
+        self.downgraded = 0
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self.limit_usd - self.spent_usd - self.reserved_usd)
+
+    def reserve(self, amount: float) -> float:
+        """Reserve up to `amount`; returns what was granted."""
+        with self._lock:
+            granted = max(0.0, min(amount, self.limit_usd - self.spent_usd - self.reserved_usd))
+            self.reserved_usd += granted
+            return granted
+
+    def settle(self, reserved: float, actual: float) -> None:
+        with self._lock:
+            self.reserved_usd = max(0.0, self.reserved_usd - reserved)
+            self.spent_usd = round(self.spent_usd + actual, 8)
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"limit_usd": self.limit_usd, "spent_usd": self.spent_usd,
+                    "reserved_usd": round(self.reserved_usd, 8),
+                    "deferred": self.deferred, "downgraded": self.downgraded}
+
+
+def admit(
+    run: Optional[RunBudget],
+    estimates: Dict[str, float],
+    deal_budget: Optional[float] = None,
+    defer: bool = False,
+) -> Tuple[Optional[float], float, str]:
+    """
+    Admission control for one deal of a batch.
+
+    estimates: estimated USD per tier ("strong", "fast") and the planned
+    "tier" (graph.routing.estimate_deal_cost). Returns
+    (budget_usd for the deal's state, amount reserved from the run, action),
+    action in "admitted" | "downgraded" | "deferred". A downgraded deal runs
+    on the fast tier, or on the rules tier when not even that fits.
+    """
+    cap = math.inf if deal_budget is None else deal_budget
+    planned = estimates[estimates["tier"]]
+    action = "admitted" if planned <= cap else "downgraded"
+    if run is None:
+        return deal_budget, 0.0, action
+
+    want = min(cap, planned * RESERVE_MARGIN)
+    granted = run.reserve(want)
+    if granted < want:
+        if granted < estimates["fast"] and defer:
+            run.settle(granted, 0.0)
+            run.count("deferred")
+            return None, 0.0, "deferred"
+        action = "downgraded"
+    if action == "downgraded":
+        run.count("downgraded")
+    return granted, granted, action
+
+
+class BatchBudget:
+    """Budget settings of one batch run: per-deal ceiling, shared run budget, defer or downgrade."""
+
+    def __init__(self, deal_budget: Optional[float] = None, run_budget: Optional[float] = None,
+                 defer: bool = False):
+        self.deal_budget = deal_budget
+        self.run = RunBudget(run_budget) if run_budget is not None else None
+        self.defer = defer
+
+    def admit(self, estimates: Dict[str, float]) -> Tuple[Optional[float], float, str]:
+        return admit(self.run, estimates, self.deal_budget, self.defer)
+
+    def settle(self, reserved: float, actual: float) -> None:
+        if self.run is not None:
+            self.run.settle(reserved, actual)
+
+    @contextlib.contextmanager
+    def reserve(self, raw_text: str) -> Iterator["Admission"]:
+        """Admit one deal by its estimated cost; settles `spent_usd` against the reservation on exit."""
+        from graph.routing import estimate_deal_cost
+
+        deal_budget, reserved, action = self.admit(estimate_deal_cost(raw_text))
+        admission = Admission(deal_budget, action)
+        try:
+            yield admission
+        finally:
+            self.settle(reserved, admission.spent_usd)
+
+
+class Admission:
+    """Outcome of BatchBudget.reserve for one deal; the runner sets spent_usd."""
+
+    __slots__ = ("budget_usd", "action", "spent_usd")
+
+    def __init__(self, budget_usd: Optional[float], action: str):
+        self.budget_usd = budget_usd
+        self.action = action
+        self.spent_usd = 0.0
+
+    @property
+    def deferred(self) -> bool:
+        return self.action == "deferred"
+
+    def state(self) -> Dict[str, Any]:
+        """Initial-state keys for an admitted deal."""
+        return {"budget_usd": self.budget_usd} if self.budget_usd is not None else {}
@@ -0,0 +1,322 @@
+# benchmarks/bench_scale.py
+"""
+Synthetic-scale benchmarks for the deterministic hot paths:
+
+- normalize          graph.normalize.normalize_agent_outputs
+- load_history       memory.deal_history.load_history
+- vector_similarity  agents.precedent_agent._risk_vector_similarity (query vs every record)
+- jaccard            memory.similarity.jaccard (query vs every record's text)
+- precedent_text     agents.precedent_agent.rank_by_text streamed off disk (cache off)
+- precedent_text_cached  the shipped text-mode lookup: PrecedentCache.ranked_text
+                     over the shard's cached encodings (query tokenized per call)
+
+Each (stage, parameters) point runs in a fresh spawned process so peak RSS is
+attributable to that stage alone. Results are written as JSON so scaling
+curves can be diffed between commits:
+
+    python -m benchmarks.bench_scale --sizes 1000,10000,100000,1000000
+    python -m benchmarks.bench_scale --compare old.json new.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+HISTORY_STAGES = ["load_history", "vector_similarity", "jaccard", "precedent_text", "precedent_text_cached",
+                  "precedent_scan", "precedent_cached"]
+DOCUMENT_STAGES = ["normalize", "evidence_index"]
+
+
+def _max_rss_kb() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def _setup(stage: str, params: Dict[str, Any]) -> Callable[[], Any]:
+    """Builds inputs outside the measured region and returns the stage body."""
+    from benchmarks import synthetic
+
+    rng = random.Random(params["seed"])
+
+    if stage == "normalize":
+        from graph.normalize import normalize_agent_outputs
+        from schemas import Deal
+
+        raw_text = synthetic.make_contract(rng, params["contract_sentences"])
+        clause_payload = synthetic.make_clause_payload(rng, params["risk_items"])
+        risk_payload = synthetic.make_risk_payload(rng, params["risk_items"])
+
+        def run() -> Any:
+            state = {
+                "deal": Deal(raw_text=raw_text),
+                "execution_trace": [],
+                "raw_clause_extraction": clause_payload,
+                "risk_analysis": risk_payload,
+            }
+            return normalize_agent_outputs(state)
+
+        return run
+
+    if stage == "evidence_index":
+        import json
+
+        from graph.evidence_index import EvidenceIndex
+
+        raw_text = synthetic.make_contract(rng, params["contract_sentences"])
+        risks = json.loads(synthetic.make_risk_payload(rng, params["risk_items"]))["risks"]
+        evidence = [r.get("evidence", "") for r in risks]
+
+        # uncached: build the per-deal index, then locate every item
+        def run() -> Any:
+            index = EvidenceIndex(raw_text)
+            return [index.locate(e) for e in evidence]
+
+        return run
+
+    history_path = Path(params["history_path"])
+
+    if stage == "load_history":
+        from memory.deal_history import load_history
+
+        return lambda: load_history(history_path)
+
+    if stage == "precedent_scan":
+        from agents.precedent_agent import TOP_K, rank_by_vector
+        from memory.deal_history import iter_history
+
+        query = synthetic.make_risk_vector(rng)
+        # streaming top-k straight off disk: memory stays O(K)
+        return lambda: rank_by_vector(query, iter_history(history_path), TOP_K)
+
+    if stage == "precedent_cached":
+        from agents.precedent_agent import TOP_K, _risk_vector_similarity, rank_by_vector
+        from memory.deal_history import iter_history
+        from memory.precedent_cache import PrecedentCache
+
+        query = synthetic.make_risk_vector(rng)
+        cache = PrecedentCache(max_entries=16)
+        lookup = lambda: cache.ranked(history_path, query, TOP_K, None, None, _risk_vector_similarity,
+                                      lambda: rank_by_vector(query, iter_history(history_path), TOP_K))
+        lookup()  # prime: the measured lookups are signature hits
+        return lookup
+
+    if stage == "precedent_text":
+        from agents.precedent_agent import TOP_K, rank_by_text
+        from memory.deal_history import iter_history
+
+        query = synthetic.make_contract(rng, params["contract_sentences"])
+        return lambda: rank_by_text(query, iter_history(history_path), TOP_K)
+
+    if stage == "precedent_text_cached":
+        from agents.precedent_agent import TOP_K, _snapshot_to_text
+        from memory.precedent_cache import PrecedentCache
+
+        query = synthetic.make_contract(rng, params["contract_sentences"])
+        cache = PrecedentCache(max_entries=16)
+        lookup = lambda: cache.ranked_text(history_path, query, TOP_K, None, _snapshot_to_text, lambda: 1 / 0)
+        lookup()  # prime: encodes the shard once, as the first query of a process does
+        return lookup
+
+    from memory.deal_history import load_history
+
+    history = load_history(history_path)
+
+    if stage == "vector_similarity":
+        from agents.precedent_agent import _risk_vector_similarity
+
+        query = synthetic.make_risk_vector(rng)
+        vectors = [h.get("risk_vector", {}) or {} for h in history]
+        del history
+        return lambda: [_risk_vector_similarity(query, v) for v in vectors]
+
+    if stage == "jaccard":
+        from agents.precedent_agent import _snapshot_to_text
+        from memory.similarity import jaccard
+
+        query = synthetic.make_contract(rng, params["contract_sentences"])
+        texts = [_snapshot_to_text(h) for h in history]
+        del history
+        return lambda: [jaccard(query, t) for t in texts]
+
+    raise ValueError(f"unknown stage {stage!r}")
+
+
+def measure(stage: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs in a child process: setup, timed runs, then one traced run."""
+    run = _setup(stage, params)
+    rss_before = _max_rss_kb()
+
+    timings: List[float] = []
+    for _ in range(max(1, params["repeat"])):
+        t0 = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - t0)
+    rss_after = _max_rss_kb()
+
+    alloc_peak = None
+    alloc_blocks = None
+    if params["allocations"]:
+        blocks0 = sys.getallocatedblocks()
+        tracemalloc.start()
+        result = run()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        alloc_blocks = sys.getallocatedblocks() - blocks0
+        del result
+
+    return {
+        "stage": stage,
+        "history_size": params.get("history_size"),
+        "contract_sentences": params["contract_sentences"],
+        "risk_items": params["risk_items"],
+        "wall_s": min(timings),
+        "wall_s_mean": sum(timings) / len(timings),
+        "peak_rss_kb": rss_after,
+        "stage_rss_kb": max(0, rss_after - rss_before),
+        "alloc_peak_bytes": alloc_peak,
+        "alloc_net_blocks": alloc_blocks,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def _points(args: argparse.Namespace, workdir: Path) -> List[Tuple[str, Dict[str, Any]]]:
+    from benchmarks.synthetic import write_history
+
+    base = {
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "allocations": not args.no_alloc,
+    }
+    points: List[Tuple[str, Dict[str, Any]]] = []
+
+    stages = args.stages or (DOCUMENT_STAGES + HISTORY_STAGES)
+    for stage in stages:
+        if stage in DOCUMENT_STAGES:
+            for sentences in args.contract_sentences:
+                for items in args.risk_items:
+                    points.append((stage, dict(base, contract_sentences=sentences, risk_items=items)))
+            continue
+
+        for size in args.sizes:
+            path = workdir / f"history-{size}.jsonl"
+            if not path.exists():
+                write_history(path, size, seed=args.seed, risk_items=args.risk_items[0])
+            points.append((stage, dict(
+                base,
+                history_size=size,
+                history_path=str(path),
+                contract_sentences=args.contract_sentences[0],
+                risk_items=args.risk_items[0],
+            )))
+    return points
+
+
+def compare(old_path: Path, new_path: Path) -> None:
+    def index(path: Path) -> Dict[Tuple, Dict[str, Any]]:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {
+            (r["stage"], r["history_size"], r["contract_sentences"], r["risk_items"]): r
+            for r in data["results"]
+        }
+
+    old, new = index(old_path), index(new_path)
+    print(f"{'stage':<18} {'size':>9} {'sent':>5} {'items':>5} {'old_s':>10} {'new_s':>10} {'ratio':>7}")
+    for key in sorted(set(old) & set(new), key=str):
+        o, n = old[key], new[key]
+        ratio = n["wall_s"] / o["wall_s"] if o["wall_s"] else float("inf")
+        stage, size, sent, items = key
+        print(f"{stage:<18} {str(size or '-'):>9} {sent:>5} {items:>5} "
+              f"{o['wall_s']:>10.4f} {n['wall_s']:>10.4f} {ratio:>7.2f}")
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="DealGraph synthetic-scale benchmarks")
+    parser.add_argument("--sizes", type=_int_list, default=[1000, 10000, 100000],
+                        help="history sizes, e.g. 1000,10000,100000,1000000")
+    parser.add_argument("--contract-sentences", type=_int_list, default=[20, 200])
+    parser.add_argument("--risk-items", type=_int_list, default=[5, 50])
+    parser.add_argument("--stages", type=lambda s: s.split(","), default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--workdir", type=Path, default=None, help="where synthetic histories are cached")
+    parser.add_argument("--out", type=Path, default=None)
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="dealgraph-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    results: List[Dict[str, Any]] = []
+    ctx = mp.get_context("spawn")
+    for stage, params in _points(args, workdir):
+        # fresh interpreter per point => ru_maxrss is not polluted by earlier stages
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            row = pool.submit(measure, stage, params).result()
+        results.append(row)
+        print(f"{row['stage']:<18} size={str(row['history_size'] or '-'):>8} "
+              f"sent={row['contract_sentences']:>4} items={row['risk_items']:>3} "
+              f"wall={row['wall_s']:.4f}s rss+={row['stage_rss_kb']}KiB "
+              f"alloc_peak={row['alloc_peak_bytes']}")
+
+    commit = _git_commit()
+    out = args.out or RESULTS_DIR / f"scale-{commit or 'local'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "commit": commit,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "params": {
+                    "sizes": args.sizes,
+                    "contract_sentences": args.contract_sentences,
+                    "risk_items": args.risk_items,
+                    "repeat": args.repeat,
+                    "seed": args.seed,
+                },
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"results written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+# benchmarks/bench_startup.py
+"""
+CLI cold-start benchmark.
+
+Every measurement runs in a fresh interpreter:
+- import time of the modules a CLI run touches (main, graph.deal_graph, agents)
+- time-to-first-result of `main.py --rules-only` on a sample contract
+
+    python -m benchmarks.bench_startup --budget 1.0
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+IMPORT_TARGETS = [
+    "main",
+    "graph.deal_graph",
+    "agents.risk_agent",
+    "agents.judge_agent",
+    "graph.rules_only",
+]
+
+SAMPLE_DEAL = (
+    "Customer pays $5,000/month billed monthly. Term is 12 months. "
+    "Provider may change or discontinue features at any time without notice. "
+    "Customer may not terminate for convenience. Provider may terminate immediately for any breach. "
+    "Limitation of liability is fees paid in the last 1 month. No service credits for downtime. "
+    "Governing law: Delaware. Venue: Delaware."
+)
+
+_IMPORT_SNIPPET = (
+    "import time, sys; t = time.perf_counter(); import {module}; "
+    "sys.stdout.write(repr(time.perf_counter() - t))"
+)
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # a cold start must not depend on credentials being present
+    env.pop("OPENAI_API_KEY", None)
+    env["PYTHONPATH"] = str(REPO_ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def import_time(module: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SNIPPET.format(module=module)],
+        cwd=REPO_ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip())
+
+
+def time_to_first_result(extra_args: List[str]) -> float:
+    t0 = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "main.py", "--no-save", *extra_args],
+        cwd=REPO_ROOT, env=_env(), input=SAMPLE_DEAL,
+        capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - t0
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "min_s": round(min(samples), 4),
+        "median_s": round(statistics.median(samples), 4),
+        "max_s": round(max(samples), 4),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="DealGraph startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="fail if median rules-only time-to-first-result exceeds this (seconds)")
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {"imports": {}, "time_to_first_result": {}}
+
+    for module in IMPORT_TARGETS:
+        samples = [import_time(module) for _ in range(args.repeat)]
+        results["imports"][module] = _summary(samples)
+        print(f"import {module:<20} median={results['imports'][module]['median_s']:.3f}s")
+
+    samples = [time_to_first_result(["--rules-only"]) for _ in range(args.repeat)]
+    ttfr = _summary(samples)
+    results["time_to_first_result"]["rules_only"] = ttfr
+    print(f"main.py --rules-only   median={ttfr['median_s']:.3f}s (budget {args.budget:.2f}s)")
+
+    if args.out:
+        with args.out.open("w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if ttfr["median_s"] > args.budget:
+        print("startup budget exceeded")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
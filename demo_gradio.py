@@ -6,6 +6,7 @@ import json
 import gradio as gr
 
 from graph.deal_graph import build_graph
+from graph.records import to_dicts
 from schemas import Deal
 
 
@@ -36,7 +37,7 @@ def run_dealgraph(deal_text: str) -> tuple[str, str, str, str]:
     score = f"{float(out.get('risk_score', 0.0) or 0.0):.1f}"
     confidence = f"{float(out.get('confidence', 0.0) or 0.0):.2f}"
 
-    risk_items = out.get("risk_items") or []
+    risk_items = to_dicts(out.get("risk_items") or [])
     rationale = out.get("rationale") or ""
 
     formatted = format_risk_items(risk_items)
@@ -0,0 +1,179 @@
+# evals/replay.py
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+DEFAULT_CASSETTE_DIR = Path(__file__).parent / "cassettes"
+
+MODES = ("live", "record", "replay")
+
+
+class CassetteMiss(RuntimeError):
+    """Raised in replay mode when a prompt has no recorded response."""
+
+
+def prompt_key(prompt: Any) -> str:
+    return hashlib.sha256(str(prompt).encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Recorded LLM responses for a single eval case, keyed by prompt hash.
+    Identical prompts map to the same response, so replay does not depend
+    on call order and is safe under a worker pool.
+    """
+
+    def __init__(self, case_id: str, path: Path):
+        self.case_id = case_id
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, case_id: str, cassette_dir: Path) -> "Cassette":
+        cassette = cls(case_id, cassette_dir / f"{case_id}.json")
+        if cassette.path.exists():
+            with cassette.path.open("r", encoding="utf-8") as f:
+                cassette.entries = json.load(f).get("entries", {})
+        return cassette
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.entries[key] = entry
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding="utf-8") as f:
+            json.dump(
+                {"case_id": self.case_id, "entries": self.entries},
+                f,
+                ensure_ascii=False,
+                indent=2,
+                sort_keys=True,
+            )
+
+
+class CaseContext:
+    """Per-case cassette plus token counters, bound through a ContextVar."""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def add_usage(self, usage: Optional[Dict[str, Any]]) -> None:
+        usage = usage or {}
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += int(usage.get("input_tokens", 0) or 0)
+            self.output_tokens += int(usage.get("output_tokens", 0) or 0)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+_CURRENT_CASE: ContextVar[Optional[CaseContext]] = ContextVar("eval_case", default=None)
+
+
+def bind_case(ctx: CaseContext):
+    return _CURRENT_CASE.set(ctx)
+
+
+def unbind_case(token) -> None:
+    _CURRENT_CASE.reset(token)
+
+
+class CassetteLLM:
+    """
+    Drop-in stand-in for an agent's chat model.
+    - live:   call the wrapped model, count tokens
+    - record: call the wrapped model, store the response in the case cassette
+    - replay: answer from the cassette only (no network, no client built)
+    """
+
+    def __init__(self, agent: str, inner: Any, mode: str):
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r}, expected one of {MODES}")
+        self.agent = agent
+        # either a client or a zero-arg factory building one on first live call
+        self._inner = inner
+        self.mode = mode
+
+    @property
+    def inner(self) -> Any:
+        if callable(self._inner) and not hasattr(self._inner, "invoke"):
+            self._inner = self._inner()
+        return self._inner
+
+    def _replay(self, ctx: Optional[CaseContext], key: str) -> Dict[str, Any]:
+        entry = ctx.cassette.get(key) if ctx else None
+        if entry is None:
+            case_id = ctx.cassette.case_id if ctx else "?"
+            raise CassetteMiss(f"no recorded response for agent={self.agent} case={case_id}")
+        ctx.add_usage(entry.get("usage"))
+        return entry
+
+    def invoke(self, prompt: Any, *args: Any, **kwargs: Any) -> AIMessage:
+        ctx = _CURRENT_CASE.get()
+        key = prompt_key(prompt)
+
+        if self.mode == "replay":
+            entry = self._replay(ctx, key)
+            return AIMessage(content=entry["content"], usage_metadata=entry.get("usage") or None)
+
+        resp = self.inner.invoke(prompt, *args, **kwargs)
+        usage = dict(getattr(resp, "usage_metadata", None) or {})
+        if ctx:
+            ctx.add_usage(usage)
+            if self.mode == "record":
+                ctx.cassette.put(key, {"agent": self.agent, "content": resp.content, "usage": usage})
+        return resp
+
+    def stream(self, prompt: Any, *args: Any, **kwargs: Any) -> Iterator[AIMessageChunk]:
+        # same cassette entries as invoke(): a recorded stream replays as one chunk
+        ctx = _CURRENT_CASE.get()
+        key = prompt_key(prompt)
+
+        if self.mode == "replay":
+            entry = self._replay(ctx, key)
+            yield AIMessageChunk(content=entry["content"], usage_metadata=entry.get("usage") or None)
+            return
+
+        parts = []
+        usage: Dict[str, Any] = {}
+        for chunk in self.inner.stream(prompt, *args, **kwargs):
+            parts.append(chunk.content if isinstance(chunk.content, str) else "")
+            for k, v in (getattr(chunk, "usage_metadata", None) or {}).items():
+                if isinstance(v, int):
+                    usage[k] = usage.get(k, 0) + v
+            yield chunk
+        if ctx:
+            ctx.add_usage(usage)
+            if self.mode == "record":
+                ctx.cassette.put(key, {"agent": self.agent, "content": "".join(parts), "usage": usage})
+
+
+def install(mode: str) -> None:
+    """
+    Route every agent's client through a CassetteLLM.
+    In replay mode the real clients are never constructed.
+    """
+    from agents.clients import set_wrapper
+
+    def wrap(agent: str, build: Callable[[], Any]) -> CassetteLLM:
+        return CassetteLLM(f"{agent}_agent", build, mode)
+
+    set_wrapper(wrap)
@@ -9,6 +9,7 @@ from typing import Any, Dict, List
 from langsmith import expect
 
 from graph.deal_graph import build_graph
+from graph.records import to_dicts
 from schemas import Deal
 
 
@@ -29,8 +30,8 @@ def check_case(out: Dict[str, Any], expect: Dict[str, Any]) -> List[str]:
     rec = out.get("recommendation")
     score = float(out.get("risk_score", 0.0) or 0.0)
     conf = float(out.get("confidence", 0.0) or 0.0)
-    items = out.get("risk_items") or []
-    cats = {r.get("category") for r in items if isinstance(r, dict)}
+    items = to_dicts(out.get("risk_items") or [])
+    cats = {r.get("category") for r in items}
     # risk_vector exact or partial match
     expected_vec = expect.get("risk_vector")
     if isinstance(expected_vec, dict):
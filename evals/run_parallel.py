@@ -0,0 +1,289 @@
+# evals/run_parallel.py
+"""
+Parallel eval runner with LLM record/replay and a performance regression gate.
+
+    # record cassettes once (live LLM calls)
+    python -m evals.run_parallel --mode record
+
+    # offline, deterministic CI run
+    python -m evals.run_parallel --mode replay --workers 8
+
+    # refresh the stored perf baseline
+    python -m evals.run_parallel --mode replay --update-baseline
+
+Cassettes and the baseline come from a live recording (OPENAI_API_KEY) and
+are committed with the cases. A case without a baseline entry (or a missing
+baseline file) fails the perf gate instead of being skipped.
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+EVALS_DIR = Path(__file__).parent
+DEFAULT_BASELINE = EVALS_DIR / "perf_baseline.json"
+
+# Latency is noisy at millisecond scale; only flag regressions larger than this.
+MIN_LATENCY_SLACK_S = 0.05
+
+# check(out, deal_text, errors) -> extra result fields (appends its failures to errors)
+Check = Callable[[Dict[str, Any], str, List[str]], Dict[str, Any]]
+
+
+def run_case(
+    app: Any,
+    case: Dict[str, Any],
+    mode: str,
+    cassette_dir: Path,
+    state: Optional[Dict[str, Any]] = None,
+    checks: Sequence[Check] = (),
+) -> Dict[str, Any]:
+    """
+    Run one case against its cassette. `state` is merged into the initial
+    state; each check(out, deal_text, errors) adds its own result fields.
+    """
+    from agents.usage import spent_usd
+    from evals.replay import CaseContext, Cassette, bind_case, unbind_case
+    from evals.run_evals import check_case
+    from schemas import Deal
+
+    cassette = Cassette.load(case["id"], cassette_dir)
+    ctx = CaseContext(cassette)
+    token = bind_case(ctx)
+
+    state = {
+        "deal": Deal(deal_id=case["id"], raw_text=case["deal_text"]),
+        "execution_trace": [],
+        **(state or {}),
+    }
+
+    t0 = time.perf_counter()
+    extra: Dict[str, Any] = {}
+    try:
+        out = app.invoke(state)
+        errors = check_case(out, case["expect"])
+        for check in checks:
+            extra.update(check(out, case["deal_text"], errors))
+    except Exception as e:
+        out = {}
+        errors = [f"{type(e).__name__}: {e}"]
+    finally:
+        unbind_case(token)
+    latency = time.perf_counter() - t0
+
+    if mode == "record" and cassette.entries:
+        cassette.save()
+
+    return {
+        "id": case["id"],
+        "errors": errors,
+        "recommendation": out.get("recommendation"),
+        "risk_score": float(out.get("risk_score", 0.0) or 0.0),
+        "latency_s": round(latency, 4),
+        "llm_calls": ctx.calls,
+        "input_tokens": ctx.input_tokens,
+        "output_tokens": ctx.output_tokens,
+        "total_tokens": ctx.total_tokens,
+        "cost_usd": round(spent_usd(out), 8),
+        "tier": out.get("model_tier"),
+        "relevance_tokens_saved": (out.get("relevance") or {}).get("input_tokens_saved", 0),
+        "relevance_recall": None,
+        **extra,
+    }
+
+
+def deferred_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Result row of a case the run budget deferred (not run)."""
+    return {"id": case["id"], "errors": [], "deferred": True, "admission": "deferred",
+            "recommendation": None, "risk_score": 0.0, "latency_s": 0.0, "llm_calls": 0,
+            "input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cost_usd": 0.0}
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, Any]]:
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: Path, results: List[Dict[str, Any]]) -> None:
+    data = {
+        r["id"]: {"latency_s": r["latency_s"], "total_tokens": r["total_tokens"]}
+        for r in results
+        if not r["errors"] and not r.get("deferred")
+    }
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def check_regressions(
+    results: List[Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    latency_threshold: float,
+    token_threshold: float,
+) -> List[str]:
+    regressions: List[str] = []
+    for r in results:
+        if r.get("deferred"):
+            continue
+        base = baseline.get(r["id"])
+        if not base:
+            # an ungated case must not pass silently
+            regressions.append(f"{r['id']}: no perf baseline entry (record one with --update-baseline)")
+            continue
+
+        base_tokens = int(base.get("total_tokens", 0) or 0)
+        if base_tokens and r["total_tokens"] > base_tokens * (1.0 + token_threshold):
+            regressions.append(
+                f"{r['id']}: total_tokens {r['total_tokens']} > baseline {base_tokens} (+{token_threshold:.0%})"
+            )
+
+        base_latency = float(base.get("latency_s", 0.0) or 0.0)
+        limit = max(base_latency * (1.0 + latency_threshold), base_latency + MIN_LATENCY_SLACK_S)
+        if base_latency and r["latency_s"] > limit:
+            regressions.append(
+                f"{r['id']}: latency {r['latency_s']:.3f}s > baseline {base_latency:.3f}s (+{latency_threshold:.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Parallel DealGraph eval runner")
+    parser.add_argument("--mode", choices=["live", "record", "replay"], default="replay")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--cases", type=Path, default=EVALS_DIR / "cases.jsonl")
+    parser.add_argument("--cassettes", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--latency-threshold", type=float, default=0.5)
+    parser.add_argument("--token-threshold", type=float, default=0.1)
+    parser.add_argument("--report", type=Path, default=None, help="write per-case metrics as JSON")
+    parser.add_argument("--deal-budget", type=float, default=None, help="per-deal spend ceiling in USD")
+    parser.add_argument("--run-budget", type=float, default=None, help="spend ceiling in USD for the whole batch")
+    parser.add_argument("--defer-over-budget", action="store_true",
+                        help="defer deals the run budget can't cover instead of running them rules-only")
+    parser.add_argument("--rpm", type=float, default=None, help="requests/minute per model (default: DEALGRAPH_RPM)")
+    parser.add_argument("--tpm", type=float, default=None, help="tokens/minute per model (default: DEALGRAPH_TPM)")
+    parser.add_argument("--relevance-recall", type=float, default=None, metavar="MIN",
+                        help="run the full-text risk path and fail cases whose risk evidence the "
+                             "relevance pre-filter would keep less than MIN of (0..1)")
+    parser.add_argument("--profile", type=Path, default=None, metavar="DIR",
+                        help="profile every graph node; one merged run directory for the batch")
+    args = parser.parse_args(argv)
+
+    from agents.scheduler import scheduled, scheduler, scheduler_stats
+    from agents.usage import BatchBudget
+    from evals import replay
+    from evals.run_evals import load_cases
+    from graph.deal_graph import build_graph
+
+    cassette_dir = args.cassettes or replay.DEFAULT_CASSETTE_DIR
+    replay.install(args.mode)
+    profiler = None
+    if args.profile:
+        from graph.profiling import NodeProfiler
+
+        profiler = NodeProfiler(args.profile)
+    # each case runs in its own scheduler scope; the profiler times the whole invoke
+    app = scheduled(build_graph(profiler=profiler))
+    if profiler is not None:
+        profiler.instrument(app)
+
+    budget = BatchBudget(args.deal_budget, args.run_budget, args.defer_over_budget)
+
+    extra_state: Dict[str, Any] = {}
+    checks: List[Check] = []
+    if args.relevance_recall is not None:
+        from graph.relevance import RECALL_STATE, recall_check
+
+        extra_state.update(RECALL_STATE)
+        checks.append(functools.partial(recall_check, min_recall=args.relevance_recall))
+
+    def evaluate(case: Dict[str, Any]) -> Dict[str, Any]:
+        with budget.reserve(case["deal_text"]) as admission:
+            if admission.deferred:
+                return deferred_case(case)
+            result = run_case(app, case, args.mode, cassette_dir, {**extra_state, **admission.state()}, checks)
+            admission.spent_usd = result["cost_usd"]
+        return {**result, "admission": admission.action}
+
+    if args.rpm is not None or args.tpm is not None:
+        scheduler.configure(rpm=args.rpm, tpm=args.tpm)
+
+    cases = load_cases(args.cases)
+    order = list(range(len(cases)))
+    if scheduler.enabled:
+        # rate-limited: start short deals first (more completed deals per minute)
+        order.sort(key=lambda i: len(cases[i]["deal_text"]))
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        done = dict(zip(order, pool.map(evaluate, [cases[i] for i in order])))
+    results = [done[i] for i in range(len(cases))]
+    if profiler is not None:
+        print(f"node profiles written to {profiler.write()}")
+        profiler.close()
+
+    failed = 0
+    for r in results:
+        if r.get("deferred"):
+            print(f"⏸  DEFERRED: {r['id']} (run budget exhausted)")
+        elif r["errors"]:
+            failed += 1
+            print(f"\n❌ FAIL: {r['id']}")
+            for e in r["errors"]:
+                print(f"  - {e}")
+        else:
+            print(
+                f"✅ PASS: {r['id']}  rec={r['recommendation']} score={r['risk_score']:.1f}"
+                f"  latency={r['latency_s']:.3f}s tokens={r['total_tokens']} cost=${r['cost_usd']:.5f}"
+                + (f" [{r['admission']}: tier={r['tier']}]" if r["admission"] != "admitted" else "")
+            )
+
+    total = len(results)
+    deferred = sum(1 for r in results if r.get("deferred"))
+    print(f"\n=== EVAL SUMMARY ===\npassed={total-failed-deferred}/{total}  failed={failed}/{total}"
+          + (f"  deferred={deferred}/{total}" if deferred else ""))
+    print(f"cost=${sum(r['cost_usd'] for r in results):.5f}"
+          + (f" (run budget ${budget.run.limit_usd:.5f})" if budget.run is not None else ""))
+    saved = sum(r.get("relevance_tokens_saved", 0) for r in results)
+    recalls = [r["relevance_recall"] for r in results if r.get("relevance_recall") is not None]
+    if args.relevance_recall is not None:
+        print(f"relevance filter (what-if): would save {saved} risk-prompt input tokens; "
+              f"evidence recall min={min(recalls, default=1.0):.2f} "
+              f"mean={sum(recalls) / len(recalls) if recalls else 1.0:.2f} over {len(recalls)} case(s)")
+    elif saved:
+        print(f"relevance filter: saved {saved} risk-prompt input tokens")
+    for model, st in scheduler_stats().items():
+        print(f"rate limit {model}: acquired={st['acquired']} waited={st['waited']} "
+              f"max_queue_depth={st['max_queue_depth']} wait_p50={st['wait_p50_s']:.3f}s "
+              f"wait_p95={st['wait_p95_s']:.3f}s wait_total={st['wait_total_s']:.2f}s")
+
+    if args.report:
+        with args.report.open("w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline written to {args.baseline}")
+        return 1 if failed else 0
+
+    if not args.baseline.exists():
+        print(f"\n(no perf baseline at {args.baseline}: every case fails the gate until one is recorded)")
+    regressions = check_regressions(
+        results, load_baseline(args.baseline), args.latency_threshold, args.token_threshold
+    )
+    if regressions:
+        print("\n=== PERF REGRESSIONS ===")
+        for line in regressions:
+            print(f"  - {line}")
+
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,293 @@
+# graph/batch.py
+"""
+Checkpointed, resumable batch runs.
+
+    python -m graph.batch deals.jsonl --run-id q3-renewals --workers 8
+    python -m graph.batch contracts/ --run-id q3-renewals --workers 8   # re-run after a crash
+
+With --pack, small deals (short order forms, amendments) that haven't
+started yet are first extracted several per request (agents/packing.py);
+deals whose part of a packed response is malformed run individually.
+
+Input is a JSONL file ({"deal_id", "deal_text"} per line; "id" / "raw_text"
+are accepted too) or a directory of .txt files (deal_id = file stem).
+
+Every deal runs as LangGraph thread `<run_id>/<deal_id>` on the SQLite
+checkpointer (graph/checkpoints.py), which persists state after each node.
+Re-running the same --run-id:
+
+- skips deals the ledger records as done (their LLM calls are not re-paid);
+- resumes a deal interrupted mid-graph from its last completed node;
+- takes the final state of a deal whose graph completed before the ledger
+  was updated straight from its checkpoint;
+- starts the remaining deals from scratch, and retries deferred ones.
+
+With --deal-budget / --run-budget every deal that starts from scratch goes
+through budget admission (agents/usage.py): it gets a per-deal budget that
+fits what the run has left, runs on a cheaper tier when it no longer fits,
+or, with --defer-over-budget, is recorded "deferred" and not run.
+
+A deal is marked "finished" (result stored) before its snapshot is appended
+to history and "done" after, so a crash between the two neither loses nor
+duplicates the snapshot. Once every deal is done the run's checkpoints are
+compacted away (--keep-checkpoints to skip); the ledger keeps the results.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from memory.deal_history import DEFAULT_NAMESPACE, iter_history, namespace_path, parse_namespaces
+
+
+def iter_deals(source: Path) -> Iterator[Dict[str, str]]:
+    if source.is_dir():
+        for path in sorted(source.glob("*.txt")):
+            yield {"deal_id": path.stem, "deal_text": path.read_text(encoding="utf-8")}
+        return
+    with source.open("r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            yield {
+                "deal_id": str(row.get("deal_id") or row.get("id") or f"line-{n}"),
+                "deal_text": row.get("deal_text") or row.get("raw_text") or "",
+            }
+
+
+def initial_state(deal: Dict[str, str], namespace: str = DEFAULT_NAMESPACE) -> Dict[str, Any]:
+    from schemas import Deal
+
+    return {
+        "deal": Deal(deal_id=deal["deal_id"], raw_text=deal["deal_text"]),
+        "namespace": namespace,
+        "namespaces": parse_namespaces([namespace]),
+        "execution_trace": [],
+        "degraded": False,
+        "degraded_nodes": [],
+    }
+
+
+def _already_saved(run_id: str, deal_id: str, namespace: str) -> bool:
+    return any(
+        s.get("run_id") == run_id and s.get("deal_id") == deal_id
+        for s in iter_history(namespace_path(namespace))
+    )
+
+
+def run_deal(
+    app: Any,
+    store: Any,
+    run_id: str,
+    deal: Dict[str, str],
+    status: Optional[str] = None,
+    namespace: str = DEFAULT_NAMESPACE,
+    save: bool = True,
+    patch: Optional[Dict[str, Any]] = None,
+    budget: Any = None,
+) -> Dict[str, Any]:
+    """
+    Run (or resume) one deal; returns {"deal_id", "outcome", ...}.
+
+    With a budget (agents.usage.BatchBudget) a deal that starts from scratch
+    is admitted first: it runs within the per-deal budget it is granted, or is
+    recorded "deferred" in the ledger (and retried by the next run) when the
+    run budget can't cover it.
+    """
+    from agents.scheduler import deal_scope
+    from agents.usage import spent_usd
+    from graph.checkpoints import thread_id
+    from graph.routing import estimate_deal_cost
+    from memory.deal_history import append_snapshot
+    from memory.snapshot import build_snapshot
+
+    deal_id = deal["deal_id"]
+    if status == "done":
+        return {"deal_id": deal_id, "outcome": "skipped"}
+
+    config = {"configurable": {"thread_id": thread_id(run_id, deal_id)}}
+    t0 = time.perf_counter()
+    if status == "finished":
+        # crashed between storing the result and appending it to history
+        snapshot = store.results(run_id, status="finished")[deal_id]
+        outcome = "recovered"
+    else:
+        checkpoint = app.get_state(config)
+        if checkpoint.values and not checkpoint.next:
+            # the graph completed but the ledger never heard: re-invoking would re-pay
+            # every LLM call and double the list reducers (trace, llm_usage)
+            final_state = checkpoint.values
+            outcome = "recovered"
+        else:
+            outcome = "resumed" if checkpoint.next else "completed"
+            # None continues the thread from its last checkpoint (and the budget it was admitted with)
+            state = None
+            reserved = 0.0
+            if not checkpoint.next:
+                state = {**initial_state(deal, namespace), **(patch or {})}
+                if budget is not None:
+                    deal_budget, reserved, admission = budget.admit(estimate_deal_cost(deal["deal_text"]))
+                    if admission == "deferred":
+                        store.mark(run_id, deal_id, "deferred")
+                        return {"deal_id": deal_id, "outcome": "deferred"}
+                    if deal_budget is not None:
+                        state["budget_usd"] = deal_budget
+            spent_before = spent_usd(checkpoint.values)
+            store.mark(run_id, deal_id, "running")
+            try:
+                with deal_scope(deal_id, len(deal["deal_text"])):
+                    final_state = app.invoke(state, config)
+            except Exception as e:
+                store.mark(run_id, deal_id, "failed", error=f"{type(e).__name__}: {e}")
+                return {"deal_id": deal_id, "outcome": "failed", "error": f"{type(e).__name__}: {e}"}
+            finally:
+                if budget is not None:
+                    # what this invocation spent, failed or not (the checkpoint holds its calls)
+                    budget.settle(reserved, spent_usd(app.get_state(config).values) - spent_before)
+        snapshot = {**build_snapshot(final_state), "run_id": run_id}
+        store.mark(run_id, deal_id, "finished", result=snapshot)
+
+    if save and not (outcome == "recovered" and _already_saved(run_id, deal_id, namespace)):
+        try:
+            append_snapshot(snapshot, namespace=namespace)
+        except OSError as e:
+            # stays "finished": resuming the run appends it (one deal, not the batch)
+            return {"deal_id": deal_id, "outcome": "failed", "error": f"{type(e).__name__}: {e}"}
+    store.mark(run_id, deal_id, "done")
+    return {
+        "deal_id": deal_id,
+        "outcome": outcome,
+        "recommendation": snapshot.get("recommendation"),
+        "risk_score": snapshot.get("risk_score"),
+        "latency_s": round(time.perf_counter() - t0, 4),
+    }
+
+
+def prepack(deals: List[Dict[str, str]], pool: ThreadPoolExecutor) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+    """Packed extraction for the small deals, per routing tier; returns (state patches, stats)."""
+    from agents.packing import extract_packed, is_small, pack
+    from graph.routing import estimate_deal_cost
+
+    by_tier: Dict[str, List[Dict[str, str]]] = {}
+    for deal in deals:
+        if is_small(deal["deal_text"]):
+            by_tier.setdefault(estimate_deal_cost(deal["deal_text"])["tier"], []).append(deal)
+    # a pack of one saves nothing over the regular per-deal calls
+    groups = [(tier, p) for tier, small in by_tier.items() for p in pack(small) if len(p) > 1]
+    patches: Dict[str, Dict[str, Any]] = {}
+    for result in pool.map(lambda g: extract_packed(g[1], g[0]), groups):
+        patches.update(result)
+    packed = sum(1 for p in patches.values() if "packed_extraction" in p)
+    return patches, {
+        "requests": len(groups),
+        "deals_packed": packed,
+        "retried_individually": sum(len(p) for _, p in groups) - packed,
+    }
+
+
+def run_batch(
+    deals: List[Dict[str, str]],
+    run_id: str,
+    store: Any,
+    app: Any = None,
+    workers: int = 4,
+    namespace: str = DEFAULT_NAMESPACE,
+    save: bool = True,
+    compact: bool = True,
+    pack: bool = False,
+    budget: Any = None,
+) -> Dict[str, Any]:
+    if app is None:
+        from graph.deal_graph import build_graph
+
+        app = build_graph(checkpointer=store)
+    statuses = store.deal_statuses(run_id)
+    summary: Dict[str, Any] = {"run_id": run_id, "deals": len(deals), "outcomes": {}}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        patches: Dict[str, Dict[str, Any]] = {}
+        if pack:
+            # only deals without a checkpoint yet; started ones resume as they are
+            patches, summary["packing"] = prepack([d for d in deals if d["deal_id"] not in statuses], pool)
+        results = list(pool.map(
+            lambda d: run_deal(app, store, run_id, d, statuses.get(d["deal_id"]), namespace, save,
+                               patches.get(d["deal_id"]), budget),
+            deals,
+        ))
+
+    for r in results:
+        summary["outcomes"][r["outcome"]] = summary["outcomes"].get(r["outcome"], 0) + 1
+    complete = all(s == "done" for s in store.deal_statuses(run_id).values())
+    summary["complete"] = complete
+    if budget is not None and budget.run is not None:
+        summary["budget"] = budget.run.snapshot()
+    if compact and complete:
+        summary["compaction"] = store.compact(run_id)
+    return {"summary": summary, "results": results}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from graph.checkpoints import DEFAULT_DB, SqliteCheckpointer
+
+    parser = argparse.ArgumentParser(description="Checkpointed, resumable DealGraph batch run")
+    parser.add_argument("source", type=Path, help="deals JSONL file or directory of .txt contracts")
+    parser.add_argument("--run-id", required=True, help="re-use the same id to resume an interrupted run")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help="SQLite checkpoint store")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--namespace", default=DEFAULT_NAMESPACE)
+    parser.add_argument("--no-save", action="store_true", help="do not append results to deal history")
+    parser.add_argument("--pack", action="store_true",
+                        help="extract small deals several per LLM request (bulk mode)")
+    parser.add_argument("--deal-budget", type=float, default=None, help="per-deal spend ceiling in USD")
+    parser.add_argument("--run-budget", type=float, default=None, help="spend ceiling in USD for this run")
+    parser.add_argument("--defer-over-budget", action="store_true",
+                        help="defer deals the run budget can't cover (retried on resume) instead of "
+                             "running them on a cheaper tier")
+    parser.add_argument("--keep-checkpoints", action="store_true", help="skip compaction when the run completes")
+    parser.add_argument("--report", type=Path, default=None, help="write per-deal outcomes as JSON")
+    args = parser.parse_args(argv)
+
+    budget = None
+    if args.deal_budget is not None or args.run_budget is not None:
+        from agents.usage import BatchBudget
+
+        budget = BatchBudget(args.deal_budget, args.run_budget, args.defer_over_budget)
+    store = SqliteCheckpointer(args.db)
+    try:
+        out = run_batch(list(iter_deals(args.source)), args.run_id, store, workers=args.workers,
+                        namespace=args.namespace, save=not args.no_save, compact=not args.keep_checkpoints,
+                        pack=args.pack, budget=budget)
+    finally:
+        store.close()
+
+    summary = out["summary"]
+    for r in out["results"]:
+        if r["outcome"] == "failed":
+            print(f"❌ {r['deal_id']}: {r['error']}")
+    print(f"run {summary['run_id']}: {summary['deals']} deal(s) "
+          + " ".join(f"{k}={v}" for k, v in sorted(summary["outcomes"].items())))
+    if "packing" in summary:
+        p = summary["packing"]
+        print(f"packed: {p['deals_packed']} deal(s) in {p['requests']} request(s), "
+              f"{p['retried_individually']} retried individually")
+    if "budget" in summary:
+        b = summary["budget"]
+        print(f"budget: spent ${b['spent_usd']:.5f} of ${b['limit_usd']:.5f}, "
+              f"{b['downgraded']} downgraded, {b['deferred']} deferred")
+    if "compaction" in summary:
+        c = summary["compaction"]
+        print(f"run complete: removed {c['checkpoints_removed']} checkpoint(s) of {c['deals']} deal(s)")
+    elif not summary["complete"]:
+        print(f"run incomplete: re-run with --run-id {summary['run_id']} to resume")
+    if args.report:
+        with args.report.open("w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+    return 0 if summary["complete"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,281 @@
+# graph/checkpoints.py
+"""
+SQLite-backed LangGraph checkpointer plus a per-run deal ledger.
+
+`SqliteCheckpointer` is a BaseCheckpointSaver (same storage model as
+LangGraph's InMemorySaver: checkpoints, per-channel blobs, pending writes)
+persisted to one local SQLite file with the standard library. Each deal of
+a batch is one LangGraph thread, keyed `<run_id>/<deal_id>`, so a restarted
+run can resume a half-processed deal from its last completed node.
+
+The `deals` table is the run ledger: status per (run_id, deal_id)
+("running" | "finished" | "done" | "failed" | "deferred") and the final
+snapshot once the deal completed. `compact(run_id)` drops the checkpoints
+of completed deals (only the ledger is needed to skip them) and vacuums.
+
+Checkpoint state holds graph.records (slotted classes) that msgpack can't
+encode; those fall back to pickle. The file is local, written and read only
+by this process' own runs.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+DEFAULT_DB = Path(__file__).resolve().parent.parent / "memory" / "checkpoints.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,
+    parent_id TEXT, type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL, version TEXT NOT NULL,
+    type TEXT, blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT, type TEXT, value BLOB, task_path TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS deals (
+    run_id TEXT NOT NULL, deal_id TEXT NOT NULL, status TEXT NOT NULL,
+    result TEXT, error TEXT, updated_at REAL,
+    PRIMARY KEY (run_id, deal_id)
+);
+"""
+
+
+def thread_id(run_id: str, deal_id: Any) -> str:
+    return f"{run_id}/{deal_id}"
+
+
+def _serde() -> JsonPlusSerializer:
+    return JsonPlusSerializer(
+        pickle_fallback=True,
+        allowed_msgpack_modules=[("schemas", "Deal"), ("schemas", "Clause")],
+    )
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[str]):
+    def __init__(self, path: Path = DEFAULT_DB):
+        super().__init__(serde=_serde())
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # one connection shared by the batch's worker threads, serialized by a lock
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _write(self, statements: List[Tuple[str, Sequence[Any]]]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # ---- BaseCheckpointSaver ----
+    def _tuple(self, thread: str, ns: str, row: Tuple) -> CheckpointTuple:
+        checkpoint_id, parent_id, ctype, cblob, mtype, mblob = row
+        checkpoint = self.serde.loads_typed((ctype, cblob))
+        values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = self._query(
+                "SELECT type, blob FROM blobs WHERE thread_id=? AND checkpoint_ns=? AND channel=? AND version=?",
+                (thread, ns, channel, str(version)),
+            )
+            if blob and blob[0][0] != "empty":
+                values[channel] = self.serde.loads_typed(blob[0])
+        writes = self._query(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id=? AND checkpoint_ns=? AND checkpoint_id=? ORDER BY task_id, idx",
+            (thread, ns, checkpoint_id),
+        )
+
+        def config(cid: str) -> Dict[str, Any]:
+            return {"configurable": {"thread_id": thread, "checkpoint_ns": ns, "checkpoint_id": cid}}
+
+        return CheckpointTuple(
+            config=config(checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self.serde.loads_typed((mtype, mblob)),
+            parent_config=config(parent_id) if parent_id else None,
+            pending_writes=[(task, channel, self.serde.loads_typed((t, v))) for task, channel, t, v in writes],
+        )
+
+    def get_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
+        thread = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        cols = "checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata"
+        if checkpoint_id := get_checkpoint_id(config):
+            rows = self._query(
+                f"SELECT {cols} FROM checkpoints WHERE thread_id=? AND checkpoint_ns=? AND checkpoint_id=?",
+                (thread, ns, checkpoint_id),
+            )
+        else:
+            rows = self._query(
+                f"SELECT {cols} FROM checkpoints WHERE thread_id=? AND checkpoint_ns=? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread, ns),
+            )
+        return self._tuple(thread, ns, rows[0]) if rows else None
+
+    def list(
+        self,
+        config: Optional[Dict[str, Any]],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        sql = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata " \
+              "FROM checkpoints WHERE 1=1"
+        params: List[Any] = []
+        if config:
+            sql += " AND thread_id=?"
+            params.append(config["configurable"]["thread_id"])
+            if (ns := config["configurable"].get("checkpoint_ns")) is not None:
+                sql += " AND checkpoint_ns=?"
+                params.append(ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                sql += " AND checkpoint_id=?"
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            sql += " AND checkpoint_id<?"
+            params.append(before_id)
+        sql += " ORDER BY checkpoint_id DESC"
+        for thread, ns, *row in self._query(sql, params):
+            tup = self._tuple(thread, ns, tuple(row))
+            if filter and not all(tup.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield tup
+
+    def put(
+        self,
+        config: Dict[str, Any],
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> Dict[str, Any]:
+        thread = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values = c.pop("channel_values")  # type: ignore[misc]
+        statements: List[Tuple[str, Sequence[Any]]] = []
+        for channel, version in new_versions.items():
+            t, blob = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")
+            statements.append((
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                (thread, ns, channel, str(version), t, blob),
+            ))
+        ctype, cblob = self.serde.dumps_typed(c)
+        mtype, mblob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        statements.append((
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (thread, ns, checkpoint["id"], config["configurable"].get("checkpoint_id"), ctype, cblob, mtype, mblob),
+        ))
+        self._write(statements)
+        return {"configurable": {"thread_id": thread, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: Dict[str, Any],
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        statements: List[Tuple[str, Sequence[Any]]] = []
+        for idx, (channel, value) in enumerate(writes):
+            widx = WRITES_IDX_MAP.get(channel, idx)
+            # special (negative index) writes replace; regular ones are written once
+            verb = "INSERT OR REPLACE" if widx < 0 else "INSERT OR IGNORE"
+            t, blob = self.serde.dumps_typed(value)
+            statements.append((
+                f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread, ns, checkpoint_id, task_id, widx, channel, t, blob, task_path),
+            ))
+        self._write(statements)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._write([
+            (f"DELETE FROM {table} WHERE thread_id=?", (thread_id,))
+            for table in ("checkpoints", "blobs", "writes")
+        ])
+
+    # same version scheme as the in-memory saver ("<counter>.<random>")
+    get_next_version = InMemorySaver.get_next_version
+
+    # ---- run ledger ----
+    def deal_statuses(self, run_id: str) -> Dict[str, str]:
+        return dict(self._query("SELECT deal_id, status FROM deals WHERE run_id=?", (run_id,)))
+
+    def mark(self, run_id: str, deal_id: Any, status: str,
+             result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        self._write([(
+            "INSERT INTO deals VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (run_id, deal_id) DO UPDATE SET "
+            "status=excluded.status, result=COALESCE(excluded.result, deals.result), "
+            "error=excluded.error, updated_at=excluded.updated_at",
+            (run_id, str(deal_id), status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+             error, time.time()),
+        )])
+
+    def results(self, run_id: str, status: str = "done") -> Dict[str, Dict[str, Any]]:
+        rows = self._query("SELECT deal_id, result FROM deals WHERE run_id=? AND status=?", (run_id, status))
+        return {deal_id: json.loads(result) for deal_id, result in rows if result}
+
+    def checkpoint_count(self, run_id: Optional[str] = None) -> int:
+        if run_id is None:
+            return self._query("SELECT COUNT(*) FROM checkpoints")[0][0]
+        return self._query("SELECT COUNT(*) FROM checkpoints WHERE thread_id LIKE ?", (f"{run_id}/%",))[0][0]
+
+    def compact(self, run_id: str) -> Dict[str, int]:
+        """Drop the checkpoints of the run's completed deals, then VACUUM."""
+        done = [d for d, s in self.deal_statuses(run_id).items() if s == "done"]
+        before = self.checkpoint_count(run_id)
+        self._write([
+            (f"DELETE FROM {table} WHERE thread_id=?", (thread_id(run_id, d),))
+            for d in done for table in ("checkpoints", "blobs", "writes")
+        ])
+        with self._lock:
+            self._conn.execute("VACUUM")
+        return {"deals": len(done), "checkpoints_removed": before - self.checkpoint_count(run_id)}
@@ -0,0 +1,275 @@
+# graph/daemon.py
+"""
+Warm worker daemon: keeps the compiled graph hot between CLI runs.
+
+    python -m graph.daemon start --workers 4     # foreground; run it under systemd / tmux / &
+    python -m graph.daemon status
+    python -m graph.daemon stop
+
+A cold `python main.py` re-imports LangChain / LangGraph, recompiles the
+graph and rebuilds the model clients before it analyses a line. The daemon
+does that once: it compiles the graph, builds the model clients (when
+credentials are set) and runs one rules-only warm-up deal through
+normalize / precedent search / judge (imports, shard pools, history pages
+in the OS cache), then serves deals over a Unix socket
+(DEALGRAPH_SOCKET, default <tmp>/dealgraph-<uid>.sock).
+
+Deals run on a pool of `--workers` threads sharing the compiled graph (a
+compiled LangGraph app is safe to invoke concurrently; the runs are
+I/O-bound on LLM calls). `main.py` tries the socket first and falls back to
+in-process execution when no daemon answers (DEALGRAPH_DAEMON=0 or
+`--in-process` skips the attempt).
+
+Results must not depend on which shell started the daemon: `run_remote`
+pins the client's per-run switches (raw payload retention, risk streaming,
+relevance filter, model routing) into the state it sends, and the history files of the
+deal's namespaces as absolute paths resolved in the client's cwd. State
+keys win over the daemon's environment. Environment read at graph build
+time (speculation, profiling) is still the daemon's.
+
+Protocol: one JSON object per line each way.
+    {"op": "ping"} / {"op": "run", "state": {...}} / {"op": "shutdown"}
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DAEMON_ENV = "DEALGRAPH_DAEMON"
+SOCKET_ENV = "DEALGRAPH_SOCKET"
+DEFAULT_WORKERS = 4
+CONNECT_TIMEOUT_S = 0.5
+
+_WARMUP_DEAL = (
+    "Customer pays $5,000/month. Provider may terminate immediately for any breach. "
+    "Limitation of liability is fees paid in the last 1 month. Governing law: Delaware."
+)
+
+
+class DaemonError(RuntimeError):
+    """The daemon answered, but the run failed there."""
+
+
+def socket_path() -> Path:
+    value = os.getenv(SOCKET_ENV)
+    if value:
+        return Path(value)
+    return Path(tempfile.gettempdir()) / f"dealgraph-{os.getuid()}.sock"
+
+
+def _enabled() -> bool:
+    return os.getenv(DAEMON_ENV, "1").lower() not in {"0", "false", "no"}
+
+
+# ---- state over the wire ----
+def _encode(obj: Any) -> Any:
+    from graph.records import _Record
+    from schemas import Deal
+
+    if isinstance(obj, Deal):
+        return {"__deal__": {"deal_id": obj.deal_id, "raw_text": obj.raw_text, "clauses": list(obj.clauses)}}
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"{type(obj).__name__} is not serializable")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if "__deal__" not in obj:
+        return obj
+    from graph.records import ClauseRecord
+    from schemas import Deal
+
+    d = obj["__deal__"]
+    return Deal(deal_id=d["deal_id"], raw_text=d["raw_text"],
+                clauses=[ClauseRecord(type=c.get("type"), text=c.get("text")) for c in d["clauses"]])
+
+
+def encode_state(state: Dict[str, Any]) -> str:
+    return json.dumps(state, default=_encode, ensure_ascii=False)
+
+
+def decode_state(text: str) -> Dict[str, Any]:
+    # risk items come back as plain dicts (graph.records.to_dicts passes them through)
+    return json.loads(text, object_hook=_decode)
+
+
+# ---- server ----
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                resp = self.server.dispatch(json.loads(line))
+            except Exception as e:
+                resp = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(resp if isinstance(resp, bytes) else (json.dumps(resp) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class DealGraphDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: Optional[Path] = None, workers: int = DEFAULT_WORKERS, warm: bool = True):
+        self.path = Path(path or socket_path())
+        if self.path.exists():
+            if request({"op": "ping"}, self.path) is not None:
+                raise RuntimeError(f"a DealGraph daemon is already listening on {self.path}")
+            self.path.unlink()  # stale socket of a daemon that died
+        self.workers = max(1, workers)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dealgraph-worker")
+        self.started = time.time()
+        self.served = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+        from graph.deal_graph import build_graph
+
+        self.app = build_graph()
+        if warm:
+            self.warm()
+        super().__init__(str(self.path), _Handler)
+        os.chmod(self.path, 0o600)
+
+    def warm(self) -> None:
+        from agents import clients
+        from graph.rules_only import run_rules_only
+        from schemas import Deal
+
+        if os.getenv("OPENAI_API_KEY"):
+            for agent in clients.AGENTS:
+                for tier in clients.TIERS:
+                    clients.get_llm(agent, tier)
+        run_rules_only({"deal": Deal(deal_id="warmup", raw_text=_WARMUP_DEAL), "execution_trace": []})
+
+    def _run(self, state: Dict[str, Any]) -> bytes:
+        out = self.app.invoke(state)
+        return (json.dumps({"ok": True, "state": encode_state(out)}) + "\n").encode("utf-8")
+
+    def dispatch(self, req: Dict[str, Any]) -> Any:
+        op = req.get("op")
+        if op == "ping":
+            with self._lock:
+                return {"ok": True, "pid": os.getpid(), "workers": self.workers, "served": self.served,
+                        "failed": self.failed, "uptime_s": round(time.time() - self.started, 1)}
+        if op == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+        if op != "run":
+            return {"ok": False, "error": f"unknown op {op!r}"}
+        try:
+            resp = self.pool.submit(self._run, decode_state(req["state"])).result()
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.served += 1
+        return resp
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(wait=False)
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ---- client ----
+def request(payload: Dict[str, Any], path: Optional[Path] = None,
+            timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """One request/response; None when no daemon answers on the socket."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT_S)
+        sock.connect(str(path or socket_path()))
+        sock.settimeout(timeout)
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    except OSError:
+        return None
+    finally:
+        sock.close()
+    return json.loads(line) if line else None
+
+
+def client_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """`state` with the client's environment-driven switches and history paths pinned in."""
+    from agents.risk_agent import stream_enabled
+    from graph.normalize import retain_raw_payloads
+    from graph.relevance import relevance_enabled
+    from graph.routing import routing_enabled
+    from memory.deal_history import DEFAULT_NAMESPACE, parse_namespaces, resolve_history_paths
+
+    out = dict(state)
+    out["retain_raw_payloads"] = retain_raw_payloads(state)
+    out["stream_risks"] = stream_enabled(state)
+    out["relevance_filter"] = relevance_enabled(state)
+    out["model_routing"] = routing_enabled(state)
+    namespaces = parse_namespaces(state.get("namespaces")) + [state.get("namespace") or DEFAULT_NAMESPACE]
+    out["history_paths"] = {**resolve_history_paths(dict.fromkeys(namespaces)), **(state.get("history_paths") or {})}
+    return out
+
+
+def run_remote(state: Dict[str, Any], path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """Final state computed by the daemon, or None (not running / disabled) to run in-process."""
+    if not _enabled():
+        return None
+    resp = request({"op": "run", "state": encode_state(client_state(state))}, path)
+    if resp is None:
+        return None
+    if not resp.get("ok"):
+        raise DaemonError(resp.get("error") or "daemon run failed")
+    return decode_state(resp["state"])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="DealGraph warm worker daemon")
+    parser.add_argument("command", choices=["start", "status", "stop"])
+    parser.add_argument("--socket", type=Path, default=None, help=f"Unix socket path (default: ${SOCKET_ENV})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent deals")
+    args = parser.parse_args(argv)
+    path = args.socket or socket_path()
+
+    if args.command == "status":
+        info = request({"op": "ping"}, path)
+        if info is None:
+            print(f"no daemon on {path}")
+            return 1
+        print(f"daemon pid={info['pid']} workers={info['workers']} served={info['served']} "
+              f"failed={info['failed']} uptime={info['uptime_s']}s on {path}")
+        return 0
+    if args.command == "stop":
+        if request({"op": "shutdown"}, path) is None:
+            print(f"no daemon on {path}")
+            return 1
+        print("daemon stopping")
+        return 0
+
+    t0 = time.perf_counter()
+    server = DealGraphDaemon(path, args.workers)
+    print(f"DealGraph daemon warm in {time.perf_counter() - t0:.2f}s; {args.workers} worker(s) on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,31 +1,92 @@
 # graph/deal_graph.py
-from langgraph.graph import StateGraph, END
+#
+# LangGraph and the agent modules are imported inside build_graph() so that
+# importing this module (e.g. from main.py on a rules-only run) stays cheap.
+import os
+from typing import Dict, Optional
+
 from graph.state import DealGraphState
 
-from agents.clause_agent import clause_agent
-from agents.risk_agent import risk_agent
-from graph.normalize import normalize_agent_outputs
-from agents.precedent_agent import precedent_agent
-from agents.negotiation_agent import negotiation_agent
-from agents.judge_agent import judge_agent
 
-def build_graph():
+def _speculation_enabled() -> bool:
+    return os.getenv("DEALGRAPH_SPECULATIVE_PRECEDENTS", "1").lower() not in {"0", "false", "no"}
+
+
+def await_speculation(state: DealGraphState) -> Dict:
+    # passthrough reached only once normalize is final, so the join with the
+    # speculative branch can't fire on an escalation round
+    return {}
+
+
+def build_graph(speculative: Optional[bool] = None, profiler=None, checkpointer=None):
+    from langgraph.graph import StateGraph, END
+
+    from agents.clause_agent import clause_agent
+    from agents.risk_agent import risk_agent
+    from graph.normalize import PERSPECTIVES, normalize_agent_outputs
+    from graph.routing import escalate_node, escalation_target, route_node, should_escalate
+    from agents.precedent_agent import precedent_agent, speculative_precedent
+    from agents.negotiation_agent import negotiation_agent
+    from agents.judge_agent import judge_agent
+    from graph.perspectives import perspective_node, requested_perspectives
+
+    if speculative is None:
+        speculative = _speculation_enabled()
+    from_env = profiler is None
+    if from_env:
+        from graph.profiling import profiler_from_env
+
+        profiler = profiler_from_env()
+
     graph = StateGraph(DealGraphState)
+    if profiler is not None:
+        # profiling is opt-in: unprofiled graphs get the bare node functions
+        add_node = graph.add_node
+        graph.add_node = lambda name, fn: add_node(name, profiler.wrap(name, fn))
 
+    graph.add_node("route", route_node)
     graph.add_node("clauses", clause_agent)
     graph.add_node("risk", risk_agent)
     graph.add_node("normalize", normalize_agent_outputs)
+    graph.add_node("escalate", escalate_node)
     graph.add_node("precedent", precedent_agent)
     graph.add_node("negotiation", negotiation_agent)
     graph.add_node("judge", judge_agent)
+    for p in PERSPECTIVES:
+        graph.add_node(f"perspective_{p}", perspective_node(p))
 
-    graph.set_entry_point("clauses")
+    graph.set_entry_point("route")
 
+    graph.add_edge("route", "clauses")
     graph.add_edge("clauses", "risk")
     graph.add_edge("risk", "normalize")
-    graph.add_edge("normalize", "precedent")
+    # fast-tier output that fails to parse or contradicts the rules is redone on the strong tier
+    def after_normalize(state: DealGraphState):
+        if should_escalate(state) == "escalate":
+            return "escalate"
+        # per-perspective views run beside the LLM tail once normalize is final
+        return ["continue"] + [f"perspective_{p}" for p in requested_perspectives(state)]
+
+    ends = {"escalate": "escalate", **{f"perspective_{p}": f"perspective_{p}" for p in PERSPECTIVES}}
+    if speculative:
+        # precedent retrieval from the deterministic pre-pass overlaps the LLM calls
+        graph.add_node("speculate", speculative_precedent)
+        graph.add_node("await_speculation", await_speculation)
+        graph.add_edge("route", "speculate")
+        graph.add_conditional_edges("normalize", after_normalize, {**ends, "continue": "await_speculation"})
+        graph.add_edge(["await_speculation", "speculate"], "precedent")
+    else:
+        graph.add_conditional_edges("normalize", after_normalize, {**ends, "continue": "precedent"})
+    graph.add_conditional_edges("escalate", escalation_target, {"clauses": "clauses", "risk": "risk"})
     graph.add_edge("precedent", "negotiation")
     graph.add_edge("negotiation", "judge")
     graph.add_edge("judge", END)
+    for p in PERSPECTIVES:
+        graph.add_edge(f"perspective_{p}", END)
 
-    return graph.compile()
+    # checkpointer (graph/checkpoints.py) persists state after every node: resumable batches
+    app = graph.compile(checkpointer=checkpointer)
+    if from_env and profiler is not None:
+        # DEALGRAPH_PROFILE: time every invoke; files are written at process exit
+        profiler.instrument(app)
+    return app
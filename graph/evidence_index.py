@@ -0,0 +1,114 @@
+# graph/evidence_index.py
+"""
+Per-deal evidence localization.
+
+`EvidenceIndex(raw_text)` tokenizes the deal once (lowercased word tokens
+with their character offsets) and keeps a postings table of word trigrams.
+`locate(evidence)` aligns an evidence string by letting each of its trigrams
+vote for a start position in the deal, so lookup cost depends on the length
+of the evidence, not of the document:
+
+- exact (modulo case, whitespace, punctuation) -> score 1.0
+- near-verbatim (ellipses, a few edited words) -> 0 < score < 1
+- nothing aligns                               -> score 0.0, no offsets
+
+`localize_evidence(risk_items, raw_text)` attaches span_start / span_end /
+match_score to every RiskItem and sets `unverified` when the score is below
+MIN_MATCH_SCORE (evidence the model may have invented).
+"""
+from __future__ import annotations
+
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+NGRAM = 3
+# below this share of evidence tokens aligned to the deal, flag as unverified
+MIN_MATCH_SCORE = 0.6
+# alignments this many tokens apart are treated as the same match (inserted/dropped words)
+ALIGN_SLACK = 3
+# common n-grams ("the customer shall") carry little signal; cap their postings
+MAX_POSTINGS = 64
+
+_WORD = re.compile(r"\w+")
+
+Span = Tuple[int, int]
+
+
+def _tokens(text: str) -> List[Tuple[str, int, int]]:
+    return [(m.group(0).lower(), m.start(), m.end()) for m in _WORD.finditer(text or "")]
+
+
+class EvidenceIndex:
+    def __init__(self, text: str, n: int = NGRAM):
+        self.n = n
+        toks = _tokens(text)
+        self.words = [t[0] for t in toks]
+        self.starts = [t[1] for t in toks]
+        self.ends = [t[2] for t in toks]
+        self._grams: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+        self._unigrams: Dict[str, List[int]] = defaultdict(list)
+        for i, w in enumerate(self.words):
+            self._unigrams[w].append(i)
+            if i + n <= len(self.words):
+                self._grams[tuple(self.words[i:i + n])].append(i)
+
+    def _span(self, first: int, last: int) -> Span:
+        return self.starts[first], self.ends[last]
+
+    def _locate_short(self, words: List[str]) -> Tuple[Optional[Span], float]:
+        # shorter than one n-gram: anchor on the rarest word and verify
+        postings = min((self._unigrams.get(w, []) for w in words), key=len)
+        for p in postings[:MAX_POSTINGS]:
+            start = p - words.index(self.words[p])
+            if start >= 0 and self.words[start:start + len(words)] == words:
+                return self._span(start, start + len(words) - 1), 1.0
+        return None, 0.0
+
+    def locate(self, evidence: str) -> Tuple[Optional[Span], float]:
+        """(char span in the deal text or None, match score 0..1)"""
+        words = [t[0] for t in _tokens(evidence)]
+        if not words or not self.words:
+            return None, 0.0
+        n = self.n
+        if len(words) < n:
+            return self._locate_short(words)
+
+        # each evidence n-gram votes for where the evidence would start in the deal
+        votes: Counter = Counter()
+        hits: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        for j in range(len(words) - n + 1):
+            for p in self._grams.get(tuple(words[j:j + n]), [])[:MAX_POSTINGS]:
+                votes[p - j] += 1
+                hits[p - j].append((j, p))
+        if not votes:
+            return None, 0.0
+
+        best = votes.most_common(1)[0][0]
+        covered = set()
+        first, last = None, None
+        for align in range(best - ALIGN_SLACK, best + ALIGN_SLACK + 1):
+            for j, p in hits.get(align, []):
+                covered.update(range(j, j + n))
+                first = p if first is None else min(first, p)
+                last = p + n - 1 if last is None else max(last, p + n - 1)
+
+        score = len(covered) / len(words)
+        return self._span(first, last), round(score, 3)
+
+
+@lru_cache(maxsize=16)
+def index_for(text: str) -> EvidenceIndex:
+    # normalize may run twice per deal (escalation); build the index once
+    return EvidenceIndex(text)
+
+
+def localize_evidence(risk_items: List[Any], raw_text: str) -> List[Any]:
+    index = index_for(raw_text or "")
+    for item in risk_items:
+        span, score = index.locate(item.evidence or item.llm_risk or "")
+        item.span_start, item.span_end = span if span else (None, None)
+        item.match_score = score
+        item.unverified = score < MIN_MATCH_SCORE
+    return risk_items
@@ -1,9 +1,11 @@
 import json
+import os
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
+from graph.evidence_index import localize_evidence
+from graph.records import ClauseRecord, RiskItem
 from graph.state import DealGraphState
-from schemas import Clause  # or from models.deal import Clause, depending on your layout
 
 
 CATEGORIES = [
@@ -72,32 +74,64 @@ def _normalize_category(c: str) -> str:
                 return cat
     return "Other"
 
+# Rules below are written from the customer's side. The provider view of a
+# clause mirrors it: what hurts the customer is a low-risk win for the
+# provider, and customer protections are the provider's exposure, graded by
+# what the protection puts at stake (PROVIDER_EXPOSURE, else Medium).
+PERSPECTIVES = ("customer", "provider")
+PROVIDER_EXPOSURE = {
+    # uncapped provider liability, customer exit at will: the deal-breakers
+    "Liability": "High",
+    "Termination": "High",
+}
+_UNCAPPED = ("unlimited", "uncapped", "without limit", "no cap")
+
+def _uncapped_provider_liability(category: str, text: str) -> bool:
+    t = text.lower()
+    return category == "Liability" and "provider" in t and any(w in t for w in _UNCAPPED)
+
+def view_as(perspective: str, category: str, severity: str, direction: str, text: str = "") -> Tuple[str, str]:
+    """(severity, direction) of a customer-side classification of `text` as seen by `perspective`."""
+    if perspective not in PERSPECTIVES:
+        raise ValueError(f"unknown perspective {perspective!r}; expected one of {PERSPECTIVES}")
+    if perspective == "provider":
+        # the customer-side rules grade it like any cap mention; for the provider it is the exposure
+        if _uncapped_provider_liability(category, text):
+            return PROVIDER_EXPOSURE[category], "Provider-Unfavorable"
+        if direction == "Customer-Unfavorable":
+            return "Low", "Provider-Favorable"
+        if direction == "Customer-Favorable":
+            return PROVIDER_EXPOSURE.get(category, "Medium"), "Provider-Unfavorable"
+    return severity, direction
+
 def _severity_points(sev: str) -> int:
     return {"Low": 1, "Medium": 3, "High": 6}.get(sev, 2)
 
-def _classify_risk_line(line: str) -> Dict[str, Any]:
+# keyword table per category, first match wins (also drives graph/relevance.py)
+CATEGORY_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ("Termination", ["terminate", "termination", "breach", "cure"]),
+    ("Liability", ["liability", "cap", "limit of liability", "damages"]),
+    ("SLA", ["uptime", "service credit", "sla"]),
+    ("Service Changes", ["change", "modify", "discontinue", "features"]),
+    ("Payment", ["fee", "fees", "payment", "invoice", "interest", "late", "price", "pricing", "rate"]),
+    ("IP", ["ip", "intellectual property", "ownership", "license"]),
+    ("Jurisdiction", ["governing law", "venue", "jurisdiction"]),
+]
+
+def _keyword_category(t: str) -> str:
+    """Category of lower-cased text by CATEGORY_KEYWORDS, or "Other"."""
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(k in t for k in keywords):
+            return category
+    return "Other"
+
+def _classify_risk_line(line: str, perspective: str = "customer") -> Dict[str, Any]:
     """
     Deterministic classification of a single risk line into structured fields.
     """
     t = line.lower()
 
-    # Category
-    if any(k in t for k in ["terminate", "termination", "breach", "cure"]):
-        category = "Termination"
-    elif any(k in t for k in ["liability", "cap", "limit of liability", "damages"]):
-        category = "Liability"
-    elif any(k in t for k in ["uptime", "service credit", "sla"]):
-        category = "SLA"
-    elif any(k in t for k in ["change", "modify", "discontinue", "features"]):
-        category = "Service Changes"
-    elif any(k in t for k in ["fee", "fees", "payment", "invoice", "interest", "late", "price", "pricing", "rate"]):
-        category = "Payment"
-    elif any(k in t for k in ["ip", "intellectual property", "ownership", "license"]):
-        category = "IP"
-    elif any(k in t for k in ["governing law", "venue", "jurisdiction"]):
-        category = "Jurisdiction"
-    else:
-        category = "Other"
+    category = _keyword_category(t)
 
     # Direction + Severity heuristics (customer perspective)
     direction = "Balanced"
@@ -153,6 +187,7 @@ def _classify_risk_line(line: str) -> Dict[str, Any]:
     if category == "Jurisdiction":
         severity, direction = "Low", "Balanced"
 
+    severity, direction = view_as(perspective, category, severity, direction, line)
     return {
         "category": category,
         "severity": severity,
@@ -269,121 +304,85 @@ def _parse_risk_analysis(risk_analysis: str) -> List[Dict[str, Any]]:
         })
     return items
 
-def normalize_agent_outputs(state: DealGraphState) -> Dict:
+_SEV_RANK = {"Low": 1, "Medium": 2, "High": 3}
+
+def normalize_risk_item(r: Dict[str, Any], perspective: str = "customer") -> Optional[RiskItem]:
     """
-    Deterministic LangGraph node.
-    Parses/normalizes raw agent outputs into structured state.
+    Deterministic normalization of one raw risk dict (LLM or pre-pass output).
+    Returns None for empty items.
     """
+    risk_text = str(r.get("risk", "")).strip()
+    evidence = str(r.get("evidence", "")).strip() or risk_text
+    if not risk_text and not evidence:
+        return None
 
-    deal = state["deal"]
-    trace = state.get("execution_trace", [])
-
-    # -------------------------
-    # 1) Normalize Clauses
-    # -------------------------
-    raw = state.get("raw_clause_extraction") or state.get("clause_analysis") or "[]"
-
-    parsed = _safe_json_loads(raw)
+    # deterministic baseline (source of truth)
+    det = _classify_risk_line(evidence or risk_text)
 
-    normalized_clauses: List[Clause] = []
+    # LLM hints (ONLY category is potentially useful)
+    llm_cat = _normalize_category(r.get("category"))
+    llm_sev = _normalize_severity(r.get("severity"))
 
-    if isinstance(parsed, list):
-        for item in parsed:
-            if not isinstance(item, dict):
-                continue
-            clause_type = _normalize_clause_type(str(item.get("type", "")))
-            clause_text = str(item.get("text", "")).strip()
-            if not clause_text:
-                continue
-            normalized_clauses.append(Clause(type=clause_type, text=clause_text))
+    # Category: allow LLM to override ONLY if it's canonical
+    category = llm_cat if llm_cat != "Other" else det["category"]
 
-    # Update the domain object (deal.clauses) — this is the “stateful” part
-    deal.clauses = normalized_clauses
+    # Severity & direction: deterministic wins
+    severity = det["severity"]
+    direction = det["direction"]
 
-    # -------------------------
-    # 2) Normalize Risks -> risk_items + risk_vector + risk_score
-    # -------------------------
-    
-    # 2) Normalize Risks (JSON-first)
-
-    risk_raw = state.get("risk_analysis") or ""
-    risk_list = _parse_risk_analysis(risk_raw)
+    # Optional: allow LLM to nudge severity up by ONE level only
+    if det["category"] != "Other" and _SEV_RANK[llm_sev] - _SEV_RANK[severity] == 1:
+        severity = llm_sev
 
+    # Deterministic hard override: absurdly low liability caps
+    if category == "Liability":
+        m = re.search(r"\$\s*(\d+)", (evidence or "").lower())
+        if m:
+            amt = int(m.group(1))
+            if amt <= 1000:
+                severity = "High"
+                direction = "Customer-Unfavorable"
+
+    # the LLM hints above are customer-side too, so the view is taken last
+    severity, direction = view_as(perspective, category, severity, direction, evidence or risk_text)
+    return RiskItem(
+        category,
+        severity,
+        direction,
+        (evidence or "").strip(),
+        r.get("category"),
+        r.get("severity"),
+        r.get("direction"),
+        risk_text,
+    )
+
+def extracted_risk_map(risk_items: List[RiskItem]) -> Dict[str, str]:
+    """backward-compatible extracted_risks"""
     extracted_risks: Dict[str, str] = {}
-    risk_items: List[Dict[str, Any]] = []
-
-    for r in risk_list:
-        risk_text = str(r.get("risk", "")).strip()
-        evidence = str(r.get("evidence", "")).strip() or risk_text
-        if not risk_text and not evidence:
-            continue
-
-        # backward-compatible extracted_risks
-        key = " ".join((risk_text or evidence).split()[:6]).strip()
+    for item in risk_items:
+        text = item.llm_risk or item.evidence
+        key = " ".join(text.split()[:6]).strip()
         if key and key not in extracted_risks:
-            extracted_risks[key] = (risk_text or evidence)
-
-                # deterministic baseline (source of truth)
-        det = _classify_risk_line(evidence or risk_text)
-
-        # LLM hints (ONLY category is potentially useful)
-        llm_cat = _normalize_category(r.get("category"))
-        llm_sev = _normalize_severity(r.get("severity"))
-        llm_dir = _normalize_direction(r.get("direction"))
-
-        # Category: allow LLM to override ONLY if it's canonical
-        category = llm_cat if llm_cat != "Other" else det["category"]
-
-        # Severity & direction: deterministic wins
-        severity = det["severity"]
-        direction = det["direction"]
-
-        # Optional: allow LLM to nudge severity up by ONE level only
-        rank = {"Low": 1, "Medium": 2, "High": 3}
-        if det["category"] != "Other" and rank[llm_sev] > rank[severity]:
-            if rank[llm_sev] - rank[severity] == 1:
-                severity = llm_sev
-
-        # Deterministic hard override: absurdly low liability caps
-        if category == "Liability":
-            m = re.search(r"\$\s*(\d+)", (evidence or "").lower())
-            if m:
-                amt = int(m.group(1))
-                if amt <= 1000:
-                    severity = "High"
-                    direction = "Customer-Unfavorable"
-
-
-        # 3) deterministic "upgrade" for obvious patterns the LLM might miss
-        if category == "Liability":
-            m = re.search(r"\$\s*(\d+)", (evidence or "").lower())
-            if m:
-                amt = int(m.group(1))
-                if amt <= 1000:
-                    severity = "High"
-                    direction = "Customer-Unfavorable"
-
-        risk_items.append({
-            "category": category,
-            "severity": severity,
-            "direction": direction,
-            "evidence": (evidence or "").strip(),
-            "llm_category": r.get("category"),
-            "llm_severity": r.get("severity"),
-            "llm_direction": r.get("direction"),
-            "llm_risk": risk_text,
-        })
-
+            extracted_risks[key] = text
+    return extracted_risks
 
+def normalize_risk_list(
+    risk_list: List[Dict[str, Any]], perspective: str = "customer"
+) -> Tuple[Dict[str, str], List[RiskItem]]:
+    risk_items = [item for item in (normalize_risk_item(r, perspective) for r in risk_list) if item is not None]
+    return extracted_risk_map(risk_items), risk_items
 
-    # risk_vector: category -> highest severity seen
-    rank = {"Low": 1, "Medium": 2, "High": 3}
+def build_risk_vector(risk_items: List[Any]) -> Dict[str, str]:
+    """category -> highest severity seen"""
     risk_vector: Dict[str, str] = {}
     for r in risk_items:
         cat = r["category"]
         sev = r["severity"]
-        if cat not in risk_vector or rank[sev] > rank[risk_vector[cat]]:
+        if cat not in risk_vector or _SEV_RANK[sev] > _SEV_RANK[risk_vector[cat]]:
             risk_vector[cat] = sev
+    return risk_vector
+
+def score_risk_vector(risk_vector: Dict[str, str]) -> float:
     # risk_score: 0..100 (simple additive v1)
     score = 0
     for cat, sev in risk_vector.items():
@@ -391,13 +390,79 @@ def normalize_agent_outputs(state: DealGraphState) -> Dict:
     # scale to 0..100 in a predictable way (max categories ~7)
     # max per category is 6 points; 7 categories => 42 points
     risk_score = min(100.0, (score / 42.0) * 100.0)
-    risk_score = round(float(risk_score), 1)
-    return {
-    "deal": deal,
-    "extracted_risks": extracted_risks,
-    "risk_items": risk_items,
-    "risk_vector": risk_vector,
-    "risk_score": risk_score,
-    "current_node": "normalize",
-    "execution_trace": trace + ["normalize"],
-}
+    return round(float(risk_score), 1)
+
+def retain_raw_payloads(state: DealGraphState) -> bool:
+    if "retain_raw_payloads" in state:
+        return bool(state["retain_raw_payloads"])
+    return os.getenv("DEALGRAPH_RETAIN_RAW", "").lower() in {"1", "true", "yes"}
+
+def normalize_agent_outputs(state: DealGraphState) -> Dict:
+    """
+    Deterministic LangGraph node.
+    Parses/normalizes raw agent outputs into structured state.
+    """
+
+    deal = state["deal"]
+
+    # -------------------------
+    # 1) Normalize Clauses
+    # -------------------------
+    raw = state.get("raw_clause_extraction") or state.get("clause_analysis")
+    if raw is None and deal.clauses:
+        # risk-only escalation round: the first pass consumed (and dropped)
+        # the clause payload, so its clauses stand
+        normalized_clauses: List[ClauseRecord] = list(deal.clauses)
+    else:
+        normalized_clauses = []
+        parsed = _safe_json_loads(raw or "[]")
+        if isinstance(parsed, list):
+            for item in parsed:
+                if not isinstance(item, dict):
+                    continue
+                clause_type = _normalize_clause_type(str(item.get("type", "")))
+                clause_text = str(item.get("text", "")).strip()
+                if not clause_text:
+                    continue
+                normalized_clauses.append(ClauseRecord(clause_type, clause_text))
+
+    # Update the domain object (deal.clauses) — this is the “stateful” part
+    deal.clauses = normalized_clauses
+
+    # -------------------------
+    # 2) Normalize Risks -> risk_items + risk_vector + risk_score
+    # -------------------------
+    
+    # 2) Normalize Risks (JSON-first)
+
+    streamed = state.get("streamed_risk_items")
+    if streamed is not None:
+        # already normalized item-by-item while the risk agent was streaming
+        risk_items = list(streamed)
+        extracted_risks = extracted_risk_map(risk_items)
+    else:
+        risk_raw = state.get("risk_analysis") or ""
+        risk_list = _parse_risk_analysis(risk_raw)
+        extracted_risks, risk_items = normalize_risk_list(risk_list)
+    # offsets + match score per item; unmatched evidence is flagged unverified
+    localize_evidence(risk_items, deal.raw_text)
+
+    risk_vector = build_risk_vector(risk_items)
+    risk_score = score_risk_vector(risk_vector)
+    out = {
+        "deal": deal,
+        "extracted_risks": extracted_risks,
+        "risk_items": risk_items,
+        "risk_vector": risk_vector,
+        "risk_score": risk_score,
+        "streamed_risk_items": None,
+        "current_node": "normalize",
+        "execution_trace": ["normalize"],
+    }
+    # Raw LLM payloads are fully captured by the structured fields above;
+    # drop them unless the caller asked to keep them (audits, re-scoring).
+    if not retain_raw_payloads(state):
+        out["raw_clause_extraction"] = None
+        out["clause_analysis"] = None
+        out["risk_analysis"] = None
+    return out
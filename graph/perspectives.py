@@ -0,0 +1,93 @@
+# graph/perspectives.py
+"""
+Customer and provider views of one deal from a single extraction.
+
+The deterministic rules (graph/normalize.py) and the judge policy are written
+from the customer's side; the graph's own risk_vector / risk_score /
+recommendation stay customer-side. When we sell as well as buy, set
+
+    state["perspectives"] = ["customer", "provider"]      (main.py --perspectives)
+
+and normalize fans out one pass per perspective, parallel to the precedent /
+negotiation / judge tail. Each pass re-normalizes the risk items from the
+LLM hints they already carry (no LLM call, no re-parse), then scores and
+judges them with the deterministic policy; its result lands in
+state["perspective_views"][perspective]:
+
+    {"risk_items": [...], "risk_vector": {...}, "risk_score": 35.7,
+     "recommendation": "APPROVE_WITH_EDITS", "confidence": 0.8, "rationale": "..."}
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List
+
+from agents.judge_agent import judge_policy
+from graph.normalize import PERSPECTIVES, build_risk_vector, normalize_risk_item, score_risk_vector
+from graph.records import RiskItem, to_dicts
+
+_SPAN_FIELDS = ("span_start", "span_end", "match_score", "unverified")
+
+
+def requested_perspectives(state: Dict[str, Any]) -> List[str]:
+    requested = list(dict.fromkeys(state.get("perspectives") or []))
+    unknown = [p for p in requested if p not in PERSPECTIVES]
+    if unknown:
+        raise ValueError(f"unknown perspective(s) {unknown}; expected {list(PERSPECTIVES)}")
+    return requested
+
+
+def renormalize(risk_items: List[Any], perspective: str) -> List[RiskItem]:
+    """The same risks normalized for `perspective`; evidence offsets carry over."""
+    out: List[RiskItem] = []
+    for r in risk_items:
+        item = normalize_risk_item({
+            "risk": r.get("llm_risk") or "",
+            "evidence": r.get("evidence") or "",
+            "category": r.get("llm_category"),
+            "severity": r.get("llm_severity"),
+            "direction": r.get("llm_direction"),
+        }, perspective)
+        if item is None:
+            continue
+        for name in _SPAN_FIELDS:
+            setattr(item, name, r.get(name))
+        out.append(item)
+    return out
+
+
+def perspective_view(state: Dict[str, Any], perspective: str) -> Dict[str, Any]:
+    items = renormalize(state.get("risk_items") or [], perspective)
+    risk_vector = build_risk_vector(items)
+    risk_score = score_risk_vector(risk_vector)
+    decision = judge_policy({"deal": state.get("deal"), "risk_items": items, "risk_score": risk_score}, perspective)
+    return {
+        "risk_items": to_dicts(items),
+        "risk_vector": risk_vector,
+        "risk_score": risk_score,
+        "recommendation": decision["recommendation"],
+        "confidence": decision["confidence"],
+        "rationale": decision["rationale"],
+    }
+
+
+def perspective_node(perspective: str) -> Callable[[Dict[str, Any]], Dict]:
+    """Graph node for one perspective; the views of parallel nodes merge by reducer."""
+    def node(state: Dict[str, Any]) -> Dict:
+        return {
+            "perspective_views": {perspective: perspective_view(state, perspective)},
+            "execution_trace": [f"perspective:{perspective}"],
+        }
+
+    node.__name__ = f"perspective_{perspective}"
+    return node
+
+
+def analyze_perspectives(state: Dict[str, Any]) -> Dict:
+    """All requested views at once (graph/rules_only.py, no graph to fan out)."""
+    requested = requested_perspectives(state)
+    if not requested:
+        return {}
+    return {
+        "perspective_views": {p: perspective_view(state, p) for p in requested},
+        "execution_trace": [f"perspective:{p}" for p in requested],
+    }
@@ -0,0 +1,43 @@
+# graph/prepass.py
+"""
+Deterministic sentence-level risk pass over raw deal text.
+
+Produces the same {"risks": [...]} shape as risk_agent, using only
+`_classify_risk_line`, so it can stand in for the LLM when no model call is
+wanted (rules-only runs) or possible.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List
+
+from graph.normalize import _classify_risk_line
+
+# split after sentence punctuation or on blank/bullet line breaks
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n\s*[-•*]?\s*")
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text or "") if s and s.strip()]
+
+
+def deterministic_risks(text: str) -> List[Dict[str, Any]]:
+    risks: List[Dict[str, Any]] = []
+    for sentence in split_sentences(text):
+        det = _classify_risk_line(sentence)
+        if det["category"] == "Other":
+            continue
+        risks.append({
+            "category": det["category"],
+            "risk": " ".join(sentence.split()[:8]),
+            "evidence": det["evidence"],
+            "severity": det["severity"],
+            "direction": det["direction"],
+        })
+    return risks
+
+
+def deterministic_risk_analysis(text: str) -> str:
+    """JSON string in the `risk_analysis` shape risk_agent produces."""
+    return json.dumps({"risks": deterministic_risks(text)}, ensure_ascii=False)
@@ -0,0 +1,310 @@
+# graph/profiling.py
+"""
+Opt-in per-node CPU and memory profiling.
+
+Enabled with `main.py --profile [DIR]`, `evals.run_parallel --profile DIR`
+or DEALGRAPH_PROFILE=<dir> (1 / true -> ./profiles). When it is off,
+build_graph() adds the node functions unwrapped, so there is no overhead.
+Under the environment switch every graph built in the process (daemon,
+batch, evals, plain app.invoke) shares one profiler, its apps' invoke is
+timed, and the run directory is written when the process exits.
+
+When on, every graph node runs under cProfile with tracemalloc counters,
+and one run directory is written per process:
+
+    profiles/<run_id>/<node>.prof     cProfile stats for the node, all calls
+    profiles/<run_id>/merged.prof     all nodes together (the whole batch)
+    profiles/<run_id>/allocations.txt top allocation sites still live at the
+                                      end of the run, per node counters
+    profiles/<run_id>/summary.json    calls, wall / CPU time, net and peak
+                                      traced memory per node, graph wall time
+                                      and LangGraph overhead
+
+"framework overhead" is invoke wall time minus the time covered by node
+executions, i.e. what LangGraph itself (state merging, scheduling) costs.
+A tracemalloc snapshot costs O(live allocations) (seconds once LangChain is
+imported), so allocation sites come from one start/end snapshot diff per
+run; per call only the traced-memory counters are read. Those counters are
+process-wide: nodes in parallel branches see each other's allocations, and
+threads a node starts itself (hedging, shard pools) are not under its
+cProfile.
+
+    python -m graph.profiling show profiles/<run_id>/normalize.prof --top 25
+    python -m graph.profiling merge profiles/run-a profiles/run-b --out profiles/merged
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROFILE_ENV = "DEALGRAPH_PROFILE"
+DEFAULT_DIR = Path("profiles")
+# traceback depth kept by tracemalloc; 1 frame is enough for "file:line" sites
+TRACE_FRAMES = 1
+TOP_ALLOCATIONS = 15
+
+# the profiler's own bookkeeping is left out of the allocation report
+_IGNORED_SITES = (tracemalloc.__file__, __file__, cProfile.__file__, pstats.__file__)
+
+# node (start, end) intervals of the invoke running in this context
+_intervals: contextvars.ContextVar[Optional[List[Tuple[float, float]]]] = contextvars.ContextVar(
+    "dealgraph_profile_intervals", default=None
+)
+
+
+def profile_dir_from_env() -> Optional[Path]:
+    value = os.getenv(PROFILE_ENV, "").strip()
+    if not value or value.lower() in {"0", "false", "no"}:
+        return None
+    if value.lower() in {"1", "true", "yes"}:
+        return DEFAULT_DIR
+    return Path(value)
+
+
+def _covered(intervals: List[Tuple[float, float]]) -> float:
+    total, end = 0.0, None
+    for s, e in sorted(intervals):
+        if end is None or s > end:
+            total += e - s
+            end = e
+        elif e > end:
+            total += e - end
+            end = e
+    return total
+
+
+class NodeProfiler:
+    """Collects per-node cProfile stats and allocation diffs for one run."""
+
+    def __init__(self, out_dir: Path, run_id: Optional[str] = None):
+        self.run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.run_dir = Path(out_dir) / self.run_id
+        self._lock = threading.Lock()
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        self._invokes: List[Dict[str, float]] = []
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(TRACE_FRAMES)
+        self._baseline = tracemalloc.take_snapshot()
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def profiled(state):
+            mem0 = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            prof = cProfile.Profile()
+            t0, c0 = time.perf_counter(), time.thread_time()
+            prof.enable()
+            try:
+                return fn(state)
+            finally:
+                prof.disable()
+                t1, c1 = time.perf_counter(), time.thread_time()
+                mem1, peak = tracemalloc.get_traced_memory()
+                intervals = _intervals.get()
+                if intervals is not None:
+                    intervals.append((t0, t1))
+                self._record(name, prof, t1 - t0, c1 - c0, mem1 - mem0, peak - mem0)
+
+        return profiled
+
+    def _record(self, name: str, prof: cProfile.Profile, wall: float, cpu: float, net: int, peak: int) -> None:
+        with self._lock:
+            node = self._nodes.setdefault(
+                name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "alloc_net_bytes": 0, "alloc_peak_bytes": 0}
+            )
+            node["calls"] += 1
+            node["wall_s"] += wall
+            node["cpu_s"] += cpu
+            node["alloc_net_bytes"] += net
+            node["alloc_peak_bytes"] = max(node["alloc_peak_bytes"], peak)
+            if name in self._stats:
+                self._stats[name].add(prof)
+            else:
+                self._stats[name] = pstats.Stats(prof)
+
+    def invoke(self, app: Any, state: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """app.invoke that also records graph wall time and framework overhead."""
+        return self._timed(lambda: app.invoke(state, config) if config is not None else app.invoke(state))
+
+    def instrument(self, app: Any) -> Any:
+        """Route `app.invoke` itself through the profiler (callers that don't know about it)."""
+        original = app.invoke
+
+        @functools.wraps(original)
+        def invoke(state, config=None, **kwargs):
+            return self._timed(lambda: original(state, config, **kwargs) if config is not None
+                               else original(state, **kwargs))
+
+        app.invoke = invoke
+        return app
+
+    def _timed(self, call: Callable[[], Any]) -> Any:
+        intervals: List[Tuple[float, float]] = []
+        token = _intervals.set(intervals)
+        t0 = time.perf_counter()
+        try:
+            return call()
+        finally:
+            wall = time.perf_counter() - t0
+            _intervals.reset(token)
+            with self._lock:
+                self._invokes.append({"wall_s": wall, "nodes_s": _covered(intervals)})
+
+    def top_allocations(self, limit: int = TOP_ALLOCATIONS) -> List[Dict[str, Any]]:
+        """Allocation sites that grew the most since the profiler started (still-live memory)."""
+        diff = tracemalloc.take_snapshot().compare_to(self._baseline, "lineno")
+        sites: Counter = Counter()
+        counts: Counter = Counter()
+        for stat in diff:
+            frame = stat.traceback[0]
+            if stat.size_diff > 0 and not frame.filename.startswith(_IGNORED_SITES):
+                site = f"{frame.filename}:{frame.lineno}"
+                sites[site] += stat.size_diff
+                counts[site] += stat.count_diff
+        return [{"site": site, "bytes": size, "blocks": counts[site]} for site, size in sites.most_common(limit)]
+
+    def summary(self, allocations: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            nodes = {
+                name: {
+                    **{k: round(v, 6) if isinstance(v, float) else v for k, v in n.items()},
+                    "mean_wall_s": round(n["wall_s"] / n["calls"], 6),
+                }
+                for name, n in sorted(self._nodes.items())
+            }
+            graph_wall = sum(i["wall_s"] for i in self._invokes)
+            covered = sum(i["nodes_s"] for i in self._invokes)
+        return {
+            "run_id": self.run_id,
+            "invocations": len(self._invokes),
+            "graph_wall_s": round(graph_wall, 6),
+            "framework_overhead_s": round(max(0.0, graph_wall - covered), 6),
+            "nodes": nodes,
+            "top_allocations": self.top_allocations() if allocations else [],
+        }
+
+    def write(self) -> Path:
+        """Write per-node .prof files, merged.prof, allocations.txt and summary.json."""
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+        with self._lock:
+            stats = dict(self._stats)
+        paths = []
+        for name, st in stats.items():
+            path = self.run_dir / f"{name}.prof"
+            st.dump_stats(str(path))
+            paths.append(str(path))
+        if paths:
+            pstats.Stats(*paths).dump_stats(str(self.run_dir / "merged.prof"))
+
+        with (self.run_dir / "summary.json").open("w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        with (self.run_dir / "allocations.txt").open("w", encoding="utf-8") as f:
+            f.write(format_allocations(summary))
+        return self.run_dir
+
+    def close(self) -> None:
+        if self._started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+_env_lock = threading.Lock()
+_env_profiler: Optional[NodeProfiler] = None
+
+
+def profiler_from_env() -> Optional[NodeProfiler]:
+    """The process-wide profiler when DEALGRAPH_PROFILE is set; written at exit."""
+    global _env_profiler
+    out_dir = profile_dir_from_env()
+    if out_dir is None:
+        return None
+    with _env_lock:
+        if _env_profiler is None:
+            _env_profiler = NodeProfiler(out_dir)
+            atexit.register(flush_env_profiler)
+        return _env_profiler
+
+
+def flush_env_profiler() -> Optional[Path]:
+    """Write and close the environment-enabled profiler (registered with atexit)."""
+    global _env_profiler
+    with _env_lock:
+        profiler, _env_profiler = _env_profiler, None
+    if profiler is None:
+        return None
+    try:
+        return profiler.write()
+    finally:
+        profiler.close()
+
+
+def format_allocations(summary: Dict[str, Any]) -> str:
+    lines = [f"run {summary['run_id']}: {summary['invocations']} invocation(s), "
+             f"graph wall {summary['graph_wall_s']:.3f}s, framework overhead {summary['framework_overhead_s']:.3f}s"]
+    for name, node in summary["nodes"].items():
+        lines.append(f"  [{name}] calls={node['calls']} wall={node['wall_s']:.3f}s cpu={node['cpu_s']:.3f}s "
+                     f"net={node['alloc_net_bytes'] / 1024:.1f} KiB peak={node['alloc_peak_bytes'] / 1024:.1f} KiB")
+    lines.append("\ntop allocation sites (live at end of run):")
+    for a in summary["top_allocations"]:
+        lines.append(f"  {a['bytes'] / 1024:>10.1f} KiB {a['blocks']:>8} blocks  {a['site']}")
+    return "\n".join(lines) + "\n"
+
+
+def merge_runs(run_dirs: List[Path], out_dir: Path) -> Path:
+    """Merge same-named .prof files across run directories (e.g. several batch workers)."""
+    by_name: Dict[str, pstats.Stats] = {}
+    for run_dir in run_dirs:
+        for prof in sorted(Path(run_dir).glob("*.prof")):
+            if prof.stem in by_name:
+                by_name[prof.stem].add(str(prof))
+            else:
+                by_name[prof.stem] = pstats.Stats(str(prof))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, st in by_name.items():
+        st.dump_stats(str(out_dir / f"{name}.prof"))
+    return out_dir
+
+
+def format_stats(path: Path, top: int = 25, sort: str = "cumulative") -> str:
+    buf = io.StringIO()
+    pstats.Stats(str(path), stream=buf).strip_dirs().sort_stats(sort).print_stats(top)
+    return buf.getvalue()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="DealGraph node profiles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="print a .prof file")
+    show.add_argument("path", type=Path)
+    show.add_argument("--top", type=int, default=25)
+    show.add_argument("--sort", default="cumulative", help="pstats sort key (cumulative, tottime, calls, ...)")
+    merge = sub.add_parser("merge", help="merge per-node profiles of several runs")
+    merge.add_argument("runs", type=Path, nargs="+")
+    merge.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        print(format_stats(args.path, args.top, args.sort))
+        return 0
+    out = merge_runs(args.runs, args.out)
+    print(f"merged {len(args.runs)} run(s) into {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
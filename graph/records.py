@@ -0,0 +1,103 @@
+# graph/records.py
+"""
+Compact, slotted records used on the graph hot path.
+
+They replace per-item dicts / Pydantic models inside the state while keeping
+dict-style read access (`r["category"]`, `r.get("severity")`) so existing
+consumers keep working. Use `to_dicts()` at the edges (snapshots, UI, JSON).
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List
+
+
+class _Record:
+    __slots__ = ()
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        for name, value in zip(self.__slots__, args):
+            object.__setattr__(self, name, value)
+        for name in self.__slots__[len(args):]:
+            object.__setattr__(self, name, kwargs.pop(name, None))
+        if kwargs:
+            raise TypeError(f"unexpected fields for {type(self).__name__}: {sorted(kwargs)}")
+
+    # ---- dict-compatible read access ----
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__slots__
+
+    def keys(self) -> Iterable[str]:
+        return iter(self.__slots__)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    # ---- value semantics / pickling ----
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _Record):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None  # mutable
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: tuple) -> None:
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class RiskItem(_Record):
+    """
+    One normalized risk: deterministic fields first, then the raw LLM hints,
+    then where the evidence sits in deal.raw_text (graph/evidence_index.py).
+    """
+
+    __slots__ = (
+        "category",
+        "severity",
+        "direction",
+        "evidence",
+        "llm_category",
+        "llm_severity",
+        "llm_direction",
+        "llm_risk",
+        "span_start",
+        "span_end",
+        "match_score",
+        "unverified",
+    )
+
+
+class ClauseRecord(_Record):
+    """Normalized clause; attribute-compatible with schemas.Clause."""
+
+    __slots__ = ("type", "text")
+
+
+def to_dicts(items: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Adapter for snapshot/UI output: records -> plain dicts, dicts pass through."""
+    out: List[Dict[str, Any]] = []
+    for item in items or []:
+        if isinstance(item, _Record):
+            out.append(item.to_dict())
+        elif isinstance(item, dict):
+            out.append(item)
+    return out
@@ -0,0 +1,182 @@
+# graph/relevance.py
+"""
+Deterministic relevance pre-filter for the risk LLM's input.
+
+Recitals, definitions, signature blocks and exhibits rarely produce risks in
+our categories, but the risk prompt used to carry the whole deal text. The
+text is segmented into sentences (graph/prepass.py splitting, with
+offsets), each sentence is scored with the category keyword table of
+graph/normalize.py, and only keyword-bearing sentences plus
+CONTEXT_SENTENCES on each side are forwarded; omitted stretches are marked
+"[...]".
+
+The filter is conservative: deals under RELEVANCE_MIN_CHARS go in whole, and
+so does any deal where filtering would save less than MIN_REDUCTION. Evidence
+is still localized against the full deal.raw_text, so offsets don't change.
+
+    DEALGRAPH_RELEVANCE_FILTER=1     (or state["relevance_filter"] = True) turns it on
+
+It is off by default until its recall has been measured on recorded cases.
+
+state["relevance"] reports chars in / out and the input tokens saved;
+`recall_check()` is the eval-suite check (evals/run_parallel.py
+--relevance-recall, on a full-text run with RECALL_STATE) that full-text
+risk evidence would have survived the filter.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.clients import CHARS_PER_TOKEN
+from graph.normalize import CATEGORY_KEYWORDS
+from graph.prepass import _SENTENCE_SPLIT
+from graph.records import to_dicts
+
+RELEVANCE_MIN_CHARS = 2000
+CONTEXT_SENTENCES = 1
+MIN_REDUCTION = 0.15
+OMITTED = "[...]"
+
+# regexes, matched from a word start; risks the category table doesn't name
+EXTRA_TERMS = [
+    r"indemn\w*", r"hold harmless", r"renew\w*", r"auto-?renew\w*", r"data\b", r"personal information",
+    r"exclusiv\w*", r"non-?compet\w*", r"non-?solicit\w*", r"confidential\w*", r"warrant\w*",
+    r"insurance\b", r"audit\w*", r"assign\w*", r"subcontract\w*", r"penalt\w*", r"minimum (?:commitment|purchase)\w*",
+    r"capped\b", r"liabilities\b", r"liable\b", r"modifi\w*", r"chang\w*", r"suspen\w*",
+]
+# operative language; "shall mean" opens a definition
+OBLIGATION_TERMS = [r"shall\b(?! mean)", r"must\b", r"may\b", r"will\b", r"agrees?\b", r"entitled\b", r"responsible\b"]
+
+_RELEVANT = re.compile(
+    r"\b(?:"
+    + "|".join(
+        [re.escape(k) + r"(?:s|es|d|ed|ing)?\b" for _, keywords in CATEGORY_KEYWORDS for k in keywords]
+        + EXTRA_TERMS
+        + OBLIGATION_TERMS
+    )
+    + ")",
+    re.IGNORECASE,
+)
+
+Span = Tuple[int, int]
+
+
+def relevance_enabled(state: Dict[str, Any]) -> bool:
+    if "relevance_filter" in state:
+        return bool(state["relevance_filter"])
+    return os.getenv("DEALGRAPH_RELEVANCE_FILTER", "0").lower() in {"1", "true", "yes"}
+
+
+def is_relevant(sentence: str) -> bool:
+    return _RELEVANT.search(sentence) is not None
+
+
+def segment(text: str) -> List[Span]:
+    """(start, end) offsets of the sentences split_sentences() would return."""
+    spans: List[Span] = []
+    pos = 0
+    for m in list(_SENTENCE_SPLIT.finditer(text or "")) + [None]:
+        end = m.start() if m is not None else len(text or "")
+        chunk = text[pos:end]
+        if chunk.strip():
+            lead = len(chunk) - len(chunk.lstrip())
+            spans.append((pos + lead, pos + len(chunk.rstrip())))
+        if m is not None:
+            pos = m.end()
+    return spans
+
+
+def relevant_spans(text: str, context: int = CONTEXT_SENTENCES) -> Tuple[List[Span], int]:
+    """Merged spans to forward (relevant sentences + context), and the sentence count."""
+    sentences = segment(text)
+    keep = [False] * len(sentences)
+    for i, (s, e) in enumerate(sentences):
+        if is_relevant(text[s:e]):
+            for j in range(max(0, i - context), min(len(sentences), i + context + 1)):
+                keep[j] = True
+
+    runs: List[Span] = []
+    for i, (s, e) in enumerate(sentences):
+        if not keep[i]:
+            continue
+        if runs and keep[i - 1]:
+            runs[-1] = (runs[-1][0], e)
+        else:
+            runs.append((s, e))
+    return runs, len(sentences)
+
+
+def relevance_filter(text: str, min_chars: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+    """(text to send to the risk LLM, report)."""
+    text = text or ""
+    min_chars = RELEVANCE_MIN_CHARS if min_chars is None else min_chars
+    report: Dict[str, Any] = {"applied": False, "chars_in": len(text), "chars_out": len(text),
+                              "input_tokens_saved": 0, "reduction": 0.0}
+    if len(text) < min_chars:
+        return text, report
+
+    runs, sentences = relevant_spans(text)
+    if not runs:
+        # nothing matched the keyword table: don't hand the LLM an empty deal
+        return text, report
+    parts = [OMITTED] if runs[0][0] > 0 and text[:runs[0][0]].strip() else []
+    for i, (s, e) in enumerate(runs):
+        if i:
+            parts.append(OMITTED)
+        parts.append(text[s:e])
+    if text[runs[-1][1]:].strip():
+        parts.append(OMITTED)
+    filtered = "\n".join(parts)
+
+    saved = len(text) - len(filtered)
+    if saved < MIN_REDUCTION * len(text):
+        return text, report
+    report.update({
+        "applied": True,
+        "chars_out": len(filtered),
+        "sentences": sentences,
+        "spans": len(runs),
+        "input_tokens_saved": saved // CHARS_PER_TOKEN,
+        "reduction": round(saved / len(text), 4),
+    })
+    return filtered, report
+
+
+def evidence_recall(text: str, risk_items: List[Any]) -> Optional[float]:
+    """
+    Share of located risk evidence (span_start / span_end into `text`) inside
+    the spans the filter forwards (size thresholds aside). Every risk counts,
+    "Other" included; None when none is located. An item counts as kept when
+    most of its evidence is.
+    """
+    runs = relevant_spans(text)[0]
+    located = [(r.get("span_start"), r.get("span_end")) for r in risk_items]
+    located = [(s, e) for s, e in located if isinstance(s, int) and isinstance(e, int) and e > s]
+    if not located:
+        return None
+    kept = 0
+    for s, e in located:
+        covered = sum(max(0, min(e, re) - max(s, rs)) for rs, re in runs)
+        kept += covered * 2 >= e - s
+    return kept / len(located)
+
+
+# the recall check needs the full-text risk path
+RECALL_STATE = {"relevance_filter": False}
+
+
+def recall_check(out: Dict[str, Any], deal_text: str, errors: List[str], min_recall: float) -> Dict[str, Any]:
+    """
+    Eval check of a full-text run: the share of its risk evidence the filter
+    would have forwarded (an error below `min_recall`) and the input tokens
+    it would have saved.
+    """
+    recall = evidence_recall(deal_text, to_dicts(out.get("risk_items") or []))
+    if recall is not None and recall < min_recall:
+        errors.append(f"relevance filter recall {recall:.2f} < {min_recall:.2f} of full-text risk evidence")
+    return {
+        "relevance_recall": recall,
+        "relevance_tokens_saved": relevance_filter(deal_text, 0)[1].get("input_tokens_saved", 0),
+    }
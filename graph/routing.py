@@ -0,0 +1,224 @@
+# graph/routing.py
+"""
+Complexity-based model routing with confidence escalation.
+
+`route_node` (graph entry) scores the deal deterministically and picks a
+model tier for every agent:
+- "fast"   short / simple deals the deterministic classifier understands well
+- "strong" everything else (the agents' configured models)
+
+After normalize, `should_escalate` re-runs extraction on the strong tier
+only when the fast-tier output could not be parsed or disagrees with the
+deterministic rules. Decisions and estimated savings are kept in
+state["routing"].
+
+Opt-in with DEALGRAPH_ROUTING=1 (or state["model_routing"]); without it
+every deal runs on the strong tier, except where a budget forces a cheaper
+one.
+
+With a per-deal budget (state["budget_usd"], agents/usage.py) the tier is
+the most capable one whose estimated cost fits: strong -> fast -> "rules"
+(no LLM calls at all), and escalation is skipped when it would not fit.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.clients import AGENTS, CHARS_PER_TOKEN, TYPICAL_OUTPUT_TOKENS, agent_config, estimate_cost
+from agents.usage import RULES_TIER, spent_usd
+from graph.normalize import _classify_risk_line, _normalize_direction, _normalize_severity
+from graph.prepass import split_sentences
+from graph.state import DealGraphState
+
+FAST_MAX_CHARS = 6000
+FAST_MAX_SENTENCES = 60
+# above this share of sentences the keyword rules can't place, use the strong tier
+FAST_MAX_OTHER_SHARE = 0.6
+# share of risk items where the LLM contradicts the rules that triggers escalation
+ESCALATE_DISAGREEMENT = 0.34
+
+# rough per-call overhead for the system prompts
+_PROMPT_OVERHEAD_TOKENS = 350
+
+_RANK = {"Low": 1, "Medium": 2, "High": 3}
+_OPPOSITE = {("Customer-Favorable", "Customer-Unfavorable"), ("Customer-Unfavorable", "Customer-Favorable")}
+
+
+def routing_enabled(state: Optional[Dict[str, Any]] = None) -> bool:
+    if state and "model_routing" in state:
+        return bool(state["model_routing"])
+    return os.getenv("DEALGRAPH_ROUTING", "0").lower() in {"1", "true", "yes"}
+
+
+def assess_complexity(raw_text: str) -> Dict[str, Any]:
+    sentences = split_sentences(raw_text)
+    other = sum(1 for s in sentences if _classify_risk_line(s)["category"] == "Other")
+    other_share = (other / len(sentences)) if sentences else 1.0
+    return {
+        "chars": len(raw_text or ""),
+        "sentences": len(sentences),
+        "other_share": round(other_share, 3),
+    }
+
+
+def choose_tier(complexity: Dict[str, Any]) -> str:
+    if (
+        complexity["chars"] <= FAST_MAX_CHARS
+        and complexity["sentences"] <= FAST_MAX_SENTENCES
+        and complexity["other_share"] <= FAST_MAX_OTHER_SHARE
+    ):
+        return "fast"
+    return "strong"
+
+
+def _estimated_cost(tier: str, input_tokens: int, agents: List[str]) -> float:
+    return sum(
+        estimate_cost(agent_config(a, tier)["model"], input_tokens + _PROMPT_OVERHEAD_TOKENS, TYPICAL_OUTPUT_TOKENS[a])
+        for a in agents
+    )
+
+
+def estimate_deal_cost(raw_text: str, routed: Optional[bool] = None) -> Dict[str, Any]:
+    """Estimated USD for the whole deal per tier, plus the tier routing would pick."""
+    routed = routing_enabled() if routed is None else routed
+    complexity = assess_complexity(raw_text)
+    # every agent sees roughly the deal text once
+    input_tokens = complexity["chars"] // CHARS_PER_TOKEN
+    return {
+        "tier": choose_tier(complexity) if routed else "strong",
+        "strong": _estimated_cost("strong", input_tokens, list(AGENTS)),
+        "fast": _estimated_cost("fast", input_tokens, list(AGENTS)),
+        RULES_TIER: 0.0,
+        "complexity": complexity,
+    }
+
+
+def budget_tier(tier: str, estimates: Dict[str, Any], budget: Optional[float]) -> str:
+    """Most capable tier, no stronger than `tier`, whose estimated cost fits the budget."""
+    if budget is None:
+        return tier
+    order = ["strong", "fast", RULES_TIER]
+    for candidate in order[order.index(tier):]:
+        if estimates[candidate] <= budget:
+            return candidate
+    return RULES_TIER
+
+
+def route_node(state: DealGraphState) -> Dict:
+    deal = state["deal"]
+    estimates = estimate_deal_cost(deal.raw_text, routing_enabled(state))
+    planned = estimates["tier"]
+    tier = budget_tier(planned, estimates, state.get("budget_usd"))
+    strong_cost = estimates["strong"]
+    routed_cost = estimates[tier]
+
+    return {
+        "model_tier": tier,
+        "routing": {
+            "tier": tier,
+            "models": {a: agent_config(a, tier)["model"] for a in AGENTS} if tier != RULES_TIER else {},
+            "complexity": estimates["complexity"],
+            "escalated": False,
+            "escalation_reason": None,
+            "est_cost_usd": round(routed_cost, 6),
+            "est_savings_usd": round(strong_cost - routed_cost, 6),
+            "budget_usd": state.get("budget_usd"),
+            "budget_downgrade": planned if tier != planned else None,
+        },
+        "execution_trace": ["route"],
+        "current_node": "route",
+    }
+
+
+def rule_disagreement(risk_items: List[Any]) -> float:
+    """
+    Share of risk items where the LLM's own severity/direction contradicts the
+    deterministic result (severity two levels apart, or opposite direction).
+    """
+    if not risk_items:
+        return 0.0
+    disagree = 0
+    for r in risk_items:
+        llm_sev = _normalize_severity(r.get("llm_severity") or "")
+        llm_dir = _normalize_direction(r.get("llm_direction") or "")
+        if abs(_RANK[llm_sev] - _RANK.get(r.get("severity"), 2)) >= 2:
+            disagree += 1
+        elif (llm_dir, r.get("direction")) in _OPPOSITE:
+            disagree += 1
+    return disagree / len(risk_items)
+
+
+def escalation_reason(state: DealGraphState) -> str:
+    if state.get("model_tier") != "fast":
+        return ""
+    if state.get("clause_parse_ok") is False:
+        return "clause_json_parse_failed"
+    if state.get("risk_parse_ok") is False:
+        return "risk_json_parse_failed"
+    share = rule_disagreement(state.get("risk_items") or [])
+    if share >= ESCALATE_DISAGREEMENT:
+        return f"rule_disagreement={share:.2f}"
+    return ""
+
+
+# after escalation these agents (not yet run) use the strong tier too
+_AFTER_EXTRACTION = ["negotiation", "judge"]
+
+
+def _escalation_plan(state: DealGraphState, reason: str) -> Tuple[List[str], int]:
+    """(agents whose extraction is redone on the strong tier, estimated input tokens)"""
+    input_tokens = ((state.get("routing") or {}).get("complexity") or {}).get("chars", 0) // CHARS_PER_TOKEN
+    redo = ["clause", "risk"] if reason.startswith("clause") else ["risk"]
+    return redo, input_tokens
+
+
+def should_escalate(state: DealGraphState) -> str:
+    reason = escalation_reason(state)
+    if not reason:
+        return "continue"
+    budget = state.get("budget_usd")
+    if budget is not None:
+        redo, input_tokens = _escalation_plan(state, reason)
+        if spent_usd(state) + _estimated_cost("strong", input_tokens, redo + _AFTER_EXTRACTION) > budget:
+            # the strong-tier redo doesn't fit the deal's budget; keep the fast-tier result
+            return "continue"
+    return "escalate"
+
+
+def escalate_node(state: DealGraphState) -> Dict:
+    reason = escalation_reason(state)
+    routing = dict(state.get("routing") or {})
+
+    # extraction is redone on the strong tier, and the remaining agents
+    # (negotiation, judge) now run there too
+    redo, input_tokens = _escalation_plan(state, reason)
+    remaining = _AFTER_EXTRACTION
+    extra = (
+        _estimated_cost("strong", input_tokens, redo)
+        + _estimated_cost("strong", input_tokens, remaining)
+        - _estimated_cost("fast", input_tokens, remaining)
+    )
+
+    routing.update({
+        "tier": "strong",
+        "escalated": True,
+        "escalation_reason": reason,
+        "escalated_agents": redo,
+        "escalated_models": {a: agent_config(a, "strong")["model"] for a in redo + remaining},
+        "est_cost_usd": round(routing.get("est_cost_usd", 0.0) + extra, 6),
+        "est_savings_usd": round(routing.get("est_savings_usd", 0.0) - extra, 6),
+    })
+    return {
+        "model_tier": "strong",
+        "routing": routing,
+        # a packed (bulk mode) extraction is redone per deal too
+        "packed_extraction": None,
+        "execution_trace": ["escalate"],
+        "current_node": "escalate",
+    }
+
+
+def escalation_target(state: DealGraphState) -> str:
+    redo = (state.get("routing") or {}).get("escalated_agents") or ["risk"]
+    return "clauses" if "clause" in redo else "risk"
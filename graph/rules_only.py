@@ -0,0 +1,40 @@
+# graph/rules_only.py
+"""
+LLM-free pipeline: deterministic pre-pass -> normalize -> precedent -> judge policy
+(-> perspective views, when requested).
+
+Runs the deterministic nodes directly, without LangGraph or LangChain, so a
+rules-only CLI run starts in a fraction of a second.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from graph.prepass import deterministic_risk_analysis
+
+
+def _merge(state: Dict[str, Any], update: Dict[str, Any]) -> None:
+    # mirror the graph's reducer for the trace, plain overwrite for the rest
+    trace = update.pop("execution_trace", [])
+    state.update(update)
+    state["execution_trace"] = list(state.get("execution_trace") or []) + list(trace)
+
+
+def run_rules_only(state: Dict[str, Any]) -> Dict[str, Any]:
+    from agents.judge_agent import judge_policy
+    from agents.precedent_agent import precedent_agent
+    from graph.normalize import normalize_agent_outputs
+    from graph.perspectives import analyze_perspectives
+
+    state = dict(state)
+    deal = state["deal"]
+    _merge(state, {
+        "raw_clause_extraction": "[]",
+        "risk_analysis": deterministic_risk_analysis(deal.raw_text),
+        "execution_trace": ["rules_prepass"],
+        "current_node": "rules_prepass",
+    })
+
+    for node in (normalize_agent_outputs, precedent_agent, judge_policy, analyze_perspectives):
+        _merge(state, node(state))
+    return state
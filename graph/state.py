@@ -1,4 +1,5 @@
-from typing import TypedDict, List, Dict, Optional, Any
+import operator
+from typing import Annotated, TypedDict, List, Dict, Optional, Any
 from schemas import Deal
 
 
@@ -7,8 +8,17 @@ class DealGraphState(TypedDict):
     # ---- Domain Payload ----
     deal: Deal
 
+    # ---- History Namespaces (memory/deal_history.py) ----
+    namespace: str                       # shard this deal is saved into
+    namespaces: List[str]                # shards searched for precedents
+    # optional precedent pre-filters: recommendations / since / until
+    precedent_filters: Dict[str, Any]
+    # namespace -> absolute history file, pinned by the process that owns the
+    # paths (a CLI client of the daemon); unset = resolved from the cwd
+    history_paths: Dict[str, str]
+
     # ---- Agent Outputs ----
-    clause_analysis: Optional[str]
+    clause_analysis: Optional[str]       # legacy alias of raw_clause_extraction (input only)
     risk_analysis: Optional[str]
     raw_clause_extraction: Optional[str]
     precedent_analysis: Optional[str]
@@ -16,10 +26,21 @@ class DealGraphState(TypedDict):
 
     # ---- Aggregation ----
     extracted_risks: Dict[str, str]
-    risk_items: List[Dict[str, Any]]     # NEW
+    risk_items: List[Any]                # graph.records.RiskItem (dict-compatible)
+    # RiskItems normalized while the risk agent streamed (consumed by normalize)
+    streamed_risk_items: Optional[List[Any]]
     risk_vector: Dict[str, str]          # NEW
     risk_score: float     
     supporting_precedents: List[str]
+    # provisional risk vector + candidate pool from the speculative pre-pass
+    speculation: Dict[str, Any]
+    speculation_outcome: Optional[str]   # "hit" | "rerank" | "miss" | None
+
+    # ---- Perspectives (graph/perspectives.py) ----
+    # extra deterministic views to compute, e.g. ["customer", "provider"]
+    perspectives: List[str]
+    # perspective -> risk_items / risk_vector / risk_score / recommendation / ...
+    perspective_views: Annotated[Dict[str, Dict[str, Any]], operator.or_]
 
     # ---- Final Decision ----
     recommendation: Optional[str]
@@ -28,4 +49,33 @@ class DealGraphState(TypedDict):
 
     # ---- Graph Control ----
     current_node: str
-    execution_trace: List[str]
+    # nodes return only their own entry; LangGraph appends via the reducer
+    execution_trace: Annotated[List[str], operator.add]
+    # keep raw LLM payloads after normalize (off by default to keep state small)
+    retain_raw_payloads: bool
+    # stream the risk agent's response and normalize items as they complete
+    stream_risks: bool
+    # bulk mode (agents/packing.py): raw_clause_extraction / risk_analysis from a
+    # multi-deal request; the clause and risk agents use it instead of calling the LLM
+    packed_extraction: Optional[Dict[str, str]]
+    # risk-prompt relevance pre-filter (graph/relevance.py): on/off, and its report
+    relevance_filter: bool
+    relevance: Optional[Dict[str, Any]]
+
+    # ---- Model Routing (graph/routing.py) ----
+    model_routing: bool                  # opt-in; overrides DEALGRAPH_ROUTING
+    model_tier: str                      # "fast" | "strong" | "rules" (budget: no LLM calls)
+    routing: Dict[str, Any]              # tier, complexity, escalation, est. savings
+    clause_parse_ok: bool
+    risk_parse_ok: bool
+
+    # ---- Usage / Budgets (agents/usage.py) ----
+    # one entry per LLM call: agent, model, tier, tokens, cost_usd
+    llm_usage: Annotated[List[Dict[str, Any]], operator.add]
+    budget_usd: Optional[float]          # per-deal spend ceiling (None = unlimited)
+
+    # ---- Degraded Mode ----
+    # set when a node missed its LLM deadline / the call failed and a
+    # deterministic fallback produced its output instead
+    degraded: Annotated[bool, operator.or_]
+    degraded_nodes: Annotated[List[str], operator.add]
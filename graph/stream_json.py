@@ -0,0 +1,95 @@
+# graph/stream_json.py
+"""
+Incremental parser for the risk agent's {"risks": [...]} output.
+
+`RiskArrayParser.feed(chunk)` consumes raw model tokens and returns every
+element of the top-level "risks" array that completed inside that chunk, so
+callers can normalize items while the rest of the response is still
+arriving. Code fences, prose around the object and malformed trailing output
+are ignored; elements that already parsed are never dropped.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List
+
+
+class RiskArrayParser:
+    def __init__(self, key: str = "risks"):
+        self.key = key
+        self.complete = False       # the "risks" array was closed
+        self.malformed = 0          # elements that closed but did not parse
+        self.text_parts: List[str] = []
+
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._str: List[str] = []   # current string at object depth 1 (candidate key)
+        self._last_key = ""
+        self._array_depth = 0       # depth inside the "risks" array, 0 = not in it
+        self._elem: List[str] = []  # chars of the element being read
+        self._elem_open = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.text_parts)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        if not chunk:
+            return out
+        self.text_parts.append(chunk)
+        if self.complete:
+            return out
+
+        for ch in chunk:
+            if self._elem_open:
+                self._elem.append(ch)
+
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    if self._depth == 1 and not self._array_depth:
+                        self._last_key = "".join(self._str)
+                elif self._depth == 1 and not self._array_depth:
+                    self._str.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_str = True
+                self._str = []
+            elif ch in "{[":
+                if self._array_depth and self._depth == self._array_depth and ch == "{" and not self._elem_open:
+                    self._elem_open = True
+                    self._elem = [ch]
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and not self._array_depth and self._last_key == self.key:
+                    self._array_depth = self._depth
+            elif ch in "}]":
+                self._depth = max(0, self._depth - 1)
+                if self._elem_open and self._depth == self._array_depth:
+                    self._elem_open = False
+                    item = self._load("".join(self._elem))
+                    if item is not None:
+                        out.append(item)
+                elif self._array_depth and self._depth < self._array_depth:
+                    self.complete = True
+                    self._array_depth = 0
+                    break
+            elif ch == "," and self._depth == 1:
+                self._last_key = ""
+        return out
+
+    def _load(self, text: str) -> Any:
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            obj = None
+        if not isinstance(obj, dict):
+            self.malformed += 1
+            return None
+        return obj
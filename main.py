@@ -1,18 +1,26 @@
+import argparse
 import uuid
 import sys
+from pathlib import Path
 from schemas import Deal
 from graph.deal_graph import build_graph
+from graph.records import to_dicts
 
 from memory.snapshot import build_snapshot
-from memory.deal_history import append_snapshot
+from agents.usage import usage_summary
+from memory.deal_history import DEFAULT_NAMESPACE, append_snapshot, parse_namespaces
 
 
-def build_initial_state(deal_text: str):
+def build_initial_state(deal_text: str, namespace: str = DEFAULT_NAMESPACE, search_namespaces=None):
     deal = Deal(deal_id=str(uuid.uuid4()), raw_text=deal_text)
 
     return {
         "deal": deal,
 
+        # history shards: saved into `namespace`, precedents searched in `namespaces`
+        "namespace": namespace,
+        "namespaces": parse_namespaces(search_namespaces or [namespace]),
+
         # agent outputs (raw)
         "raw_clause_extraction": None,
         "clause_analysis": None,
@@ -35,20 +43,90 @@ def build_initial_state(deal_text: str):
         # control/debug
         "current_node": "start",
         "execution_trace": [],
+        "degraded": False,
+        "degraded_nodes": [],
     }
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="DealGraph contract risk analysis")
+    parser.add_argument("--rules-only", action="store_true",
+                        help="deterministic pipeline only: no LLM calls, no LangGraph import")
+    parser.add_argument("--no-save", action="store_true",
+                        help="do not append the result to deal history")
+    parser.add_argument("--retain-raw", action="store_true",
+                        help="keep raw LLM payloads in state and in the saved snapshot (for backfills)")
+    parser.add_argument("--namespace", default=DEFAULT_NAMESPACE,
+                        help="tenant / business-unit history shard to save into (and search by default)")
+    parser.add_argument("--search-namespaces", default=None,
+                        help="comma-separated namespaces to search for precedents")
+    parser.add_argument("--in-process", action="store_true",
+                        help="run the graph in this process even when the warm daemon is up")
+    parser.add_argument("--route", action="store_true",
+                        help="send simple deals to the fast model tier (default: strong tier; DEALGRAPH_ROUTING=1)")
+    parser.add_argument("--budget", type=float, default=None, metavar="USD",
+                        help="per-deal LLM spend ceiling; cheaper tiers / deterministic fallbacks past it")
+    parser.add_argument("--profile", nargs="?", const="profiles", default=None, metavar="DIR",
+                        help="profile every graph node (cProfile + tracemalloc) into DIR/<run_id>/")
+    parser.add_argument("--perspectives", default=None, metavar="LIST",
+                        help="also score from these sides, e.g. customer,provider (no extra LLM calls)")
+    parser.add_argument("--precedent-recommendations", default=None,
+                        help="only consider precedents with these recommendations, e.g. REJECT,APPROVE_WITH_EDITS")
+    parser.add_argument("--precedent-since", default=None, help="only precedents created on/after this ISO date")
+    parser.add_argument("--precedent-until", default=None, help="only precedents created on/before this ISO date")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
     print("Paste deal text. Press Ctrl+Z then Enter when done:\n")
     deal_text = sys.stdin.read()
     print(f"\n--- DEBUG: got {len(deal_text)} chars ---")
 
-    state = build_initial_state(deal_text)
+    state = build_initial_state(deal_text, args.namespace, args.search_namespaces)
+    if args.retain_raw:
+        state["retain_raw_payloads"] = True
+    if args.route:
+        state["model_routing"] = True
+    if args.budget is not None:
+        state["budget_usd"] = args.budget
+    if args.perspectives:
+        state["perspectives"] = [p.strip() for p in args.perspectives.split(",") if p.strip()]
+    if args.precedent_recommendations or args.precedent_since or args.precedent_until:
+        state["precedent_filters"] = {
+            "recommendations": [r.strip() for r in (args.precedent_recommendations or "").split(",") if r.strip()],
+            "since": args.precedent_since,
+            "until": args.precedent_until,
+        }
 
-    app = build_graph()
     print("Running DealGraph...")
+    if args.rules_only:
+        from graph.rules_only import run_rules_only
+
+        final_state = run_rules_only(state)
+    else:
+        final_state = None
+        if not (args.profile or args.in_process):
+            # a running warm daemon (graph/daemon.py) skips the cold start
+            from graph.daemon import run_remote
+
+            final_state = run_remote(state)
+            if final_state is not None:
+                print("(served by the warm DealGraph daemon)")
+        if final_state is None:
+            profiler = None
+            if args.profile:
+                from graph.profiling import NodeProfiler
+
+                profiler = NodeProfiler(Path(args.profile))
+            app = build_graph(profiler=profiler)
+            if profiler is None:
+                final_state = app.invoke(state)
+            else:
+                final_state = profiler.invoke(app, state)
+                print(f"node profiles written to {profiler.write()}")
+                profiler.close()
     print("Graph finished.")
-    final_state = app.invoke(state)
     print("\n--- RISK SCORE ---")
     print(final_state.get("risk_score"))
 
@@ -56,8 +134,11 @@ if __name__ == "__main__":
     print(final_state.get("risk_vector"))
 
     print("\n--- RISK ITEMS ---")
-    for r in final_state.get("risk_items", []):
+    for r in to_dicts(final_state.get("risk_items", [])):
         print("-", r)
+    unverified = [r for r in final_state.get("risk_items", []) if r.get("unverified")]
+    if unverified:
+        print(f"(WARNING: {len(unverified)} risk item(s) cite evidence not found in the deal text)")
 
     print("\n--- DEBUG: FINAL STATE KEYS ---")
     print(list(final_state.keys()))
@@ -68,18 +149,49 @@ if __name__ == "__main__":
             print(f"\n[{k}] type={type(v)} preview={str(v)[:200]}")
 
     # Save snapshot for precedent memory (so future runs retrieve history)
-    append_snapshot(build_snapshot(final_state))
+    if not args.no_save:
+        append_snapshot(build_snapshot(final_state), namespace=args.namespace)
+
+    routing = final_state.get("routing") or {}
+    if routing:
+        print("\n--- MODEL ROUTING ---")
+        print(f"tier={routing.get('tier')} escalated={routing.get('escalated')} "
+              f"reason={routing.get('escalation_reason')} est_savings_usd={routing.get('est_savings_usd')}")
+        if routing.get("budget_downgrade"):
+            print(f"(budget ${routing.get('budget_usd')}: downgraded from {routing['budget_downgrade']} tier)")
+
+    relevance = final_state.get("relevance") or {}
+    if relevance.get("applied"):
+        print(f"(relevance filter: risk prompt {relevance['chars_in']} -> {relevance['chars_out']} chars, "
+              f"~{relevance['input_tokens_saved']} input tokens saved)")
+
+    usage = usage_summary(final_state.get("llm_usage") or [])
+    if usage["calls"]:
+        print("\n--- LLM USAGE ---")
+        print(f"calls={usage['calls']} input_tokens={usage['input_tokens']} "
+              f"output_tokens={usage['output_tokens']} cost_usd={usage['cost_usd']:.6f}")
+        for agent, u in usage["by_agent"].items():
+            print(f"  {agent:<12} tokens={u['input_tokens']}+{u['output_tokens']} cost_usd={u['cost_usd']:.6f}")
 
     print("\n--- EXECUTION TRACE ---")
     print(" -> ".join(final_state.get("execution_trace", [])))
 
     print("\n--- FINAL RECOMMENDATION ---")
     print(final_state.get("recommendation"))
+    if final_state.get("degraded"):
+        print(f"(DEGRADED: deterministic fallback used for {', '.join(final_state.get('degraded_nodes') or [])})")
 
     print("\n--- EXTRACTED RISKS (normalized) ---")
     for k, v in (final_state.get("extracted_risks") or {}).items():
         print(f"- {v}")
 
+    views = final_state.get("perspective_views") or {}
+    if views:
+        print("\n--- PERSPECTIVES ---")
+        for p, v in views.items():
+            print(f"{p:<9} score={v['risk_score']:<5} recommendation={v['recommendation']:<18} "
+                  f"vector={v['risk_vector']}")
+
     print("\n--- RATIONALE ---")
     print(final_state.get("rationale"))
 
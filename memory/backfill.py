@@ -0,0 +1,256 @@
+# memory/backfill.py
+"""
+Re-score deal history after normalization / policy rules change.
+
+Snapshots saved with raw payload retention (DEALGRAPH_RETAIN_RAW=1 or
+`main.py --retain-raw`) carry the deal text and the raw clause / risk LLM
+outputs. The backfill re-runs `normalize_agent_outputs` and the judge policy
+on them in a process pool and streams the results, in history order, into a
+new history version:
+
+    memory/deal_history.jsonl -> memory/deal_history.v<N>.jsonl
+                                 memory/deal_history.v<N>.diff.json
+
+Snapshots without payloads are copied through unchanged (and counted as
+skipped). Stored perspective views (graph/perspectives.py) are re-scored with
+the rest. `--promote` archives the active history (.pre-v<N>.jsonl) and
+makes the new version active (rollups are rebuilt). It holds the history's
+writer lock, and snapshots appended while the backfill ran (past the offset
+it read up to) are re-scored and carried over, not lost with the archive.
+
+    python -m memory.backfill [--namespace acme] [--workers 4] [--promote]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import shutil
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from memory.deal_history import history_lock, namespace_path
+
+# lines handed to the pool at a time; bounds memory on large histories
+WINDOW = 512
+CHUNKSIZE = 32
+
+_VERSION_RE = re.compile(r"\.v(\d+)\.jsonl$")
+
+
+def version_path(history_path: Path, version: int) -> Path:
+    return history_path.with_name(f"{history_path.stem}.v{version}.jsonl")
+
+
+def next_version(history_path: Path) -> int:
+    versions = [
+        int(m.group(1))
+        for p in history_path.parent.glob(f"{history_path.stem}.v*.jsonl")
+        if (m := _VERSION_RE.search(p.name))
+    ]
+    return max(versions, default=1) + 1
+
+
+def rescore_snapshot(snapshot: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Re-run normalize + judge policy on a snapshot's retained payloads.
+    Returns the updated snapshot, or None when it has no payloads.
+    """
+    from agents.judge_agent import judge_policy
+    from graph.normalize import normalize_agent_outputs
+    from graph.records import to_dicts
+    from memory.snapshot import build_summary
+    from schemas import Deal
+
+    payloads = snapshot.get("raw_payloads")
+    if not isinstance(payloads, dict) or payloads.get("risk") is None:
+        return None
+
+    state: Dict[str, Any] = {
+        "deal": Deal(deal_id=snapshot.get("deal_id"), raw_text=payloads.get("deal_text") or "", clauses=[]),
+        "raw_clause_extraction": payloads.get("clause") or "[]",
+        "risk_analysis": payloads.get("risk"),
+        "retain_raw_payloads": True,
+    }
+    state.update(normalize_agent_outputs(state))
+    state.update(judge_policy(state))
+    views = snapshot.get("perspectives")
+
+    risk_items = to_dicts(state["risk_items"])
+    out = dict(snapshot)
+    out.update({
+        "clauses": [{"type": c.type, "text": c.text} for c in state["deal"].clauses],
+        "risks": state["extracted_risks"],
+        "risk_items": risk_items,
+        "risk_vector": state["risk_vector"],
+        "risk_score": float(state["risk_score"]),
+        "recommendation": state["recommendation"],
+        "summary": build_summary(risk_items, state["extracted_risks"]),
+    })
+    if isinstance(views, dict) and views:
+        from graph.perspectives import perspective_view
+
+        out["perspectives"] = {}
+        for p in views:
+            view = perspective_view(state, p)
+            out["perspectives"][p] = {k: view[k] for k in ("risk_vector", "risk_score", "recommendation")}
+    return out
+
+
+def _rescore_line(line: str) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Worker: one history line -> (new line or None if unparseable, diff entry)."""
+    try:
+        snapshot = json.loads(line)
+    except ValueError:
+        return None, {"status": "invalid"}
+
+    new = rescore_snapshot(snapshot)
+    if new is None:
+        return json.dumps(snapshot, ensure_ascii=False), {"status": "skipped"}
+
+    entry = {
+        "status": "rescored",
+        "deal_id": snapshot.get("deal_id"),
+        "old_recommendation": snapshot.get("recommendation"),
+        "new_recommendation": new["recommendation"],
+        "old_risk_score": snapshot.get("risk_score"),
+        "new_risk_score": new["risk_score"],
+        "vector_changed": (snapshot.get("risk_vector") or {}) != new["risk_vector"],
+    }
+    return json.dumps(new, ensure_ascii=False), entry
+
+
+def _lines(path: Path, start: int, end: int) -> Iterator[str]:
+    """Complete lines between byte offsets `start` and `end`."""
+    with path.open("rb") as f:
+        f.seek(start)
+        while f.tell() < end:
+            raw = f.readline()
+            if not raw.endswith(b"\n"):
+                break  # a writer is mid-line
+            line = raw.decode("utf-8").strip()
+            if line:
+                yield line
+
+
+def _results(lines: Iterator[str], workers: int) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    if workers <= 1:
+        yield from map(_rescore_line, lines)
+        return
+    # spawn: don't fork a process that may hold LLM client / pool threads
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=ctx) as pool:
+        while True:
+            window = list(islice(lines, WINDOW))
+            if not window:
+                break
+            yield from pool.map(_rescore_line, window, chunksize=CHUNKSIZE)
+
+
+def build_report(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    statuses = Counter(e["status"] for e in entries)
+    rescored = [e for e in entries if e["status"] == "rescored"]
+    changed = [e for e in rescored if e["old_recommendation"] != e["new_recommendation"]]
+    transitions = Counter(f"{e['old_recommendation']}->{e['new_recommendation']}" for e in changed)
+    return {
+        "snapshots": len(entries),
+        "rescored": statuses["rescored"],
+        "skipped_no_payloads": statuses["skipped"],
+        "invalid_lines": statuses["invalid"],
+        "score_changed": sum(1 for e in rescored if e["old_risk_score"] != e["new_risk_score"]),
+        "vector_changed": sum(1 for e in rescored if e["vector_changed"]),
+        "recommendation_changed": len(changed),
+        "transitions": dict(transitions),
+        "changed": changed,
+    }
+
+
+def backfill(history_path: Path, workers: int = 0, out_path: Optional[Path] = None) -> Dict[str, Any]:
+    workers = workers or (os.cpu_count() or 1)
+    out_path = out_path or version_path(history_path, next_version(history_path))
+    tmp = out_path.with_name(out_path.name + ".tmp")
+
+    # no append is mid-line under the lock; later ones stay past `offset` and promote() carries them over
+    with history_lock(history_path):
+        offset = history_path.stat().st_size
+    entries: List[Dict[str, Any]] = []
+    with tmp.open("w", encoding="utf-8") as f:
+        for line, entry in _results(_lines(history_path, 0, offset), workers):
+            if line is not None:
+                f.write(line + "\n")
+            entries.append(entry)
+    os.replace(tmp, out_path)
+
+    report = build_report(entries)
+    report.update({"source": str(history_path), "source_offset": offset, "version": str(out_path)})
+    report_path = out_path.with_suffix(".diff.json")
+    with report_path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    report["report"] = str(report_path)
+    return report
+
+
+def promote(history_path: Path, new_version: Path, source_offset: int) -> Path:
+    """
+    Archive the active history as <stem>.pre-v<N>.jsonl, then make `new_version`
+    active. `source_offset` is the byte offset of history the backfill read
+    (its report's "source_offset"); snapshots appended after it are re-scored
+    and appended to the promoted history.
+    """
+    from memory.rollups import rebuild_rollups
+
+    m = _VERSION_RE.search(new_version.name)
+    tag = f"pre-v{m.group(1)}" if m else "pre-backfill"
+    archived = history_path.with_name(f"{history_path.stem}.{tag}.jsonl")
+    tmp = history_path.with_name(history_path.name + ".tmp")
+    # appenders wait here instead of writing to the file that is being archived
+    with history_lock(history_path):
+        size = history_path.stat().st_size
+        if size < source_offset:
+            raise RuntimeError(f"{history_path} shrank since the backfill read it; re-run the backfill")
+        # copy, so the version file stays and version numbers keep increasing
+        shutil.copyfile(new_version, tmp)
+        with tmp.open("a", encoding="utf-8") as f:
+            for line, _ in _results(_lines(history_path, source_offset, size), workers=1):
+                if line is not None:
+                    f.write(line + "\n")
+        os.replace(history_path, archived)
+        os.replace(tmp, history_path)
+        rebuild_rollups(history_path)
+    return archived
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-score deal history with the current rules")
+    parser.add_argument("--history", type=Path, default=None)
+    parser.add_argument("--namespace", default=None)
+    parser.add_argument("--workers", type=int, default=0, help="process pool size (default: CPU count)")
+    parser.add_argument("--out", type=Path, default=None, help="new version path (default: next .v<N>.jsonl)")
+    parser.add_argument("--promote", action="store_true", help="make the new version the active history")
+    args = parser.parse_args(argv)
+
+    history = args.history or namespace_path(args.namespace)
+    if not history.exists():
+        print(f"no history at {history}")
+        return 1
+
+    report = backfill(history, args.workers, args.out)
+    print(f"rescored={report['rescored']} skipped(no payloads)={report['skipped_no_payloads']} "
+          f"score_changed={report['score_changed']} recommendation_changed={report['recommendation_changed']}")
+    for t, n in sorted(report["transitions"].items()):
+        print(f"  {t}: {n}")
+    print(f"new version: {report['version']}\ndiff report: {report['report']}")
+
+    if args.promote:
+        archived = promote(history, Path(report["version"]), report["source_offset"])
+        print(f"promoted; previous history archived as {archived}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
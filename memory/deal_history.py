@@ -1,26 +1,160 @@
 from __future__ import annotations
 import json
+import re
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process lock only
+    fcntl = None
 
 DEFAULT_PATH = Path("memory/deal_history.jsonl")
 
-def load_history(path: Path = DEFAULT_PATH) -> List[Dict[str, Any]]:
+# Tenant / business-unit namespaces are physically separate shards:
+#   default -> memory/deal_history.jsonl (pre-namespace location)
+#   <ns>    -> memory/history/<ns>/deal_history.jsonl
+DEFAULT_NAMESPACE = "default"
+HISTORY_ROOT = Path("memory/history")
+
+_NAMESPACE_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+def namespace_path(namespace: Optional[str] = None, root: Optional[Path] = None) -> Path:
+    namespace = namespace or DEFAULT_NAMESPACE
+    if not _NAMESPACE_RE.match(namespace):
+        raise ValueError(f"invalid history namespace {namespace!r}")
+    if namespace == DEFAULT_NAMESPACE:
+        return DEFAULT_PATH
+    return (root or HISTORY_ROOT) / namespace / DEFAULT_PATH.name
+
+def history_path(namespace: Optional[str] = None, paths: Optional[Dict[str, str]] = None) -> Path:
+    """The namespace's history file; `paths` (state["history_paths"]) overrides the cwd-relative default."""
+    pinned = (paths or {}).get(namespace or DEFAULT_NAMESPACE)
+    return Path(pinned) if pinned else namespace_path(namespace)
+
+def resolve_history_paths(namespaces: Iterable[str]) -> Dict[str, str]:
+    """Absolute history file per namespace, resolved against this process' working directory."""
+    return {ns: str(namespace_path(ns).resolve()) for ns in namespaces}
+
+def list_namespaces(root: Optional[Path] = None) -> List[str]:
+    root = root or HISTORY_ROOT
+    found = [DEFAULT_NAMESPACE] if DEFAULT_PATH.exists() else []
+    if root.exists():
+        found += sorted(p.parent.name for p in root.glob(f"*/{DEFAULT_PATH.name}"))
+    return found
+
+def parse_namespaces(value: Optional[Iterable[str] | str]) -> List[str]:
+    """'a,b' / ['a', 'b'] / None -> validated, de-duplicated namespace list"""
+    if not value:
+        return [DEFAULT_NAMESPACE]
+    if isinstance(value, str):
+        value = value.split(",")
+    out: List[str] = []
+    for ns in value:
+        ns = ns.strip()
+        if ns and ns not in out:
+            namespace_path(ns)  # validates
+            out.append(ns)
+    return out or [DEFAULT_NAMESPACE]
+
+def iter_history(
+    path: Path = DEFAULT_PATH,
+    keep: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Lazily yield snapshots (one line in memory at a time), optionally pre-filtered."""
     if not path.exists():
-        return []
-    items: List[Dict[str, Any]] = []
+        return
     with path.open("r", encoding="utf-8") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
             try:
-                items.append(json.loads(line))
+                item = json.loads(line)
             except Exception:
                 continue
-    return items
+            if keep is None or keep(item):
+                yield item
+
+def load_history(path: Path = DEFAULT_PATH) -> List[Dict[str, Any]]:
+    return list(iter_history(path))
+
+def snapshot_filter(filters: Optional[Dict[str, Any]]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """
+    Pre-filter for precedent scans:
+      recommendations: ["REJECT", ...]   keep only these recommendations
+      since / until:   ISO dates / timestamps, compared against created_at
+    Snapshots without created_at are dropped when a date bound is set.
+    """
+    if not filters:
+        return None
+    recs = set(filters.get("recommendations") or []) or None
+    since = filters.get("since")
+    until = filters.get("until")
+    if recs is None and not since and not until:
+        return None
+
+    def keep(item: Dict[str, Any]) -> bool:
+        if recs is not None and item.get("recommendation") not in recs:
+            return False
+        if since or until:
+            created = item.get("created_at")
+            if not isinstance(created, str):
+                return False
+            # ISO-8601 strings order lexicographically; a bare date covers the whole day
+            if since and created < since:
+                return False
+            if until and created[:len(until)] > until:
+                return False
+        return True
+
+    return keep
+
+_lock = threading.RLock()
+_held = threading.local()
+
+@contextmanager
+def history_lock(path: Path) -> Iterator[None]:
+    """
+    Exclusive writer lock of one history file (appends, rollup syncs, backfill
+    promotion), across threads (lock) and processes (flock on <history>.lock).
+    Re-entrant within a thread.
+    """
+    key = str(path)
+    with _lock:
+        held = _held.__dict__.setdefault("paths", set())
+        if key in held:
+            yield
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_name(path.name + ".lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            held.add(key)
+            try:
+                yield
+            finally:
+                held.discard(key)
+
+def append_snapshot(
+    snapshot: Dict[str, Any],
+    path: Optional[Path] = None,
+    update_rollups: bool = True,
+    namespace: Optional[str] = None,
+) -> None:
+    path = path or namespace_path(namespace)
+    with history_lock(path):
+        # under the lock: a backfill promotion can't swap the file out from under the write
+        with path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+        # cached precedent rankings the new record can enter are patched in place
+        from memory.precedent_cache import cache
+
+        cache.refresh(path)
+        if update_rollups:
+            # folds only the lines appended since the last sync (memory/rollups.py)
+            from memory.rollups import sync_rollups
 
-def append_snapshot(snapshot: Dict[str, Any], path: Path = DEFAULT_PATH) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+            sync_rollups(path)
@@ -0,0 +1,247 @@
+# memory/policy_sim.py
+"""
+Vectorized what-if simulator for the judge decision policy.
+
+History is loaded once into columns (one entry per deal):
+
+    risk_score, core_high (High items in CORE_CATEGORIES), high_liability,
+    high_termination, insufficient (no risk items / short deal text)
+
+Candidate policies are rows of a parameter matrix with the same fields as
+agents.judge_agent.DEFAULT_POLICY. `simulate()` evaluates every policy
+against every distinct deal profile (identical inputs are evaluated once,
+weighted by count) with NumPy broadcasting, in policy chunks to bound
+memory. Per policy it returns the recommendation mix and a 3x3 flip matrix:
+rows = baseline recommendation, columns = simulated one.
+
+    python -m memory.policy_sim --reject-score 50:70:5 --edits-score 20:40:5 \\
+        --reject-core-high 1,2,3 --top 10
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from agents.judge_agent import CORE_CATEGORIES, DEFAULT_POLICY, INSUFFICIENT_DETAIL_CHARS
+from memory.deal_history import load_history, namespace_path
+
+RECOMMENDATIONS = ("APPROVE", "APPROVE_WITH_EDITS", "REJECT")
+_CODE = {r: i for i, r in enumerate(RECOMMENDATIONS)}
+_EDITS = _CODE["APPROVE_WITH_EDITS"]
+
+POLICY_FIELDS = tuple(DEFAULT_POLICY)
+# cap on policies x deals cells evaluated at once (~8 MB of int8 per array)
+MAX_CELLS = 8_000_000
+
+
+class PortfolioColumns:
+    """Columnar view of deal history for the decision policy."""
+
+    def __init__(self, deal_ids: List[Any], risk_score: np.ndarray, core_high: np.ndarray,
+                 high_liability: np.ndarray, high_termination: np.ndarray,
+                 insufficient: np.ndarray, stored: np.ndarray):
+        self.deal_ids = deal_ids
+        self.risk_score = risk_score
+        self.core_high = core_high
+        self.high_liability = high_liability
+        self.high_termination = high_termination
+        self.insufficient = insufficient
+        self.stored = stored          # recommendation saved in history (-1 if unknown)
+
+    def __len__(self) -> int:
+        return len(self.deal_ids)
+
+    @classmethod
+    def from_history(cls, history: Iterable[Dict[str, Any]]) -> "PortfolioColumns":
+        ids, score, core, liab, term, insuff, stored = [], [], [], [], [], [], []
+        for snap in history:
+            items = snap.get("risk_items") or []
+            if not items:
+                # older snapshots: one pseudo-item per category of the vector
+                items = [{"category": c, "severity": s} for c, s in (snap.get("risk_vector") or {}).items()]
+            highs = [r.get("category") for r in items if isinstance(r, dict) and r.get("severity") == "High"]
+            text = (snap.get("raw_payloads") or {}).get("deal_text")
+
+            ids.append(snap.get("deal_id"))
+            score.append(float(snap.get("risk_score", 0.0) or 0.0))
+            core.append(sum(1 for c in highs if c in CORE_CATEGORIES))
+            liab.append("Liability" in highs)
+            term.append("Termination" in highs)
+            # deal text is only known for snapshots with retained payloads
+            insuff.append(not items or (text is not None and len(text) < INSUFFICIENT_DETAIL_CHARS))
+            stored.append(_CODE.get(snap.get("recommendation"), -1))
+        return cls(
+            ids,
+            np.asarray(score, dtype=np.float64),
+            np.asarray(core, dtype=np.int32),
+            np.asarray(liab, dtype=bool),
+            np.asarray(term, dtype=bool),
+            np.asarray(insuff, dtype=bool),
+            np.asarray(stored, dtype=np.int8),
+        )
+
+
+def policy_matrix(policies: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """policies (dicts, missing fields = DEFAULT_POLICY) -> float array (P, len(POLICY_FIELDS))"""
+    rows = [[float({**DEFAULT_POLICY, **p}[f]) for f in POLICY_FIELDS] for p in policies]
+    return np.asarray(rows, dtype=np.float64).reshape(len(rows), len(POLICY_FIELDS))
+
+
+def policy_grid(**ranges: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Cartesian product of per-field value lists; other fields stay at the default."""
+    unknown = set(ranges) - set(POLICY_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown policy fields: {sorted(unknown)}")
+    names = list(ranges)
+    return [{**DEFAULT_POLICY, **dict(zip(names, combo))} for combo in itertools.product(*ranges.values())]
+
+
+def decide(cols: PortfolioColumns, params: np.ndarray) -> np.ndarray:
+    """Recommendation codes, shape (P, N), for a (P, F) parameter block."""
+    p = {f: params[:, i:i + 1] for i, f in enumerate(POLICY_FIELDS)}
+    score = cols.risk_score[None, :]
+    core = cols.core_high[None, :]
+
+    reject = (
+        (score >= p["reject_score"])
+        | (core >= p["reject_core_high"])
+        | (cols.high_liability[None, :] & (p["reject_high_liability"] > 0))
+        | (cols.high_termination[None, :] & (p["reject_high_termination"] > 0))
+    )
+    edits = (score >= p["edits_score"]) | (core >= p["edits_core_high"])
+    codes = np.where(reject, _CODE["REJECT"], np.where(edits, _EDITS, _CODE["APPROVE"])).astype(np.int8)
+    # the insufficient-detail guardrail precedes the policy
+    codes[:, cols.insufficient] = _EDITS
+    return codes
+
+
+def _flip_counts(baseline: np.ndarray, codes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """(P, 3, 3) weighted counts of baseline -> simulated per policy, one bincount for the block."""
+    n_pol = codes.shape[0]
+    k = len(RECOMMENDATIONS)
+    known = baseline >= 0
+    cell = baseline[None, known].astype(np.int64) * k + codes[:, known]
+    cell += (np.arange(n_pol, dtype=np.int64) * k * k)[:, None]
+    w = np.broadcast_to(weights[None, known], cell.shape)
+    return np.bincount(cell.ravel(), weights=w.ravel(), minlength=n_pol * k * k).reshape(n_pol, k, k)
+
+
+def _distinct(cols: PortfolioColumns, base: np.ndarray) -> tuple:
+    """
+    Deals with identical policy inputs (and baseline) always get identical
+    decisions: evaluate each distinct row once, weighted by its count.
+    """
+    keys = np.column_stack([
+        cols.risk_score, cols.core_high, cols.high_liability,
+        cols.high_termination, cols.insufficient, base,
+    ]) if len(cols) else np.zeros((0, 6))
+    uniq, counts = np.unique(keys, axis=0, return_counts=True)
+    distinct = PortfolioColumns(
+        [None] * len(uniq),
+        uniq[:, 0],
+        uniq[:, 1].astype(np.int32),
+        uniq[:, 2].astype(bool),
+        uniq[:, 3].astype(bool),
+        uniq[:, 4].astype(bool),
+        uniq[:, 5].astype(np.int8),
+    )
+    return distinct, distinct.stored, counts.astype(np.float64)
+
+
+def simulate(
+    cols: PortfolioColumns,
+    policies: Sequence[Dict[str, Any]],
+    baseline: str = "default",
+) -> Dict[str, Any]:
+    """
+    baseline: "default" (DEFAULT_POLICY re-applied to the columns) or
+    "stored" (recommendations saved in history).
+    Returns flips (P, 3, 3), mix (P, 3) and changed (P,) arrays.
+    """
+    if baseline == "stored":
+        base = cols.stored
+    else:
+        base = decide(cols, policy_matrix([DEFAULT_POLICY]))[0]
+    rows, base, weights = _distinct(cols, base)
+
+    params = policy_matrix(policies)
+    step = max(1, MAX_CELLS // max(1, len(rows)))
+    flips = np.zeros((len(params), len(RECOMMENDATIONS), len(RECOMMENDATIONS)), dtype=np.int64)
+    for start in range(0, len(params), step):
+        block = decide(rows, params[start:start + step])
+        flips[start:start + step] = _flip_counts(base, block, weights)
+
+    diagonal = np.trace(flips, axis1=1, axis2=2)
+    return {
+        "policies": list(policies),
+        "flips": flips,
+        "mix": flips.sum(axis=1),
+        "changed": flips.sum(axis=(1, 2)) - diagonal,
+        "baseline": baseline,
+        "deals": len(cols),
+        "distinct_rows": len(rows),
+    }
+
+
+def _parse_values(spec: str) -> List[float]:
+    """'50:70:5' (inclusive range) or '1,2,3' or 'true,false'"""
+    if ":" in spec:
+        lo, hi, step = (float(x) for x in spec.split(":"))
+        return [float(v) for v in np.arange(lo, hi + step / 2, step)]
+    out = []
+    for v in spec.split(","):
+        v = v.strip().lower()
+        out.append(1.0 if v == "true" else 0.0 if v == "false" else float(v))
+    return out
+
+
+def _format_flips(flips: np.ndarray) -> str:
+    short = ["APPROVE", "EDITS", "REJECT"]
+    lines = ["            " + " ".join(f"{s:>8}" for s in short)]
+    for i, row in enumerate(flips):
+        lines.append(f"  {short[i]:>8}  " + " ".join(f"{int(v):>8}" for v in row))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="What-if simulation of judge policy thresholds over history")
+    parser.add_argument("--history", type=Path, default=None)
+    parser.add_argument("--namespace", default=None)
+    for field in POLICY_FIELDS:
+        parser.add_argument("--" + field.replace("_", "-"), default=None,
+                            help=f"values for {field} (default {DEFAULT_POLICY[field]}); 'lo:hi:step' or 'a,b'")
+    parser.add_argument("--baseline", choices=["default", "stored"], default="default")
+    parser.add_argument("--top", type=int, default=10, help="show the N policies with the most flips")
+    parser.add_argument("--json", type=Path, default=None, help="write every policy's flips here")
+    args = parser.parse_args(argv)
+
+    cols = PortfolioColumns.from_history(load_history(args.history or namespace_path(args.namespace)))
+    ranges = {f: _parse_values(getattr(args, f)) for f in POLICY_FIELDS if getattr(args, f) is not None}
+    policies = policy_grid(**ranges) if ranges else [dict(DEFAULT_POLICY)]
+    result = simulate(cols, policies, args.baseline)
+
+    print(f"deals={result['deals']} policies={len(policies)} baseline={args.baseline}")
+    order = np.argsort(-result["changed"], kind="stable")[:args.top]
+    for i in order:
+        varied = {f: policies[i][f] for f in ranges} or policies[i]
+        print(f"\npolicy {i}: {varied}  flips={int(result['changed'][i])}")
+        print(_format_flips(result["flips"][i]))
+
+    if args.json:
+        with args.json.open("w", encoding="utf-8") as f:
+            json.dump([
+                {"policy": policies[i], "changed": int(result["changed"][i]),
+                 "mix": dict(zip(RECOMMENDATIONS, map(int, result["mix"][i]))),
+                 "flips": result["flips"][i].tolist()}
+                for i in range(len(policies))
+            ], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,306 @@
+# memory/precedent_cache.py
+"""
+Top-K precedent results cached by risk-vector signature.
+
+Risk vectors take values from a handful of categories x 3 severities, so
+many deals share an identical vector, and a vector-mode precedent scan
+(agents/precedent_agent.py) of the same shard with the same vector, K and
+filters always returns the same ranking. Results are cached per history
+file under the canonical signature (sorted category:severity pairs); for
+the common vectors a lookup is a dictionary hit instead of a shard scan.
+
+Like memory/rollups.py, every cached shard remembers the byte offset of
+history its results cover. Before a lookup, and from `append_snapshot`, only
+the lines written past that offset are read and each is patched into the
+cached rankings it can enter (score above the current K-th, or fewer than K
+results), so appends, including those of other processes (CLI runs next to
+the warm daemon), keep the cache exact without a rescan. A history file
+that shrank or was replaced (backfill promote, rewrites) drops its entries.
+
+Text-mode scans (the fallback when a deal has no risk vector) rank by token
+Jaccard, and there tokenizing every snapshot dominates. `ranked_text` keeps
+each shard's snapshot texts encoded once (memory.similarity.Vocabulary ids,
+stored back to back with each line's byte offset) under the same
+inode / offset bookkeeping: appended lines are encoded on the next lookup, a
+replaced or shrunk file is re-encoded. A lookup is one vectorized
+`jaccard_flat` pass; only the lines that make the top-k (and pass the
+filters) are read back from disk.
+
+    DEALGRAPH_PRECEDENT_CACHE=1024   max cached rankings per process (0 = off,
+                                     text indexes too)
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 1024
+
+Ranking = List[Tuple[float, Dict[str, Any]]]
+Signature = Tuple[Tuple[str, str], ...]
+
+
+def vector_signature(vec: Dict[str, str]) -> Signature:
+    return tuple(sorted((str(k), str(v)) for k, v in (vec or {}).items()))
+
+
+def _filters_key(filters: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(filters or {}, sort_keys=True, default=str)
+
+
+def _file_state(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_size
+
+
+class _Entry:
+    __slots__ = ("query", "k", "keep", "score", "ranked")
+
+    def __init__(self, query: Dict[str, str], k: int, keep: Optional[Callable], score: Callable, ranked: Ranking):
+        self.query = query
+        self.k = k
+        self.keep = keep
+        self.score = score
+        self.ranked = ranked
+
+    def patch(self, item: Dict[str, Any]) -> bool:
+        """Fold one appended snapshot in; True when it entered the top-K."""
+        if self.keep is not None and not self.keep(item):
+            return False
+        s = self.score(self.query, item.get("risk_vector", {}) or {})
+        if s <= 0 or (len(self.ranked) >= self.k and s <= self.ranked[-1][0]):
+            return False
+        # later records lose ties, like the streaming scan
+        pos = len(self.ranked)
+        while pos > 0 and self.ranked[pos - 1][0] < s:
+            pos -= 1
+        self.ranked.insert(pos, (s, item))
+        del self.ranked[self.k:]
+        return True
+
+
+class _TextIndex:
+    """Encoded snapshot text of one shard: token ids back to back, per-line sizes and byte offsets."""
+
+    __slots__ = ("vocab", "flat", "sizes", "offsets", "covered")
+
+    def __init__(self, inode: int):
+        from memory.similarity import Vocabulary
+
+        self.vocab = Vocabulary()
+        self.flat = array("i")
+        self.sizes = array("i")
+        self.offsets = array("q")
+        self.covered = (inode, 0)
+
+    def extend(self, path: Path, to_text: Callable[[Dict[str, Any]], str]) -> int:
+        """Encode the lines past the covered offset; returns how many were added."""
+        inode, offset = self.covered
+        added = 0
+        with path.open("rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # a writer is mid-line; picked up on the next lookup
+                start, offset = offset, offset + len(raw)
+                if not raw.strip():
+                    continue
+                try:
+                    item = json.loads(raw)
+                except ValueError:
+                    continue
+                ids = self.vocab.encode(to_text(item))
+                self.flat.extend(ids)
+                self.sizes.append(len(ids))
+                self.offsets.append(start)
+                added += 1
+        self.covered = (inode, offset)
+        return added
+
+
+class PrecedentCache:
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = (
+            int(os.getenv("DEALGRAPH_PRECEDENT_CACHE", DEFAULT_MAX_ENTRIES)) if max_entries is None else max_entries
+        )
+        self._lock = threading.Lock()
+        # history path -> (inode, byte offset covered)
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._entries: "OrderedDict[Tuple[str, Signature, int, str], _Entry]" = OrderedDict()
+        self._texts: Dict[str, _TextIndex] = {}
+        self.stats = {"hits": 0, "misses": 0, "patched": 0, "invalidated": 0,
+                      "text_lookups": 0, "text_encoded": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _drop(self, key: str) -> None:
+        self._files.pop(key, None)
+        stale = [k for k in self._entries if k[0] == key]
+        for k in stale:
+            del self._entries[k]
+        self.stats["invalidated"] += len(stale)
+
+    def _refresh(self, path: Path) -> None:
+        """Fold the unseen tail of `path` into its cached rankings (lock held)."""
+        key = str(path)
+        covered = self._files.get(key)
+        if covered is None:
+            return
+        state = _file_state(path)
+        if state is None or state[0] != covered[0] or state[1] < covered[1]:
+            self._drop(key)
+            return
+        if state[1] == covered[1]:
+            return
+        entries = [e for k, e in self._entries.items() if k[0] == key]
+        offset = covered[1]
+        with path.open("rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # a writer is mid-line; picked up on the next refresh
+                offset += len(raw)
+                try:
+                    item = json.loads(raw)
+                except ValueError:
+                    continue
+                for e in entries:
+                    self.stats["patched"] += e.patch(item)
+        self._files[key] = (covered[0], offset)
+
+    def refresh(self, path: Path) -> None:
+        with self._lock:
+            self._refresh(path)
+
+    def ranked(
+        self,
+        path: Path,
+        query: Dict[str, str],
+        k: int,
+        filters: Optional[Dict[str, Any]],
+        keep: Optional[Callable],
+        score: Callable,
+        scan: Callable[[], Ranking],
+    ) -> Ranking:
+        """Cached top-k of `path` for this vector / k / filters; `scan()` on a miss."""
+        if not self.enabled:
+            return scan()
+        key = (str(path), vector_signature(query), k, _filters_key(filters))
+        with self._lock:
+            self._refresh(path)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return list(entry.ranked)
+            self.stats["misses"] += 1
+
+        before = _file_state(path)
+        ranked = scan()
+        # only cache a scan that saw a stable, newline-terminated file
+        if before is None or _file_state(path) != before or not _ends_with_newline(path, before[1]):
+            return ranked
+        with self._lock:
+            covered = self._files.get(str(path))
+            if covered is not None and covered != before:
+                return ranked  # other entries cover a different offset; next miss re-aligns
+            self._files[str(path)] = before
+            self._entries[key] = _Entry(dict(query), k, keep, score, list(ranked))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return ranked
+
+    def _text_index(self, path: Path, to_text: Callable[[Dict[str, Any]], str]) -> Optional[_TextIndex]:
+        """The shard's text index, brought up to the current end of file (lock held)."""
+        key = str(path)
+        state = _file_state(path)
+        if state is None:
+            self._texts.pop(key, None)
+            return None
+        index = self._texts.get(key)
+        if index is None or index.covered[0] != state[0] or state[1] < index.covered[1]:
+            index = self._texts[key] = _TextIndex(state[0])
+        if state[1] > index.covered[1]:
+            self.stats["text_encoded"] += index.extend(path, to_text)
+        return index
+
+    def ranked_text(
+        self,
+        path: Path,
+        query: str,
+        k: int,
+        keep: Optional[Callable],
+        to_text: Callable[[Dict[str, Any]], str],
+        scan: Callable[[], Ranking],
+    ) -> Ranking:
+        """Top-k of `path` by token Jaccard against `query` over the cached encodings; `scan()` when off."""
+        if not self.enabled:
+            return scan()
+        import numpy as np
+
+        from memory.similarity import jaccard_flat
+
+        with self._lock:
+            index = self._text_index(path, to_text)
+            if index is None:
+                return []
+            self.stats["text_lookups"] += 1
+            ids, size = index.vocab.lookup(query)
+            scores = jaccard_flat(ids, size, index.flat, index.sizes, len(index.vocab))
+            offsets = index.offsets[:]
+            inode = index.covered[0]
+        # best first, ties in file order (same as the streaming top_k)
+        order = np.argsort(-scores, kind="stable")
+        out: Ranking = []
+        try:
+            with path.open("rb") as f:
+                if os.fstat(f.fileno()).st_ino != inode:
+                    return scan()  # replaced since it was indexed
+                for i in order:
+                    score = float(scores[i])
+                    if score <= 0 or len(out) >= k:
+                        break
+                    f.seek(offsets[i])
+                    item = json.loads(f.readline())
+                    if keep is None or keep(item):
+                        out.append((score, item))
+        except (FileNotFoundError, ValueError):
+            return scan()
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._entries.clear()
+            self._texts.clear()
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "max_entries": self.max_entries,
+                    "text_indexes": len(self._texts)}
+
+
+def _ends_with_newline(path: Path, size: int) -> bool:
+    if size == 0:
+        return True
+    with path.open("rb") as f:
+        f.seek(size - 1)
+        return f.read(1) == b"\n"
+
+
+cache = PrecedentCache()
+
+
+def precedent_cache_stats() -> Dict[str, Any]:
+    return cache.snapshot()
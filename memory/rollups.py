@@ -0,0 +1,262 @@
+# memory/rollups.py
+"""
+Portfolio rollups over deal history, maintained incrementally.
+
+The aggregates live next to the history file (deal_history.jsonl ->
+deal_history.rollups.json) together with the byte offset of history they
+cover. `append_snapshot` calls `sync_rollups`, which folds only the lines
+written after that offset, so keeping rollups current costs O(new snapshots)
+and reading them never touches the history. Syncs hold the history's writer
+lock (memory.deal_history.history_lock), so concurrent appenders (batch
+workers, CLI runs next to the daemon) neither lose nor double-count updates.
+
+Per bucket (all-time totals + one bucket per month of `created_at`):
+deals, risk_score sum/min/max, LLM calls and spend (snapshot "usage"), and
+counts per recommendation, severity, direction, category, and
+severity/direction per category.
+
+    python -m memory.rollups show [--namespace acme] [--period 2026-10] [--json]
+    python -m memory.rollups rebuild
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from memory.deal_history import DEFAULT_PATH, history_lock, namespace_path
+
+ROLLUP_VERSION = 2
+UNKNOWN_PERIOD = "unknown"
+
+
+def rollup_path(history_path: Path = DEFAULT_PATH) -> Path:
+    return history_path.with_name(history_path.stem + ".rollups.json")
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {
+        "deals": 0,
+        "degraded": 0,
+        "risk_score_sum": 0.0,
+        "risk_score_min": None,
+        "risk_score_max": None,
+        "llm_calls": 0,
+        "cost_usd": 0.0,
+        "recommendation": {},
+        "severity": {},
+        "direction": {},
+        "category": {},
+        "category_severity": {},
+        "category_direction": {},
+    }
+
+
+def _empty_rollups() -> Dict[str, Any]:
+    return {"version": ROLLUP_VERSION, "history_offset": 0, "snapshots": 0,
+            "totals": _empty_bucket(), "periods": {}}
+
+
+def _bump(counts: Dict[str, Any], key: Any, n: int = 1) -> None:
+    key = str(key) if key is not None else "unknown"
+    counts[key] = counts.get(key, 0) + n
+
+
+def period_of(snapshot: Dict[str, Any]) -> str:
+    created = snapshot.get("created_at")
+    # ISO-8601 timestamps: the month is the first 7 characters
+    return created[:7] if isinstance(created, str) and len(created) >= 7 else UNKNOWN_PERIOD
+
+
+def _fold_bucket(bucket: Dict[str, Any], snapshot: Dict[str, Any]) -> None:
+    score = float(snapshot.get("risk_score", 0.0) or 0.0)
+    bucket["deals"] += 1
+    bucket["degraded"] += 1 if snapshot.get("degraded") else 0
+    bucket["risk_score_sum"] = round(bucket["risk_score_sum"] + score, 6)
+    lo, hi = bucket["risk_score_min"], bucket["risk_score_max"]
+    bucket["risk_score_min"] = score if lo is None else min(lo, score)
+    bucket["risk_score_max"] = score if hi is None else max(hi, score)
+    _bump(bucket["recommendation"], snapshot.get("recommendation"))
+    usage = snapshot.get("usage") or {}
+    bucket["llm_calls"] += int(usage.get("calls", 0) or 0)
+    bucket["cost_usd"] = round(bucket["cost_usd"] + float(usage.get("cost_usd", 0.0) or 0.0), 8)
+
+    items = snapshot.get("risk_items") or []
+    if not items:
+        # older snapshots: fall back to the category -> severity vector
+        items = [{"category": c, "severity": s} for c, s in (snapshot.get("risk_vector") or {}).items()]
+    for r in items:
+        if not isinstance(r, dict):
+            continue
+        cat, sev, direction = r.get("category"), r.get("severity"), r.get("direction")
+        _bump(bucket["category"], cat)
+        _bump(bucket["severity"], sev)
+        _bump(bucket["category_severity"].setdefault(str(cat), {}), sev)
+        if direction:
+            _bump(bucket["direction"], direction)
+            _bump(bucket["category_direction"].setdefault(str(cat), {}), direction)
+
+
+def fold_snapshot(rollups: Dict[str, Any], snapshot: Dict[str, Any]) -> None:
+    rollups["snapshots"] += 1
+    _fold_bucket(rollups["totals"], snapshot)
+    _fold_bucket(rollups["periods"].setdefault(period_of(snapshot), _empty_bucket()), snapshot)
+
+
+def load_rollups(history_path: Path = DEFAULT_PATH) -> Dict[str, Any]:
+    path = rollup_path(history_path)
+    if not path.exists():
+        return _empty_rollups()
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return _empty_rollups()
+    if data.get("version") != ROLLUP_VERSION:
+        return _empty_rollups()
+    return data
+
+
+def save_rollups(rollups: Dict[str, Any], history_path: Path = DEFAULT_PATH) -> None:
+    path = rollup_path(history_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent,
+                                     prefix=path.name + ".", suffix=".tmp", delete=False) as f:
+        json.dump(rollups, f, ensure_ascii=False, sort_keys=True)
+    # readers never see a half-written file
+    os.replace(f.name, path)
+
+
+def _fold_from(rollups: Dict[str, Any], history_path: Path) -> None:
+    with history_path.open("rb") as f:
+        f.seek(rollups["history_offset"])
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # a writer is mid-line; pick it up on the next sync
+            rollups["history_offset"] += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                fold_snapshot(rollups, json.loads(line))
+            except ValueError:
+                continue
+
+
+def sync_rollups(history_path: Path = DEFAULT_PATH) -> Dict[str, Any]:
+    """
+    Bring the persisted rollups up to date with the history file by folding
+    only the unseen tail. A history that shrank (rewritten/truncated) is
+    rebuilt from scratch.
+    """
+    with history_lock(history_path):
+        rollups = load_rollups(history_path)
+        size = history_path.stat().st_size if history_path.exists() else 0
+        if size < rollups["history_offset"]:
+            rollups = _empty_rollups()
+        if size == rollups["history_offset"] and rollup_path(history_path).exists():
+            return rollups
+        if size:
+            _fold_from(rollups, history_path)
+        save_rollups(rollups, history_path)
+        return rollups
+
+
+def rebuild_rollups(history_path: Path = DEFAULT_PATH) -> Dict[str, Any]:
+    with history_lock(history_path):
+        rollups = _empty_rollups()
+        if history_path.exists():
+            _fold_from(rollups, history_path)
+        save_rollups(rollups, history_path)
+        return rollups
+
+
+def _shares(counts: Dict[str, int]) -> Dict[str, float]:
+    total = sum(counts.values())
+    return {k: round(v / total, 4) for k, v in sorted(counts.items())} if total else {}
+
+
+def summarize(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    deals = bucket["deals"]
+    return {
+        "deals": deals,
+        "degraded": bucket["degraded"],
+        "avg_risk_score": round(bucket["risk_score_sum"] / deals, 2) if deals else None,
+        "min_risk_score": bucket["risk_score_min"],
+        "max_risk_score": bucket["risk_score_max"],
+        "llm_calls": bucket["llm_calls"],
+        "cost_usd": bucket["cost_usd"],
+        "avg_cost_usd": round(bucket["cost_usd"] / deals, 8) if deals else None,
+        "recommendation_counts": dict(bucket["recommendation"]),
+        "recommendation_mix": _shares(bucket["recommendation"]),
+        "severity": dict(bucket["severity"]),
+        "direction": dict(bucket["direction"]),
+        "category": dict(bucket["category"]),
+        "severity_by_category": {c: dict(v) for c, v in bucket["category_severity"].items()},
+        "direction_by_category": {c: dict(v) for c, v in bucket["category_direction"].items()},
+    }
+
+
+def portfolio_summary(
+    period: Optional[str] = None,
+    history_path: Path = DEFAULT_PATH,
+    sync: bool = True,
+) -> Dict[str, Any]:
+    """
+    Rollup summary for all deals (period=None) or one month ("YYYY-MM").
+    Reads only the rollup file (plus any unsynced history tail).
+    """
+    rollups = sync_rollups(history_path) if sync else load_rollups(history_path)
+    if period is None:
+        bucket = rollups["totals"]
+    else:
+        bucket = rollups["periods"].get(period) or _empty_bucket()
+    out = summarize(bucket)
+    out["period"] = period or "all"
+    return out
+
+
+def list_periods(history_path: Path = DEFAULT_PATH) -> List[str]:
+    return sorted(load_rollups(history_path)["periods"])
+
+
+def _print_summary(s: Dict[str, Any]) -> None:
+    print(f"period={s['period']} deals={s['deals']} avg_risk_score={s['avg_risk_score']} "
+          f"degraded={s['degraded']} cost_usd={s['cost_usd']:.4f}")
+    print("recommendation mix: " + ", ".join(f"{k}={v:.0%}" for k, v in s["recommendation_mix"].items()))
+    for cat, sevs in sorted(s["severity_by_category"].items()):
+        print(f"  {cat:<16} " + " ".join(f"{k}:{v}" for k, v in sorted(sevs.items())))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="DealGraph portfolio rollups")
+    parser.add_argument("command", choices=["show", "rebuild", "periods"])
+    parser.add_argument("--history", type=Path, default=None)
+    parser.add_argument("--namespace", default=None, help="history shard (default: the default namespace)")
+    parser.add_argument("--period", default=None, help="month bucket, e.g. 2026-10")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+    args.history = args.history or namespace_path(args.namespace)
+
+    if args.command == "rebuild":
+        rollups = rebuild_rollups(args.history)
+        print(f"rebuilt {rollup_path(args.history)} from {rollups['snapshots']} snapshot(s)")
+        return 0
+    if args.command == "periods":
+        sync_rollups(args.history)
+        print("\n".join(list_periods(args.history)))
+        return 0
+
+    summary = portfolio_summary(args.period, args.history)
+    if args.json:
+        print(json.dumps(summary, indent=2, sort_keys=True))
+    else:
+        _print_summary(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
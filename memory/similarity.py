@@ -1,6 +1,7 @@
 from __future__ import annotations
 import re
-from typing import Set
+from array import array
+from typing import Any, Dict, Iterable, List, Set, Tuple, Union
 
 _STOP = {
     "the","and","or","to","of","in","for","a","an","is","are","be","with","by",
@@ -21,3 +22,80 @@ def jaccard(a: str, b: str) -> float:
     inter = len(A & B)
     union = len(A | B)
     return inter / union if union else 0.0
+
+# -------------------------
+# Batch kernel
+# -------------------------
+# `jaccard` re-tokenizes both sides and builds two sets per pair. For one
+# query against many records, `jaccard_many` tokenizes the query once, interns
+# tokens into integer ids (Vocabulary) and keeps each record's token set as a
+# sorted C-int array (4 bytes per token). A batch is scored in one vectorized
+# pass: candidate ids are concatenated, looked up in the query's membership
+# mask, and per-record intersection counts fall out of a prefix sum;
+# union = |query| + |record| - intersection. Scores equal `jaccard`'s.
+# `jaccard_flat` is the kernel over sets already stored back to back (the
+# precedent cache keeps each shard's encoded text that way).
+
+TokenSet = array  # array("i"): sorted, unique token ids
+
+class Vocabulary:
+    """Token -> dense int id. Encoded token sets are only comparable within one vocabulary."""
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def encode(self, text: str) -> TokenSet:
+        ids = self._ids
+        return array("i", sorted(ids.setdefault(t, len(ids)) for t in tokenize(text)))
+
+    def lookup(self, text: str) -> Tuple[TokenSet, int]:
+        """(ids of the tokens already in the vocabulary, token count of `text`); the vocabulary doesn't grow."""
+        toks = tokenize(text)
+        ids = self._ids
+        return array("i", sorted(ids[t] for t in toks if t in ids)), len(toks)
+
+def jaccard_flat(query: TokenSet, query_size: int, flat: TokenSet, sizes: array, vocab_size: int) -> Any:
+    """
+    Scores (numpy float array) of `query` against token sets stored back to
+    back in `flat`, `sizes[i]` ids each. query_size counts query tokens
+    missing from the vocabulary too (they only add to the union).
+    """
+    import numpy as np
+
+    n = len(sizes)
+    if not query_size or not n:
+        return np.zeros(n)
+    member = np.zeros(vocab_size, dtype=bool)
+    member[np.frombuffer(query, dtype=np.intc)] = True
+
+    sizes_ = np.frombuffer(sizes, dtype=np.intc).astype(np.int64)
+    ends = np.cumsum(sizes_)
+    hits = np.zeros(len(flat) + 1, dtype=np.int64)
+    np.cumsum(member[np.frombuffer(flat, dtype=np.intc)], out=hits[1:])
+    inter = hits[ends] - hits[ends - sizes_]
+    union = query_size + sizes_ - inter
+    return np.divide(inter, union, out=np.zeros(n), where=sizes_ > 0)
+
+def jaccard_many(
+    query: Union[str, TokenSet],
+    candidates: Iterable[Union[str, TokenSet]],
+    vocab: Union[Vocabulary, None] = None,
+) -> List[float]:
+    """
+    `jaccard(query, c)` for every candidate. Pre-encoded query / candidates
+    must come from `vocab`; strings are encoded on the fly.
+    """
+    vocab = vocab if vocab is not None else Vocabulary()
+    q = vocab.encode(query) if isinstance(query, str) else query
+    sets = [vocab.encode(c) if isinstance(c, str) else c for c in candidates]
+    if not q or not sets:
+        return [0.0] * len(sets)
+
+    flat = array("i")
+    for s in sets:
+        flat.extend(s)
+    sizes = array("i", map(len, sets))
+    return jaccard_flat(q, len(q), flat, sizes, len(vocab)).tolist()
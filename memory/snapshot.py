@@ -1,4 +1,32 @@
-from typing import Dict, Any
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from graph.normalize import retain_raw_payloads
+from graph.records import to_dicts
+from agents.usage import usage_summary
+from memory.deal_history import DEFAULT_NAMESPACE
+
+def build_summary(risk_items: List[Dict[str, Any]], risks: Dict[str, str]) -> str:
+    # summary should reflect structured risks first
+    if risk_items:
+        top = risk_items[:3]
+        summary = " | ".join([r.get("evidence", "") for r in top if isinstance(r, dict)])
+    else:
+        summary = " | ".join(list(risks.values())[:3])
+
+    if not summary:
+        summary = "Low-risk or insufficient detail deal."
+    return summary[:300]
+
+def raw_payloads(state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Deal text + raw LLM outputs, kept only when payload retention is on (memory/backfill.py)."""
+    if not retain_raw_payloads(state):
+        return None
+    return {
+        "deal_text": getattr(state.get("deal"), "raw_text", "") or "",
+        "clause": state.get("raw_clause_extraction") or state.get("clause_analysis"),
+        "risk": state.get("risk_analysis"),
+    }
 
 def build_snapshot(state: Dict[str, Any]) -> Dict[str, Any]:
     deal = state.get("deal")
@@ -11,21 +39,11 @@ def build_snapshot(state: Dict[str, Any]) -> Dict[str, Any]:
     risks = state.get("extracted_risks", {}) or {}
 
     # NEW structured outputs (Phase 2)
-    risk_items = state.get("risk_items", []) or []
+    risk_items = to_dicts(state.get("risk_items", []) or [])
     risk_vector = state.get("risk_vector", {}) or {}
     risk_score = float(state.get("risk_score", 0.0) or 0.0)
 
-    # summary should reflect structured risks first
-    if risk_items:
-        top = risk_items[:3]
-        summary = " | ".join([r.get("evidence", "") for r in top if isinstance(r, dict)])
-    else:
-        summary = " | ".join(list(risks.values())[:3])
-
-    if not summary:
-        summary = "Low-risk or insufficient detail deal."
-
-    return {
+    snapshot = {
         "deal_id": getattr(deal, "deal_id", None),
         "clauses": clauses,
         "risks": risks,
@@ -36,5 +54,19 @@ def build_snapshot(state: Dict[str, Any]) -> Dict[str, Any]:
         "risk_score": risk_score,
 
         "recommendation": state.get("recommendation"),
-        "summary": summary[:300],
+        "summary": build_summary(risk_items, risks),
+        "degraded": bool(state.get("degraded")),
+        "namespace": state.get("namespace") or DEFAULT_NAMESPACE,
+        "usage": usage_summary(state.get("llm_usage") or []),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
     }
+    views = state.get("perspective_views") or {}
+    if views:
+        # side-by-side scores only; the items behind them follow from risk_items
+        snapshot["perspectives"] = {
+            p: {k: v[k] for k in ("risk_vector", "risk_score", "recommendation")} for p, v in views.items()
+        }
+    payloads = raw_payloads(state)
+    if payloads is not None:
+        snapshot["raw_payloads"] = payloads
+    return snapshot
@@ -1,15 +1,20 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel, ConfigDict, Field
 
+from graph.records import ClauseRecord
+
 class Clause(BaseModel):
     type: str
     text: str
 
 class Deal(BaseModel):
+    # normalize stores clauses as the slotted graph.records.ClauseRecord
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     deal_id: Optional[str] = None
     raw_text: str
-    clauses: List[Clause] = Field(default_factory=list)
+    clauses: List[Union[Clause, ClauseRecord]] = Field(default_factory=list)
 
 class DealState(BaseModel):
     """
@@ -0,0 +1,12 @@
+# tests/conftest.py
+import pytest
+
+from memory.precedent_cache import cache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_precedent_cache():
+    # tests swap history sources under the same path; cached rankings must not leak
+    cache.clear()
+    yield
+    cache.clear()
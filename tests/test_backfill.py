@@ -0,0 +1,74 @@
+# tests/test_backfill.py
+from __future__ import annotations
+
+import json
+
+import graph.normalize as normalize
+from memory.backfill import backfill, promote
+from memory.deal_history import append_snapshot, load_history
+from memory.snapshot import build_snapshot
+from graph.rules_only import run_rules_only
+from schemas import Deal
+
+
+DEAL = (
+    "Customer pays $5,000/month billed monthly. Term is 12 months. "
+    "Provider may change or discontinue features at any time without notice. "
+    "Customer may not terminate for convenience. Provider may terminate immediately for any breach. "
+    "Limitation of liability is fees paid in the last 1 month. No service credits for downtime. "
+    "Governing law: Delaware. Venue: Delaware."
+)
+
+
+def _analyze(deal_id, retain, **extra):
+    state = {"deal": Deal(deal_id=deal_id, raw_text=DEAL), "execution_trace": [],
+             "retain_raw_payloads": retain, "namespaces": ["default"], **extra}
+    return build_snapshot(run_rules_only(state))
+
+
+def test_backfill_rescores_only_snapshots_with_payloads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # precedent search reads the relative default history
+    history = tmp_path / "deal_history.jsonl"
+    kept = _analyze("kept", retain=True)
+    assert kept["raw_payloads"]["deal_text"] == DEAL
+    append_snapshot(kept, history)
+    legacy = _analyze("legacy", retain=False)
+    append_snapshot(legacy, history)
+
+    # a rules change: every severity point now counts double
+    monkeypatch.setattr(normalize, "_severity_points", lambda sev: {"Low": 2, "Medium": 6, "High": 12}[sev])
+    report = backfill(history, workers=1)
+
+    assert report["rescored"] == 1 and report["skipped_no_payloads"] == 1
+    assert report["score_changed"] == 1
+    new = {s["deal_id"]: s for s in load_history(tmp_path / "deal_history.v2.jsonl")}
+    assert new["kept"]["risk_score"] > kept["risk_score"]
+    assert new["legacy"] == legacy
+    assert json.loads((tmp_path / "deal_history.v2.diff.json").read_text())["rescored"] == 1
+
+    archived = promote(history, tmp_path / "deal_history.v2.jsonl", report["source_offset"])
+    assert load_history(archived)[0]["risk_score"] == kept["risk_score"]
+    assert load_history(history)[0]["risk_score"] == new["kept"]["risk_score"]
+
+
+def test_promote_keeps_appends_made_during_the_backfill(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    history = tmp_path / "deal_history.jsonl"
+    before = _analyze("before", retain=True, perspectives=["customer", "provider"])
+    append_snapshot(before, history)
+    late = _analyze("late", retain=True)
+
+    monkeypatch.setattr(normalize, "_severity_points", lambda sev: {"Low": 2, "Medium": 6, "High": 12}[sev])
+    report = backfill(history, workers=1)
+    append_snapshot(late, history)  # written while the new version was being built
+
+    archived = promote(history, tmp_path / "deal_history.v2.jsonl", report["source_offset"])
+    active = {s["deal_id"]: s for s in load_history(history)}
+    assert list(active) == ["before", "late"]
+    assert [s["deal_id"] for s in load_history(archived)] == ["before", "late"]
+    # the late snapshot went through the same re-score
+    assert active["late"]["risk_score"] == active["before"]["risk_score"] > late["risk_score"]
+    # stored perspective views follow the new scores
+    views = active["before"]["perspectives"]
+    assert views["customer"]["risk_score"] == active["before"]["risk_score"]
+    assert views["provider"]["risk_score"] > before["perspectives"]["provider"]["risk_score"]
@@ -0,0 +1,124 @@
+# tests/test_checkpoints.py
+from __future__ import annotations
+
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+
+import agents.negotiation_agent as negotiation
+from agents import clients
+from graph.batch import run_batch
+from graph.checkpoints import SqliteCheckpointer
+
+DEALS = [
+    {"deal_id": f"d{i}", "deal_text": "Provider may terminate immediately. Liability is capped at one month of fees."}
+    for i in range(3)
+]
+
+
+class _AgentLLM:
+    def __init__(self, agent, calls):
+        self.agent = agent
+        self.calls = calls
+
+    def invoke(self, prompt, *args, **kwargs):
+        self.calls.append(self.agent)
+        if self.agent == "clause":
+            content = '[{"type": "Termination", "text": "Provider may terminate immediately."}]'
+        elif self.agent == "risk":
+            content = json.dumps({"risks": [{"category": "Termination", "risk": "termination",
+                                             "evidence": "Provider may terminate immediately.",
+                                             "severity": "High", "direction": "Customer-Unfavorable"}]})
+        elif self.agent == "judge":
+            content = '{"rationale": "ok", "key_risks": []}'
+        else:
+            content = "1. cap liability at 12 months of fees"
+        return AIMessage(content=content)
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    monkeypatch.setenv("DEALGRAPH_STREAM_RISKS", "0")
+    calls = []
+    clients.set_wrapper(lambda agent, build: _AgentLLM(agent, calls))
+    yield calls
+    clients.set_wrapper(None)
+
+
+def test_restart_skips_done_deals_and_resumes_from_last_node(tmp_path, monkeypatch, llm_calls):
+    real = negotiation.negotiation_agent
+    crashed = []
+
+    def crash_once(state):
+        if state["deal"].deal_id == "d1" and not crashed:
+            crashed.append(True)
+            raise RuntimeError("worker died")
+        return real(state)
+
+    monkeypatch.setattr(negotiation, "negotiation_agent", crash_once)
+    store = SqliteCheckpointer(tmp_path / "c.sqlite")
+
+    first = run_batch(DEALS, "run-1", store, workers=1, save=False)
+    assert first["summary"]["outcomes"] == {"completed": 2, "failed": 1}
+    assert not first["summary"]["complete"] and "compaction" not in first["summary"]
+
+    llm_calls.clear()
+    second = run_batch(DEALS, "run-1", store, workers=1, save=False)
+    outcomes = {r["deal_id"]: r["outcome"] for r in second["results"]}
+    assert outcomes == {"d0": "skipped", "d1": "resumed", "d2": "skipped"}
+    # clauses / risk / normalize / precedents of d1 came from its checkpoint
+    assert llm_calls == ["negotiation"]
+    assert set(store.results("run-1")) == {"d0", "d1", "d2"}
+    store.close()
+
+
+def test_completed_run_is_compacted_but_keeps_results(tmp_path, llm_calls):
+    store = SqliteCheckpointer(tmp_path / "c.sqlite")
+    out = run_batch(DEALS[:2], "run-2", store, workers=2, save=False, compact=False)
+    assert out["summary"]["complete"] and store.checkpoint_count("run-2") > 0
+
+    again = run_batch(DEALS[:2], "run-2", store, workers=2, save=False)
+    assert again["summary"]["outcomes"] == {"skipped": 2}
+    assert again["summary"]["compaction"]["deals"] == 2
+    assert store.checkpoint_count("run-2") == 0
+    assert store.results("run-2")["d0"]["recommendation"]
+    store.close()
+
+
+def test_resuming_a_finished_thread_does_not_rerun_it(tmp_path, llm_calls):
+    store = SqliteCheckpointer(tmp_path / "c.sqlite")
+    first = run_batch(DEALS[:1], "run-3", store, workers=1, save=False, compact=False)
+    assert first["summary"]["complete"]
+    usage = store.results("run-3")["d0"]["usage"]
+
+    # crash after the graph's last checkpoint, before the ledger recorded the result
+    store.mark("run-3", "d0", "running")
+    llm_calls.clear()
+    again = run_batch(DEALS[:1], "run-3", store, workers=1, save=False)
+
+    assert again["results"][0]["outcome"] == "recovered"
+    assert llm_calls == []
+    assert store.results("run-3")["d0"]["usage"] == usage
+    store.close()
+
+
+def test_batch_budget_defers_deals_in_the_ledger(tmp_path, llm_calls):
+    from agents.usage import BatchBudget
+
+    store = SqliteCheckpointer(tmp_path / "c.sqlite")
+    out = run_batch(DEALS[:2], "run-4", store, workers=1, save=False,
+                    budget=BatchBudget(run_budget=0.0, defer=True))
+    assert out["summary"]["outcomes"] == {"deferred": 2}
+    assert out["summary"]["budget"]["deferred"] == 2 and not out["summary"]["complete"]
+    assert store.deal_statuses("run-4") == {"d0": "deferred", "d1": "deferred"}
+    assert llm_calls == []
+
+    # deferred deals are retried by the next run of the same id
+    budget = BatchBudget(run_budget=1.0)
+    again = run_batch(DEALS[:2], "run-4", store, workers=1, save=False, budget=budget)
+    assert again["summary"]["outcomes"] == {"completed": 2} and again["summary"]["complete"]
+    spent = sum(r["usage"]["cost_usd"] for r in store.results("run-4").values())
+    assert budget.run.snapshot()["spent_usd"] == pytest.approx(spent)
+    assert budget.run.snapshot()["reserved_usd"] == 0
+    store.close()
@@ -0,0 +1,59 @@
+# tests/test_clients.py
+from __future__ import annotations
+
+import pytest
+
+import agents.clients as clients
+from agents.clients import RetryingLLM, _Stats
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+
+class _BadRequest(Exception):
+    status_code = 400
+
+
+class _Flaky:
+    def __init__(self, failures, exc):
+        self.failures = failures
+        self.exc = exc
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.exc()
+        return "ok"
+
+
+def test_retries_429_with_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(clients.time, "sleep", sleeps.append)
+    stats = _Stats()
+    model = _Flaky(2, _RateLimited)
+
+    assert RetryingLLM("risk", model, max_retries=3, stats=stats).invoke("p") == "ok"
+    assert model.calls == 3
+    assert len(sleeps) == 2
+    assert stats.snapshot()["retries"] == 2
+
+
+def test_non_retryable_errors_raise_immediately(monkeypatch):
+    monkeypatch.setattr(clients.time, "sleep", lambda s: None)
+    model = _Flaky(1, _BadRequest)
+
+    with pytest.raises(_BadRequest):
+        RetryingLLM("risk", model, max_retries=3, stats=_Stats()).invoke("p")
+    assert model.calls == 1
+
+
+def test_agent_config_env_override(monkeypatch):
+    monkeypatch.setenv("DEALGRAPH_MODEL", "base-model")
+    monkeypatch.setenv("DEALGRAPH_JUDGE_MODEL", "judge-model")
+    monkeypatch.setenv("DEALGRAPH_JUDGE_TIMEOUT", "5")
+
+    assert clients.agent_config("risk")["model"] == "base-model"
+    assert clients.agent_config("judge")["model"] == "judge-model"
+    assert clients.agent_config("judge")["timeout"] == 5.0
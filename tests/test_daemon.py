@@ -0,0 +1,96 @@
+# tests/test_daemon.py
+from __future__ import annotations
+
+import threading
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from agents import clients
+from graph.daemon import DealGraphDaemon, decode_state, encode_state, request, run_remote
+from graph.records import to_dicts
+from schemas import Deal
+
+DEAL_TEXT = (
+    "Customer pays $5,000/month billed monthly. Provider may terminate immediately for any breach. "
+    "Limitation of liability is fees paid in the last 1 month. Governing law: Delaware."
+)
+
+
+class _EchoLLM:
+    def invoke(self, prompt, *args, **kwargs):
+        return AIMessage(content='{"risks": []}' if "risk analyst" in str(prompt) else "[]")
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    monkeypatch.setenv("DEALGRAPH_STREAM_RISKS", "0")
+    clients.set_wrapper(lambda agent, build: _EchoLLM())
+    yield
+    clients.set_wrapper(None)
+
+
+def test_state_round_trips_through_the_wire_format():
+    from graph.records import ClauseRecord, RiskItem
+
+    state = {
+        "deal": Deal(deal_id="d", raw_text="x", clauses=[ClauseRecord(type="Payment", text="pay")]),
+        "risk_items": [RiskItem(category="Payment", severity="Low", direction="Balanced")],
+        "risk_score": 12.5,
+    }
+    out = decode_state(encode_state(state))
+    assert out["deal"].deal_id == "d" and out["deal"].clauses[0].type == "Payment"
+    assert to_dicts(out["risk_items"]) == to_dicts(state["risk_items"])
+
+
+def test_main_falls_back_when_no_daemon_listens(tmp_path):
+    assert run_remote({"deal": Deal(raw_text="x")}, tmp_path / "none.sock") is None
+
+
+def test_daemon_serves_the_same_result_as_in_process(tmp_path, fake_llm):
+    from graph.deal_graph import build_graph
+
+    path = tmp_path / "d.sock"
+    server = DealGraphDaemon(path, workers=2, warm=False)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        state = {"deal": Deal(deal_id="d1", raw_text=DEAL_TEXT), "execution_trace": []}
+        remote = run_remote(state, path)
+        local = build_graph().invoke(state)
+        assert remote["recommendation"] == local["recommendation"]
+        assert remote["risk_vector"] == local["risk_vector"]
+        assert remote["risk_score"] == local["risk_score"]
+        assert request({"op": "ping"}, path)["served"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not path.exists()
+
+
+def test_client_pins_its_switches_and_history_paths(tmp_path, monkeypatch):
+    import json
+
+    from agents.precedent_agent import search_namespaces
+    from graph.daemon import client_state
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DEALGRAPH_RETAIN_RAW", "1")
+    monkeypatch.setenv("DEALGRAPH_STREAM_RISKS", "0")
+    monkeypatch.setenv("DEALGRAPH_ROUTING", "1")
+    state = client_state({"deal": Deal(raw_text="x"), "namespace": "acme", "namespaces": ["default"]})
+    assert state["retain_raw_payloads"] is True and state["stream_risks"] is False
+    assert state["model_routing"] is True
+    assert state["history_paths"] == {
+        "default": str(tmp_path / "memory" / "deal_history.jsonl"),
+        "acme": str(tmp_path / "memory" / "history" / "acme" / "deal_history.jsonl"),
+    }
+
+    # the daemon searches the client's files, whatever its own cwd
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "memory" / "deal_history.jsonl").write_text(
+        json.dumps({"deal_id": "p", "risk_vector": {"Termination": "High"}}) + "\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path / "memory")
+    assert search_namespaces("vector", {"Termination": "High"}, ["default"], 3) == []
+    found = search_namespaces("vector", {"Termination": "High"}, ["default"], 3, paths=state["history_paths"])
+    assert [item["deal_id"] for _, item in found] == ["p"]
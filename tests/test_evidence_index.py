@@ -0,0 +1,38 @@
+# tests/test_evidence_index.py
+from __future__ import annotations
+
+from graph.evidence_index import EvidenceIndex, localize_evidence
+from graph.records import RiskItem
+
+
+DEAL = (
+    "Customer pays $5,000/month billed monthly. Term is 12 months. "
+    "Provider may change or discontinue features at any time without notice. "
+    "Provider may terminate immediately for any breach. "
+    "Governing law: Delaware."
+)
+
+
+def test_locates_exact_and_near_verbatim_evidence():
+    index = EvidenceIndex(DEAL)
+
+    span, score = index.locate("provider may  TERMINATE immediately for any breach")
+    assert score == 1.0
+    assert DEAL[span[0]:span[1]] == "Provider may terminate immediately for any breach"
+
+    span, score = index.locate("Provider may change or ... discontinue features at any time")
+    assert score == 1.0
+    assert DEAL[span[0]:span[1]].startswith("Provider may change")
+
+    span, score = index.locate("Delaware")
+    assert DEAL[span[0]:span[1]] == "Delaware"
+
+
+def test_unmatched_evidence_is_flagged_unverified():
+    real = RiskItem("Termination", "High", "Customer-Unfavorable", "Provider may terminate immediately for any breach")
+    invented = RiskItem("IP", "High", "Customer-Unfavorable", "Provider owns all customer data and inventions forever")
+    localize_evidence([real, invented], DEAL)
+
+    assert real.unverified is False and real.span_start is not None
+    assert invented.unverified is True
+    assert invented.span_start is None and invented.match_score == 0.0
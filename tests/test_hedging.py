@@ -0,0 +1,117 @@
+# tests/test_hedging.py
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from agents import clients
+from agents.hedging import DeadlineExceeded, invoke_llm
+from agents.risk_agent import risk_agent
+from schemas import Deal
+
+
+class _SlowFirst:
+    """First call stalls, later calls answer immediately."""
+
+    def __init__(self, stall: float):
+        self.stall = stall
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        if n == 1:
+            time.sleep(self.stall)
+            return AIMessage(content="slow")
+        return AIMessage(content="fast")
+
+
+@pytest.fixture
+def fake_llm():
+    def install(llm):
+        clients.set_wrapper(lambda agent, build: llm)
+        return llm
+    yield install
+    clients.set_wrapper(None)
+
+
+def test_hedged_request_wins_over_stalled_call(fake_llm):
+    llm = fake_llm(_SlowFirst(stall=1.5))
+
+    t0 = time.monotonic()
+    resp = invoke_llm("risk", "prompt", deadline=0.6)  # cold tracker: hedge at deadline / 2
+
+    assert resp.content == "fast"
+    assert time.monotonic() - t0 < 1.0
+    assert llm.calls == 2
+
+
+def test_deadline_degrades_risk_agent(monkeypatch, fake_llm):
+    monkeypatch.setenv("DEALGRAPH_RISK_DEADLINE", "0.2")
+    monkeypatch.setenv("DEALGRAPH_RISK_HEDGE_PERCENTILE", "0")
+    fake_llm(_SlowFirst(stall=1.0))
+
+    with pytest.raises(DeadlineExceeded):
+        invoke_llm("risk", "prompt")
+
+    fake_llm(_SlowFirst(stall=1.0))
+    deal = Deal(raw_text="Provider may terminate immediately for any breach. Governing law: Delaware.")
+    out = risk_agent({"deal": deal})
+
+    assert out["degraded"] is True and out["degraded_nodes"] == ["risk"]
+    cats = {r["category"] for r in json.loads(out["risk_analysis"])["risks"]}
+    assert cats == {"Termination", "Jurisdiction"}
+
+
+def test_hedge_charges_are_settled(monkeypatch, fake_llm):
+    from agents.scheduler import scheduler
+
+    class _Usage(_SlowFirst):
+        def invoke(self, prompt):
+            resp = super().invoke(prompt)
+            resp.usage_metadata = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+            return resp
+
+    settled = []
+    monkeypatch.setattr(scheduler, "reconcile", lambda model, estimated, actual: settled.append((estimated, actual)))
+    scheduler.configure(rpm=0, tpm=1_000_000, per_model={})
+    try:
+        fake_llm(_Usage(stall=1.0))
+        assert invoke_llm("risk", "prompt", deadline=0.6).content == "fast"
+    finally:
+        scheduler.configure()
+
+    charged = settled[0][0]
+    assert charged > 0
+    # the winning hedge against its usage; the stalled primary was sent, so it stays charged
+    assert settled == [(charged, 15)]
+
+
+def test_stream_charge_is_kept_when_cut_off(monkeypatch, fake_llm):
+    from agents.hedging import stream_llm
+    from agents.scheduler import scheduler
+
+    class _Stalls:
+        def stream(self, prompt):
+            yield AIMessage(content="[")
+            time.sleep(1.0)
+            yield AIMessage(content="]")
+
+    settled = []
+    monkeypatch.setattr(scheduler, "reconcile", lambda model, estimated, actual: settled.append((estimated, actual)))
+    scheduler.configure(rpm=0, tpm=1_000_000, per_model={})
+    try:
+        fake_llm(_Stalls())
+        with pytest.raises(DeadlineExceeded):
+            stream_llm("risk", "prompt", lambda text: None, deadline=0.2)
+    finally:
+        scheduler.configure()
+
+    # the stream reached the provider: no refund
+    assert settled == []
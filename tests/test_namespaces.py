@@ -0,0 +1,41 @@
+# tests/test_namespaces.py
+from __future__ import annotations
+
+import pytest
+
+import agents.precedent_agent as precedent
+from memory import deal_history
+from memory.deal_history import append_snapshot, namespace_path, parse_namespaces
+
+
+def _snap(deal_id, vec):
+    return {"deal_id": deal_id, "recommendation": "REJECT", "summary": deal_id, "risk_vector": vec}
+
+
+@pytest.fixture
+def shards(tmp_path, monkeypatch):
+    monkeypatch.setattr(deal_history, "DEFAULT_PATH", tmp_path / "deal_history.jsonl")
+    monkeypatch.setattr(deal_history, "HISTORY_ROOT", tmp_path / "history")
+    append_snapshot(_snap("d1", {"Liability": "High"}), update_rollups=False)
+    append_snapshot(_snap("a1", {"Liability": "High", "Payment": "Low"}), namespace="acme", update_rollups=False)
+    append_snapshot(_snap("a2", {"Payment": "Low"}), namespace="acme", update_rollups=False)
+    append_snapshot(_snap("b1", {"Liability": "Medium"}), namespace="beta", update_rollups=False)
+    return tmp_path
+
+
+def test_namespaces_are_separate_files(shards):
+    assert namespace_path("acme") == shards / "history" / "acme" / "deal_history.jsonl"
+    assert deal_history.list_namespaces() == ["default", "acme", "beta"]
+    assert parse_namespaces("acme, beta,acme") == ["acme", "beta"]
+    with pytest.raises(ValueError):
+        namespace_path("../etc")
+
+
+def test_search_only_requested_namespaces_and_merge_top_k(shards):
+    query = {"Liability": "High"}
+    only_acme = precedent.search_namespaces("vector", query, ["acme"], 3)
+    assert [item["deal_id"] for _, item in only_acme] == ["a1"]
+
+    merged = precedent.search_namespaces("vector", query, ["acme", "beta", "default"], 2, pool="thread")
+    assert [(score, item["deal_id"]) for score, item in merged] == [(1.0, "d1"), (0.5, "a1")]
+    assert merged[0][1]["namespace"] == "default"
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from schemas import Deal
 from graph.normalize import normalize_agent_outputs
+from graph.records import to_dicts
 
 
 def test_risk_classification_liability_high_month_1():
@@ -19,3 +20,33 @@ def test_risk_classification_liability_high_month_1():
 
     assert any(r["category"] == "Liability" and r["severity"] == "High" for r in items), items
     assert out["risk_score"] > 0
+
+
+def test_normalize_compact_state_and_raw_retention():
+    base = {
+        "deal": Deal(raw_text="dummy"),
+        "risk_analysis": '{"risks": [{"category": "SLA", "risk": "no credits", "evidence": "No service credits for downtime"}]}',
+        "raw_clause_extraction": '[{"type": "SLA", "text": "No service credits for downtime"}]',
+    }
+
+    out = normalize_agent_outputs(dict(base))
+    assert out["execution_trace"] == ["normalize"]
+    assert out["risk_analysis"] is None and out["raw_clause_extraction"] is None
+    assert to_dicts(out["risk_items"])[0]["category"] == "SLA"
+    assert out["deal"].clauses[0].text == "No service credits for downtime"
+
+    kept = normalize_agent_outputs(dict(base, retain_raw_payloads=True))
+    assert "risk_analysis" not in kept
+
+
+def test_deal_clauses_stay_typed():
+    import pytest
+    from pydantic import ValidationError
+
+    from graph.records import ClauseRecord
+    from schemas import Clause
+
+    deal = Deal(raw_text="x", clauses=[{"type": "Payment", "text": "pay"}, ClauseRecord("SLA", "99.9%")])
+    assert isinstance(deal.clauses[0], Clause) and isinstance(deal.clauses[1], ClauseRecord)
+    with pytest.raises(ValidationError):
+        Deal(raw_text="x", clauses=["Payment: pay"])
@@ -0,0 +1,92 @@
+# tests/test_packing.py
+from __future__ import annotations
+
+import json
+import re
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from agents import clients
+from agents.packing import pack, split_packed
+from graph.batch import run_batch
+from graph.checkpoints import SqliteCheckpointer
+
+DEAL_TEXT = "Provider may terminate immediately. Liability is capped at one month of fees."
+CLAUSES = [{"type": "Termination", "text": "Provider may terminate immediately."}]
+RISKS = [{"category": "Termination", "risk": "termination", "evidence": "Provider may terminate immediately.",
+          "severity": "High", "direction": "Customer-Unfavorable"}]
+
+
+def test_split_packed_keeps_only_well_formed_entries():
+    text = "```json\n" + json.dumps({"deals": [
+        {"id": "a", "clauses": CLAUSES, "risks": RISKS},
+        {"id": "b", "clauses": CLAUSES, "risks": "not a list"},
+        {"id": "c", "clauses": [], "risks": []},
+        {"id": "c", "clauses": CLAUSES, "risks": RISKS},
+        {"id": "zz", "clauses": [], "risks": []},
+    ]}) + "\n```"
+    out = split_packed(text, ["a", "b", "c", "d"])
+    assert set(out) == {"a"}
+    assert json.loads(out["a"]["raw_clause_extraction"]) == CLAUSES
+    assert json.loads(out["a"]["risk_analysis"]) == {"risks": RISKS}
+    assert split_packed("{truncated", ["a"]) == {}
+
+
+def test_pack_respects_deal_and_size_limits(monkeypatch):
+    import agents.packing as packing
+
+    monkeypatch.setattr(packing, "PACK_MAX_DEALS", 2)
+    deals = [{"deal_id": str(i), "deal_text": "x" * 100} for i in range(5)]
+    assert [len(p) for p in pack(deals)] == [2, 2, 1]
+    monkeypatch.setattr(packing, "PACK_MAX_CHARS", 250)
+    monkeypatch.setattr(packing, "PACK_MAX_DEALS", 8)
+    assert [len(p) for p in pack(deals)] == [2, 2, 1]
+
+
+class _AgentLLM:
+    def __init__(self, agent, calls):
+        self.agent = agent
+        self.calls = calls
+
+    def invoke(self, prompt, *args, **kwargs):
+        self.calls.append(self.agent)
+        if self.agent == "packed":
+            ids = re.findall(r"=== DEAL (\S+) ===", str(prompt))
+            # d1's entry comes back malformed
+            entries = [{"id": i, "clauses": CLAUSES, "risks": RISKS if i != "d1" else None} for i in ids]
+            content = json.dumps({"deals": entries})
+        elif self.agent == "clause":
+            content = json.dumps(CLAUSES)
+        elif self.agent == "risk":
+            content = json.dumps({"risks": RISKS})
+        else:
+            content = "1. cap liability at 12 months of fees"
+        return AIMessage(content=content, usage_metadata={"input_tokens": 900, "output_tokens": 300,
+                                                          "total_tokens": 1200})
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    monkeypatch.setenv("DEALGRAPH_STREAM_RISKS", "0")
+    calls = []
+    clients.set_wrapper(lambda agent, build: _AgentLLM(agent, calls))
+    yield calls
+    clients.set_wrapper(None)
+
+
+def test_bulk_mode_packs_small_deals_and_retries_malformed_ones(tmp_path, llm_calls):
+    deals = [{"deal_id": f"d{i}", "deal_text": DEAL_TEXT} for i in range(3)]
+    store = SqliteCheckpointer(tmp_path / "c.sqlite")
+    out = run_batch(deals, "bulk", store, workers=2, save=False, pack=True)
+
+    assert out["summary"]["packing"] == {"requests": 1, "deals_packed": 2, "retried_individually": 1}
+    assert llm_calls.count("packed") == 1
+    # only the deal with the malformed entry made its own extraction calls
+    assert llm_calls.count("clause") == 1 and llm_calls.count("risk") == 1
+
+    results = store.results("bulk")
+    assert results["d0"]["risk_vector"] == results["d1"]["risk_vector"]
+    # every deal carries a share of the packed call
+    assert all("packed" in r["usage"]["by_agent"] for r in results.values())
+    store.close()
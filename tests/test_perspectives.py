@@ -0,0 +1,113 @@
+# tests/test_perspectives.py
+from __future__ import annotations
+
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from agents import clients
+from graph.normalize import _classify_risk_line, normalize_risk_item
+from graph.perspectives import requested_perspectives
+from graph.records import to_dicts
+from graph.rules_only import run_rules_only
+from schemas import Deal
+
+DEAL_TEXT = (
+    "Customer pays $5,000/month billed monthly under this master services agreement. "
+    "Provider may terminate immediately for any breach. "
+    "Limitation of liability is fees paid in the last 1 month. "
+    "Service credits apply when uptime falls below 99.9% in any calendar month. "
+    "Customer may terminate for convenience on 30 days notice. Governing law: Delaware."
+)
+RISKS = [
+    {"category": "Termination", "risk": "provider exit", "evidence": "Provider may terminate immediately for any breach.",
+     "severity": "High", "direction": "Customer-Unfavorable"},
+    {"category": "SLA", "risk": "credits", "evidence": "Service credits apply when uptime falls below 99.9%",
+     "severity": "Low", "direction": "Customer-Favorable"},
+]
+
+
+def test_provider_view_mirrors_the_customer_rules():
+    r = {"risk": "exit", "evidence": "Provider may terminate immediately for any breach."}
+    customer = normalize_risk_item(r)
+    provider = normalize_risk_item(r, "provider")
+    assert (customer.severity, customer.direction) == ("High", "Customer-Unfavorable")
+    assert (provider.severity, provider.direction) == ("Low", "Provider-Favorable")
+    credits = normalize_risk_item({"risk": "credits", "evidence": "Service credits apply."}, "provider")
+    assert (credits.severity, credits.direction) == ("Medium", "Provider-Unfavorable")
+    with pytest.raises(ValueError):
+        requested_perspectives({"perspectives": ["customer", "vendor"]})
+
+
+def test_provider_view_rejects_uncapped_provider_liability():
+    text = (
+        "Provider's liability under this Agreement is unlimited for all claims of any kind. "
+        "Customer may terminate for convenience at any time without penalty or notice. "
+        "Customer pays $5,000/month billed monthly in arrears. Governing law: Delaware. "
+        "Provider will deliver the services described in each order form with reasonable care and skill, "
+        "and will keep the hosted platform available during business hours."
+    )
+    out = run_rules_only({"deal": Deal(deal_id="d", raw_text=text), "execution_trace": [],
+                          "namespaces": [], "perspectives": ["customer", "provider"]})
+    provider = out["perspective_views"]["provider"]
+    assert provider["risk_vector"]["Liability"] == "High" and provider["risk_vector"]["Termination"] == "High"
+    assert provider["recommendation"] == "REJECT"
+    assert out["perspective_views"]["customer"]["recommendation"] != "REJECT"
+    # the customer-side rules (and the graph's own score) are untouched by the provider rule
+    customer = _classify_risk_line("Provider's liability under this Agreement is unlimited.")
+    assert (customer["severity"], customer["direction"]) == ("Medium", "Balanced")
+
+
+def test_rules_only_reports_both_views_side_by_side():
+    out = run_rules_only({"deal": Deal(deal_id="d", raw_text=DEAL_TEXT), "execution_trace": [],
+                          "namespaces": [], "perspectives": ["customer", "provider"]})
+    views = out["perspective_views"]
+    # the customer view is the graph's own result
+    assert views["customer"]["risk_vector"] == out["risk_vector"]
+    assert views["customer"]["recommendation"] == out["recommendation"] == "REJECT"
+    # the one-month cap protects the provider; the customer's convenience exit is its exposure
+    assert views["provider"]["risk_vector"]["Liability"] == "Low"
+    assert views["provider"]["risk_vector"]["Termination"] == "High"
+    assert views["provider"]["risk_score"] < views["customer"]["risk_score"]
+    assert out["execution_trace"][-2:] == ["perspective:customer", "perspective:provider"]
+
+
+class _CountingLLM:
+    def __init__(self, agent, calls):
+        self.agent = agent
+        self.calls = calls
+
+    def invoke(self, prompt, *args, **kwargs):
+        self.calls.append(self.agent)
+        if self.agent == "clause":
+            return AIMessage(content="[]")
+        if self.agent == "risk":
+            return AIMessage(content=json.dumps({"risks": RISKS}))
+        if self.agent == "judge":
+            return AIMessage(content=json.dumps({"rationale": "Termination is one-sided.", "key_risks": []}))
+        return AIMessage(content="1. add a cure period")
+
+
+def test_graph_runs_both_views_from_one_extraction(monkeypatch):
+    from graph.deal_graph import build_graph
+
+    monkeypatch.setenv("DEALGRAPH_STREAM_RISKS", "0")
+    calls = []
+    clients.set_wrapper(lambda agent, build: _CountingLLM(agent, calls))
+    try:
+        state = {"deal": Deal(deal_id="d", raw_text=DEAL_TEXT), "execution_trace": [], "namespaces": []}
+        single = build_graph().invoke(dict(state))
+        single_calls = list(calls)
+        calls.clear()
+        dual = build_graph().invoke({**state, "perspectives": ["customer", "provider"]})
+    finally:
+        clients.set_wrapper(None)
+
+    assert sorted(calls) == sorted(single_calls)
+    assert "perspective_views" not in single or not single["perspective_views"]
+    views = dual["perspective_views"]
+    assert views["customer"]["risk_items"] == to_dicts(dual["risk_items"])
+    assert views["customer"]["recommendation"] == dual["recommendation"]
+    assert views["provider"]["risk_vector"] == {"Termination": "Low", "SLA": "Medium"}
+    assert views["provider"]["risk_items"][0]["span_start"] == dual["risk_items"][0]["span_start"]
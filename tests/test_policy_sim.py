@@ -0,0 +1,30 @@
+# tests/test_policy_sim.py
+from __future__ import annotations
+
+import random
+
+from agents.judge_agent import DEFAULT_POLICY, decide_recommendation
+from benchmarks.synthetic import iter_snapshots
+from memory.policy_sim import RECOMMENDATIONS, PortfolioColumns, policy_grid, simulate
+
+
+def test_vectorized_policies_match_decide_recommendation():
+    history = list(iter_snapshots(300, seed=3))
+    cols = PortfolioColumns.from_history(history)
+    policies = policy_grid(reject_score=[40, 60], edits_score=[20, 30], reject_high_liability=[True, False])
+    result = simulate(cols, policies)
+
+    baseline = [decide_recommendation(s["risk_items"], s["risk_score"]) for s in history]
+    for i, policy in enumerate(policies):
+        expected = [[0] * 3 for _ in range(3)]
+        for snap, base in zip(history, baseline):
+            new = decide_recommendation(snap["risk_items"], snap["risk_score"], policy)
+            expected[RECOMMENDATIONS.index(base)][RECOMMENDATIONS.index(new)] += 1
+        assert result["flips"][i].tolist() == expected
+
+
+def test_default_policy_has_no_flips():
+    cols = PortfolioColumns.from_history(iter_snapshots(200, seed=5))
+    result = simulate(cols, [dict(DEFAULT_POLICY)])
+    assert int(result["changed"][0]) == 0
+    assert int(result["mix"][0].sum()) == 200
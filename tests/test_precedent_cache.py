@@ -0,0 +1,93 @@
+# tests/test_precedent_cache.py
+from __future__ import annotations
+
+import json
+
+from agents.precedent_agent import _risk_vector_similarity, rank_by_vector
+from memory.deal_history import append_snapshot, iter_history
+from memory.precedent_cache import cache
+
+QUERY = {"Termination": "High", "Liability": "High"}
+
+
+def _write(path, rows):
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+
+
+def _ranked(path, k=2):
+    scans = []
+
+    def scan():
+        scans.append(1)
+        return rank_by_vector(QUERY, iter_history(path), k)
+
+    return cache.ranked(path, QUERY, k, None, None, _risk_vector_similarity, scan), scans
+
+
+def test_identical_vectors_hit_the_cache(tmp_path):
+    path = tmp_path / "h.jsonl"
+    _write(path, [{"deal_id": "a", "risk_vector": {"Termination": "High"}},
+                  {"deal_id": "b", "risk_vector": {"Termination": "Low", "Liability": "High"}}])
+    first, scans = _ranked(path)
+    assert scans == [1]
+    # same vector, different key order -> same signature
+    again = cache.ranked(path, dict(reversed(list(QUERY.items()))), 2, None, None, _risk_vector_similarity,
+                         lambda: 1 / 0)
+    assert again == first and cache.snapshot()["hits"] == 1
+
+
+def test_append_patches_cached_top_k_without_rescan(tmp_path):
+    path = tmp_path / "h.jsonl"
+    _write(path, [{"deal_id": "a", "risk_vector": {"Termination": "High"}},
+                  {"deal_id": "b", "risk_vector": {"Termination": "Low", "Liability": "High"}}])
+    _ranked(path)
+    append_snapshot({"deal_id": "exact", "risk_vector": dict(QUERY)}, path=path, update_rollups=False)
+    append_snapshot({"deal_id": "weak", "risk_vector": {"Payment": "Low"}}, path=path, update_rollups=False)
+
+    patched, scans = _ranked(path)
+    assert scans == []
+    assert patched == rank_by_vector(QUERY, iter_history(path), 2)
+    assert patched[0][1]["deal_id"] == "exact" and cache.snapshot()["patched"] == 1
+
+
+def test_rewritten_history_invalidates(tmp_path):
+    path = tmp_path / "h.jsonl"
+    _write(path, [{"deal_id": "a", "risk_vector": dict(QUERY)}, {"deal_id": "b", "risk_vector": dict(QUERY)}])
+    _ranked(path)
+    _write(path, [{"deal_id": "c", "risk_vector": {"Termination": "High"}}])  # shorter: rewritten
+
+    ranked, scans = _ranked(path)
+    assert scans == [1]
+    assert [item["deal_id"] for _, item in ranked] == ["c"]
+
+
+def test_text_ranking_reuses_encoded_shard(tmp_path):
+    from agents.precedent_agent import _snapshot_to_text, rank_by_text
+    from memory.deal_history import snapshot_filter
+
+    text = "Provider may terminate immediately; liability is capped at one month of fees."
+    path = tmp_path / "h.jsonl"
+    rows = [{"deal_id": str(i), "recommendation": rec, "clauses": [{"text": t}], "risks": {}}
+            for i, (t, rec) in enumerate([
+                ("Provider may terminate immediately for any breach.", "REJECT"),
+                ("Liability is capped at twelve months of fees.", "APPROVE"),
+                ("Governing law: Delaware.", "APPROVE"),
+                (text, "APPROVE"),
+            ])]
+    _write(path, rows)
+
+    def ranked(keep=None):
+        return cache.ranked_text(path, text, 2, keep, _snapshot_to_text, lambda: 1 / 0)
+
+    assert ranked() == rank_by_text(text, iter_history(path), 2)
+    keep = snapshot_filter({"recommendations": ["REJECT"]})
+    assert ranked(keep) == rank_by_text(text, iter_history(path, keep), 2)
+    assert cache.snapshot()["text_encoded"] == 4
+
+    # appends are encoded on the next lookup, nothing else is
+    append_snapshot({"deal_id": "same", "clauses": [{"text": text}], "risks": {}}, path=path, update_rollups=False)
+    assert ranked() == rank_by_text(text, iter_history(path), 2)
+    assert cache.snapshot()["text_encoded"] == 5
+
+    _write(path, rows[:1])  # rewritten: re-encoded from scratch
+    assert [item["deal_id"] for _, item in ranked()] == ["0"]
@@ -0,0 +1,50 @@
+# tests/test_precedent_scan.py
+import json
+import random
+
+from agents.precedent_agent import rank_by_vector, top_k
+from memory.deal_history import iter_history, snapshot_filter
+
+
+def test_top_k_matches_stable_sort():
+    rng = random.Random(7)
+    for _ in range(50):
+        scored = [(rng.choice([0.0, 0.25, 0.5, 0.75, 1.0]), {"i": i}) for i in range(60)]
+        expected = sorted([s for s in scored if s[0] > 0], key=lambda x: x[0], reverse=True)
+        for k in (1, 3, 10):
+            assert top_k(iter(scored), k) == expected[:k]
+
+
+def test_top_k_stops_after_k_perfect_scores():
+    consumed = []
+
+    def scored():
+        for i in range(1000):
+            consumed.append(i)
+            yield 1.0, {"i": i}
+
+    out = top_k(scored(), 3)
+    assert [item["i"] for _, item in out] == [0, 1, 2]
+    assert len(consumed) == 3
+
+
+def test_rank_by_vector_streams_history_with_filters(tmp_path):
+    path = tmp_path / "deal_history.jsonl"
+    snaps = [
+        {"deal_id": "a", "recommendation": "REJECT", "created_at": "2026-01-05T00:00:00",
+         "risk_vector": {"Liability": "High"}},
+        {"deal_id": "b", "recommendation": "APPROVE", "created_at": "2026-03-01T00:00:00",
+         "risk_vector": {"Liability": "High"}},
+        {"deal_id": "c", "recommendation": "REJECT", "risk_vector": {"Liability": "High"}},
+    ]
+    path.write_text("\n".join(json.dumps(s) for s in snaps) + "\nnot json\n", encoding="utf-8")
+
+    query = {"Liability": "High"}
+    assert [h["deal_id"] for _, h in rank_by_vector(query, iter_history(path), 5)] == ["a", "b", "c"]
+
+    keep = snapshot_filter({"recommendations": ["REJECT"]})
+    assert [h["deal_id"] for _, h in rank_by_vector(query, iter_history(path, keep), 5)] == ["a", "c"]
+
+    keep = snapshot_filter({"since": "2026-02-01", "until": "2026-03-01"})
+    assert [h["deal_id"] for _, h in rank_by_vector(query, iter_history(path, keep), 5)] == ["b"]
+    assert snapshot_filter({"recommendations": [], "since": None}) is None
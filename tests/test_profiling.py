@@ -0,0 +1,73 @@
+# tests/test_profiling.py
+import json
+
+from graph.profiling import NodeProfiler, _covered, profiler_from_env
+
+
+class _App:
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def invoke(self, state):
+        for node in self.nodes:
+            state.update(node(state))
+        return state
+
+
+def test_covered_merges_overlapping_intervals():
+    assert _covered([(0.0, 1.0), (0.5, 2.0), (3.0, 4.0)]) == 3.0
+    assert _covered([]) == 0.0
+
+
+def test_profiler_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("DEALGRAPH_PROFILE", raising=False)
+    assert profiler_from_env() is None
+
+
+def test_node_profiles_written_per_node_and_merged(tmp_path):
+    profiler = NodeProfiler(tmp_path, run_id="run")
+    try:
+        def build(state):
+            return {"items": [str(i) * 10 for i in range(1000)]}
+
+        def count(state):
+            return {"n": len(state["items"])}
+
+        app = _App([profiler.wrap("build", build), profiler.wrap("count", count)])
+        for _ in range(3):
+            assert profiler.invoke(app, {})["n"] == 1000
+        run_dir = profiler.write()
+    finally:
+        profiler.close()
+
+    assert {p.name for p in run_dir.iterdir()} == {
+        "build.prof", "count.prof", "merged.prof", "summary.json", "allocations.txt",
+    }
+    summary = json.loads((run_dir / "summary.json").read_text())
+    assert summary["invocations"] == 3
+    assert summary["nodes"]["build"]["calls"] == 3
+    assert summary["nodes"]["build"]["alloc_peak_bytes"] > 0
+    assert summary["framework_overhead_s"] >= 0
+
+
+def test_env_profiler_is_shared_times_invokes_and_writes_at_exit(tmp_path, monkeypatch):
+    import tracemalloc
+
+    from graph import profiling
+
+    monkeypatch.setenv("DEALGRAPH_PROFILE", str(tmp_path))
+    monkeypatch.setattr(profiling, "_env_profiler", None)
+    registered = []
+    monkeypatch.setattr(profiling.atexit, "register", registered.append)
+    was_tracing = tracemalloc.is_tracing()
+
+    profiler = profiler_from_env()
+    assert profiler_from_env() is profiler and registered == [profiling.flush_env_profiler]
+    app = profiler.instrument(_App([profiler.wrap("count", lambda state: {"n": 1})]))
+    assert app.invoke({})["n"] == 1
+
+    run_dir = registered[0]()
+    summary = json.loads((run_dir / "summary.json").read_text())
+    assert summary["invocations"] == 1 and summary["nodes"]["count"]["calls"] == 1
+    assert tracemalloc.is_tracing() == was_tracing
+    assert profiling.flush_env_profiler() is None
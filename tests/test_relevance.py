@@ -0,0 +1,99 @@
+# tests/test_relevance.py
+from __future__ import annotations
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from agents import clients
+from agents.risk_agent import risk_agent
+from graph.relevance import OMITTED, evidence_recall, relevance_filter
+from schemas import Deal
+
+RECITALS = " ".join(
+    f"WHEREAS the parties wish to record recital number {i} of their mutual understanding." for i in range(25)
+)
+SIGNATURES = "\n".join(f"Signed by authorized signatory {i} on behalf of the party." for i in range(10))
+BODY = (
+    "Provider may terminate immediately for any breach. "
+    "Limitation of liability is fees paid in the last 1 month. "
+    "Governing law: Delaware."
+)
+LONG_DEAL = f"{RECITALS}\n{BODY}\n{SIGNATURES}"
+
+
+def test_filter_keeps_keyword_sentences_with_context_and_reports_savings():
+    text, report = relevance_filter(LONG_DEAL)
+    assert report["applied"] and report["input_tokens_saved"] > 0 and report["reduction"] > 0.5
+    for sentence in BODY.split(". "):
+        assert sentence.rstrip(".") in text
+    # one sentence of context on each side, the rest is marked as omitted
+    assert "recital number 24" in text and "recital number 23" not in text
+    assert "signatory 0" in text and "signatory 1 " not in text
+    assert text.startswith(OMITTED) and text.endswith(OMITTED)
+
+
+def test_short_or_dense_deals_go_in_whole():
+    text, report = relevance_filter(BODY)
+    assert text == BODY and not report["applied"]
+    dense = " ".join([BODY] * 40)
+    assert relevance_filter(dense)[0] == dense
+
+
+def test_uncategorized_risks_survive_and_substrings_do_not_count():
+    risks = [
+        "Customer shall indemnify Provider without limit for any third-party claim.",
+        "This Agreement renews automatically for successive three-year terms.",
+        "Provider can process and sell Customer Data to third parties.",
+    ]
+    # "principal", "relationship", "shipping", "Capitalized" hold no keyword on a word boundary
+    filler = " ".join(
+        f"Recital {i} records the principal relationship, the shipping partnership and Capitalized terms."
+        for i in range(40)
+    )
+    text, report = relevance_filter(f"{filler} {' '.join(risks)} {filler}")
+    assert report["applied"] and report["reduction"] > 0.5
+    for risk in risks:
+        assert risk in text
+
+
+def test_evidence_recall_against_full_text_spans():
+    start = LONG_DEAL.index("Provider may terminate")
+    items = [
+        {"category": "Termination", "span_start": start, "span_end": start + 40},
+        {"category": "Liability", "span_start": 10, "span_end": 60},   # inside dropped recitals
+        {"category": "Other", "span_start": 10, "span_end": 60},       # uncategorized risks count too
+        {"category": "Payment", "span_start": None, "span_end": None},  # not located
+    ]
+    assert evidence_recall(LONG_DEAL, items) == pytest.approx(1 / 3)
+    assert evidence_recall(LONG_DEAL, items[3:]) is None
+
+
+class _CapturingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt, *args, **kwargs):
+        self.prompts.append(str(prompt))
+        return AIMessage(content='{"risks": []}')
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    monkeypatch.setenv("DEALGRAPH_STREAM_RISKS", "0")
+    fake = _CapturingLLM()
+    clients.set_wrapper(lambda agent, build: fake)
+    yield fake
+    clients.set_wrapper(None)
+
+
+def test_risk_prompt_gets_filtered_text_when_enabled(llm):
+    state = {"deal": Deal(deal_id="d", raw_text=LONG_DEAL)}
+    # off by default
+    assert risk_agent(state)["relevance"] is None
+    out = risk_agent({**state, "relevance_filter": True})
+    assert out["relevance"]["applied"]
+    assert "recital number 3 " not in llm.prompts[-1] and "Provider may terminate" in llm.prompts[-1]
+
+    out = risk_agent({**state, "relevance_filter": False})
+    assert out["relevance"] is None
+    assert "recital number 3 " in llm.prompts[-1]
@@ -0,0 +1,61 @@
+# tests/test_replay.py
+from __future__ import annotations
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from evals.replay import CaseContext, Cassette, CassetteLLM, CassetteMiss, bind_case, unbind_case
+
+
+class _FakeLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return AIMessage(
+            content=f"echo:{prompt}",
+            usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15},
+        )
+
+
+def test_record_then_replay_offline(tmp_path):
+    inner = _FakeLLM()
+
+    cassette = Cassette.load("case-1", tmp_path)
+    ctx = CaseContext(cassette)
+    token = bind_case(ctx)
+    try:
+        recorded = CassetteLLM("risk_agent", inner, "record").invoke("PROMPT")
+    finally:
+        unbind_case(token)
+    cassette.save()
+    assert ctx.total_tokens == 15
+
+    ctx = CaseContext(Cassette.load("case-1", tmp_path))
+    token = bind_case(ctx)
+    try:
+        replayed = CassetteLLM("risk_agent", inner, "replay").invoke("PROMPT")
+        with pytest.raises(CassetteMiss):
+            CassetteLLM("risk_agent", inner, "replay").invoke("OTHER PROMPT")
+    finally:
+        unbind_case(token)
+
+    assert inner.calls == 1
+    assert replayed.content == recorded.content
+    assert ctx.total_tokens == 15
+
+
+def test_perf_gate_fails_cases_without_a_baseline_entry():
+    from evals.run_parallel import check_regressions
+
+    results = [
+        {"id": "a", "errors": [], "latency_s": 0.1, "total_tokens": 100},
+        {"id": "b", "errors": [], "latency_s": 0.1, "total_tokens": 100},
+        {"id": "c", "errors": [], "deferred": True, "latency_s": 0.0, "total_tokens": 0},
+    ]
+    baseline = {"a": {"latency_s": 0.1, "total_tokens": 100}}
+    assert check_regressions(results, baseline, 0.5, 0.1) == [
+        "b: no perf baseline entry (record one with --update-baseline)"
+    ]
+    assert len(check_regressions(results, {}, 0.5, 0.1)) == 2
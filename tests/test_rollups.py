@@ -0,0 +1,67 @@
+# tests/test_rollups.py
+from __future__ import annotations
+
+import json
+
+from memory.deal_history import append_snapshot
+from memory.rollups import load_rollups, portfolio_summary, rebuild_rollups
+
+
+def _snap(deal_id, rec, score, month, items):
+    return {
+        "deal_id": deal_id,
+        "recommendation": rec,
+        "risk_score": score,
+        "created_at": f"2026-{month:02d}-15T12:00:00+00:00",
+        "risk_items": [{"category": c, "severity": s, "direction": d} for c, s, d in items],
+    }
+
+
+def test_append_maintains_rollups_incrementally(tmp_path):
+    history = tmp_path / "deal_history.jsonl"
+    append_snapshot(_snap("a", "REJECT", 60.0, 9, [("Liability", "High", "Customer-Unfavorable")]), history)
+    append_snapshot(_snap("b", "APPROVE", 10.0, 10, [("Payment", "Low", "Balanced")]), history)
+
+    # a writer that bypassed append_snapshot is caught up on the next sync
+    with history.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(_snap("c", "APPROVE", 20.0, 10, [("Liability", "Medium", "Balanced")])) + "\n")
+
+    total = portfolio_summary(history_path=history)
+    assert total["deals"] == 3
+    assert total["avg_risk_score"] == 30.0
+    assert total["recommendation_counts"] == {"REJECT": 1, "APPROVE": 2}
+    assert total["severity_by_category"]["Liability"] == {"High": 1, "Medium": 1}
+
+    october = portfolio_summary("2026-10", history_path=history)
+    assert october["deals"] == 2 and october["recommendation_mix"] == {"APPROVE": 1.0}
+
+    incremental = load_rollups(history)
+    assert rebuild_rollups(history) == incremental
+
+
+def test_rewritten_history_triggers_full_rebuild(tmp_path):
+    history = tmp_path / "deal_history.jsonl"
+    append_snapshot(_snap("a", "REJECT", 60.0, 9, []), history)
+    append_snapshot(_snap("b", "REJECT", 70.0, 9, []), history)
+
+    history.write_text(json.dumps(_snap("x", "APPROVE", 5.0, 9, [])) + "\n", encoding="utf-8")
+    summary = portfolio_summary(history_path=history)
+    assert summary["deals"] == 1 and summary["recommendation_counts"] == {"APPROVE": 1}
+
+
+def test_concurrent_appends_neither_fail_nor_lose_updates(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    history = tmp_path / "deal_history.jsonl"
+
+    def append(n):
+        for i in range(30):
+            append_snapshot(_snap(f"{n}-{i}", "APPROVE", 10.0, 10, [("Payment", "Low", "Balanced")]), history)
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(append, range(4)))
+
+    rollups = load_rollups(history)
+    assert rollups["snapshots"] == rollups["totals"]["deals"] == 120
+    assert rebuild_rollups(history) == rollups
+    assert not list(tmp_path.glob("*.tmp"))
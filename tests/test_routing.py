@@ -0,0 +1,84 @@
+# tests/test_routing.py
+from __future__ import annotations
+
+import json
+
+from graph.records import RiskItem
+from graph.routing import assess_complexity, choose_tier, escalation_reason, route_node
+
+
+SHORT_DEAL = (
+    "Provider may terminate immediately for any breach. "
+    "Limitation of liability is fees paid in the last 1 month. "
+    "Governing law: Delaware."
+)
+
+
+def test_short_rule_friendly_deal_routes_fast():
+    assert choose_tier(assess_complexity(SHORT_DEAL)) == "fast"
+    assert choose_tier(assess_complexity(SHORT_DEAL * 200)) == "strong"
+    assert choose_tier(assess_complexity("Notices go to the address above. Counterparts are fine.")) == "strong"
+
+
+def test_routing_is_opt_in(monkeypatch):
+    from schemas import Deal
+
+    monkeypatch.delenv("DEALGRAPH_ROUTING", raising=False)
+    deal = Deal(deal_id="d", raw_text=SHORT_DEAL)
+    assert route_node({"deal": deal})["model_tier"] == "strong"
+    assert route_node({"deal": deal, "model_routing": True})["model_tier"] == "fast"
+    monkeypatch.setenv("DEALGRAPH_ROUTING", "1")
+    assert route_node({"deal": deal})["model_tier"] == "fast"
+    assert route_node({"deal": deal, "model_routing": False})["model_tier"] == "strong"
+
+
+def test_escalates_only_fast_tier_on_parse_failure_or_disagreement():
+    agree = RiskItem("Termination", "High", "Customer-Unfavorable", "e", "Termination", "High", "Customer-Unfavorable", "r")
+    clash = RiskItem("Termination", "High", "Customer-Unfavorable", "e", "Termination", "Low", "Customer-Favorable", "r")
+
+    assert escalation_reason({"model_tier": "fast", "risk_items": [agree]}) == ""
+    assert escalation_reason({"model_tier": "fast", "risk_parse_ok": False}) == "risk_json_parse_failed"
+    assert escalation_reason({"model_tier": "fast", "risk_items": [agree, clash]}).startswith("rule_disagreement")
+    assert escalation_reason({"model_tier": "strong", "risk_items": [clash]}) == ""
+
+
+class _FlakyRiskLLM:
+    """Clause extraction works; the first (fast-tier) risk answer is not JSON."""
+
+    def __init__(self, agent, calls):
+        self.agent = agent
+        self.calls = calls
+
+    def invoke(self, prompt, *args, **kwargs):
+        from langchain_core.messages import AIMessage
+
+        self.calls.append(self.agent)
+        if self.agent == "clause":
+            return AIMessage(content=json.dumps([{"type": "Termination", "text": "Provider may terminate immediately."}]))
+        if self.agent == "risk":
+            if self.calls.count("risk") == 1:
+                return AIMessage(content="Sure! Here are the risks: termination")
+            return AIMessage(content=json.dumps({"risks": [
+                {"category": "Termination", "risk": "exit", "evidence": "Provider may terminate immediately for any breach.",
+                 "severity": "High", "direction": "Customer-Unfavorable"}]}))
+        return AIMessage(content="1. add a cure period")
+
+
+def test_risk_only_escalation_keeps_the_extracted_clauses(monkeypatch):
+    from agents import clients
+    from graph.deal_graph import build_graph
+    from schemas import Deal
+
+    monkeypatch.setenv("DEALGRAPH_STREAM_RISKS", "0")
+    calls = []
+    clients.set_wrapper(lambda agent, build: _FlakyRiskLLM(agent, calls))
+    try:
+        out = build_graph().invoke({"deal": Deal(deal_id="d", raw_text=SHORT_DEAL), "execution_trace": [],
+                                    "namespaces": [], "model_routing": True})
+    finally:
+        clients.set_wrapper(None)
+
+    assert out["routing"]["escalated"] and out["routing"]["escalated_agents"] == ["risk"]
+    assert calls.count("clause") == 1 and calls.count("risk") == 2
+    assert [(c.type, c.text) for c in out["deal"].clauses] == [("Termination", "Provider may terminate immediately.")]
+    assert out["risk_vector"] == {"Termination": "High"}
@@ -0,0 +1,70 @@
+# tests/test_scheduler.py
+import threading
+import time
+
+import pytest
+
+from agents.scheduler import ModelLimiter, RateLimitTimeout, Scheduler, _deal, deal_scope, scheduled
+
+
+def test_queue_releases_in_flight_then_shortest_deals_first():
+    limiter = ModelLimiter(rpm=600, tpm=0)  # one request per 0.1s once the burst is gone
+    limiter.buckets["requests"].tokens = 0.0
+    released = []
+
+    def call(name, priority):
+        limiter.acquire(10, priority)
+        released.append(name)
+
+    threads = [
+        threading.Thread(target=call, args=("new-long", (1, 5000))),
+        threading.Thread(target=call, args=("new-short", (1, 100))),
+        threading.Thread(target=call, args=("in-flight", (0, 7))),
+    ]
+    for t in threads:
+        t.start()
+        time.sleep(0.005)
+    for t in threads:
+        t.join(5)
+
+    assert released == ["in-flight", "new-short", "new-long"]
+    stats = limiter.stats()
+    assert stats["max_queue_depth"] == 3 and stats["queue_depth"] == 0
+    assert stats["waited"] == 3 and stats["wait_p95_s"] > 0
+
+
+def test_acquire_times_out_without_capacity():
+    limiter = ModelLimiter(rpm=60, tpm=0)
+    limiter.buckets["requests"].tokens = 0.0
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(10, (1, 0), timeout=0.05)
+    assert limiter.stats()["queue_depth"] == 0
+
+
+def test_token_bucket_is_reconciled_with_actual_usage():
+    sched = Scheduler()
+    sched.configure(rpm=0, tpm=60_000, per_model={})
+    with deal_scope("d1", 400) as ticket:
+        charged = sched.acquire("m", "judge", "x" * 400)
+        assert ticket.started and ticket.priority()[0] == 0
+    assert charged == 100 + 200  # prompt chars / 4 + typical judge completion
+    bucket = sched.limiter("m").buckets["tokens"]
+    before = bucket.tokens
+    sched.reconcile("m", charged, 100)  # used fewer tokens than estimated: refund
+    assert bucket.tokens == pytest.approx(before + 200, abs=1.0)
+
+    sched.configure(rpm=0, tpm=0, per_model={})
+    assert not sched.enabled and sched.acquire("m", "judge", "x") == 0
+
+
+def test_scheduled_app_runs_each_deal_in_its_scope():
+    from schemas import Deal
+
+    class _App:
+        def invoke(self, state, config=None):
+            ticket = _deal.get()
+            return ticket and (ticket.deal_id, ticket.chars)
+
+    app = scheduled(_App())
+    assert app.invoke({"deal": Deal(deal_id="d", raw_text="x" * 42)}) == ("d", 42)
+    assert app.invoke(None) is None and _deal.get() is None
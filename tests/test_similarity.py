@@ -0,0 +1,37 @@
+# tests/test_similarity.py
+from __future__ import annotations
+
+from agents.precedent_agent import TOP_K, _snapshot_to_text, rank_by_text
+from memory.similarity import Vocabulary, jaccard, jaccard_many
+
+QUERY = "Provider may terminate immediately; liability is capped at one month of fees."
+TEXTS = [
+    "Provider may terminate immediately for any breach.",
+    "Liability is capped at twelve months of fees.",
+    "",
+    "the and of",  # stop words only
+    "Governing law: Delaware. Venue in Wilmington.",
+    QUERY,
+]
+
+
+def test_jaccard_many_matches_pairwise_jaccard():
+    assert jaccard_many(QUERY, TEXTS) == [jaccard(QUERY, t) for t in TEXTS]
+    assert jaccard_many("", TEXTS) == [0.0] * len(TEXTS)
+    assert jaccard_many(QUERY, []) == []
+
+    # pre-encoded sets from one vocabulary give the same scores
+    vocab = Vocabulary()
+    sets = [vocab.encode(t) for t in TEXTS]
+    assert list(sets[0]) == sorted(sets[0])
+    assert jaccard_many(vocab.encode(QUERY), sets, vocab) == [jaccard(QUERY, t) for t in TEXTS]
+
+
+def test_rank_by_text_batches_keep_the_pairwise_ranking(monkeypatch):
+    import agents.precedent_agent as precedent_agent
+
+    monkeypatch.setattr(precedent_agent, "TEXT_BATCH", 2)
+    history = [{"deal_id": str(i), "clauses": [{"text": t}], "risks": {}} for i, t in enumerate(TEXTS * 3)]
+    scored = [(jaccard(QUERY, _snapshot_to_text(h)), -i, h) for i, h in enumerate(history)]
+    expected = sorted((e for e in scored if e[0] > 0), key=lambda e: e[:2], reverse=True)[:TOP_K]
+    assert rank_by_text(QUERY, history, TOP_K) == [(s, h) for s, _, h in expected]
@@ -0,0 +1,49 @@
+# tests/test_speculation.py
+from __future__ import annotations
+
+import agents.precedent_agent as precedent
+from schemas import Deal
+
+
+HISTORY = [
+    {"deal_id": "h1", "recommendation": "REJECT", "summary": "harsh",
+     "risk_vector": {"Termination": "High", "Liability": "High"}},
+    {"deal_id": "h2", "recommendation": "APPROVE", "summary": "mild",
+     "risk_vector": {"Termination": "Low", "Liability": "Low"}},
+    {"deal_id": "h3", "recommendation": "NEGOTIATE", "summary": "other",
+     "risk_vector": {"Payment": "Medium"}},
+]
+
+DEAL_TEXT = (
+    "Provider may terminate immediately for any breach. "
+    "Limitation of liability is fees paid in the last 1 month."
+)
+
+
+def _state(monkeypatch, risk_vector):
+    monkeypatch.setattr(precedent, "iter_history", lambda path=None, keep=None: (dict(h) for h in HISTORY))
+    state = {"deal": Deal(deal_id="d", raw_text=DEAL_TEXT, clauses=[])}
+    state.update(precedent.speculative_precedent(state))
+    state["risk_vector"] = risk_vector
+    return state
+
+
+def test_speculation_hit_reuses_pool_and_matches_full_scan(monkeypatch):
+    state = _state(monkeypatch, None)
+    provisional = state["speculation"]["vector"]
+    assert provisional
+
+    state["risk_vector"] = dict(provisional)
+    out = precedent.precedent_agent(state)
+    assert out["speculation_outcome"] == "hit"
+
+    full = precedent.precedent_agent({k: v for k, v in state.items() if k != "speculation"})
+    assert full["speculation_outcome"] is None
+    assert out["supporting_precedents"] == full["supporting_precedents"]
+
+
+def test_speculation_miss_falls_back_to_full_scan(monkeypatch):
+    state = _state(monkeypatch, {"Payment": "Medium"})
+    out = precedent.precedent_agent(state)
+    assert out["speculation_outcome"] == "miss"
+    assert "deal=h3" in out["supporting_precedents"][0]
@@ -0,0 +1,110 @@
+# tests/test_stream_json.py
+from __future__ import annotations
+
+import json
+import time
+
+from langchain_core.messages import AIMessageChunk
+
+from agents import clients
+from agents.risk_agent import risk_agent
+from graph.normalize import normalize_agent_outputs
+from graph.records import to_dicts
+from graph.stream_json import RiskArrayParser
+from schemas import Deal
+
+
+RISKS = [
+    {"category": "Liability", "risk": "cap {tiny}", "evidence": "Liability capped at $100 [total].",
+     "severity": "High", "direction": "Customer-Unfavorable"},
+    {"category": "Termination", "risk": "\"instant\" exit", "evidence": "Provider may terminate immediately.",
+     "severity": "High", "direction": "Customer-Unfavorable"},
+]
+PAYLOAD = "```json\n" + json.dumps({"risks": RISKS}, indent=2) + "\n```"
+
+
+def _chunks(text, size=5):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_parser_emits_each_element_once_across_chunk_boundaries():
+    parser = RiskArrayParser()
+    got = []
+    for chunk in _chunks(PAYLOAD, 3):
+        got.extend(parser.feed(chunk))
+    assert got == RISKS
+    assert parser.complete and parser.malformed == 0
+
+
+def test_parser_keeps_parsed_items_when_tail_is_malformed():
+    text = json.dumps({"risks": RISKS})
+    cut = text.index("Termination") + 5
+    parser = RiskArrayParser()
+    got = parser.feed(text[:cut] + '", "oops": ')
+    assert got == RISKS[:1]
+    assert not parser.complete
+
+
+class _Streaming:
+    def __init__(self, text):
+        self.text = text
+
+    def stream(self, prompt):
+        for chunk in _chunks(self.text):
+            yield AIMessageChunk(content=chunk)
+
+
+def test_streamed_risk_agent_matches_batch_normalize():
+    deal_text = "Liability capped at $100 [total]. Provider may terminate immediately."
+    clients.set_wrapper(lambda agent, build: _Streaming(PAYLOAD))
+    try:
+        state = {"deal": Deal(deal_id="s", raw_text=deal_text, clauses=[]), "stream_risks": True}
+        state.update(risk_agent(state))
+    finally:
+        clients.set_wrapper(None)
+
+    assert state["risk_parse_ok"] is True
+    assert len(state["streamed_risk_items"]) == 2
+
+    streamed = normalize_agent_outputs(state)
+    batch = normalize_agent_outputs({k: v for k, v in state.items() if k != "streamed_risk_items"})
+    assert to_dicts(streamed["risk_items"]) == to_dicts(batch["risk_items"])
+    assert streamed["risk_score"] == batch["risk_score"]
+
+
+class _CutOff(_Streaming):
+    """Streams up to `cut`, then stalls past the node deadline."""
+
+    def __init__(self, text, cut):
+        super().__init__(text)
+        self.cut = cut
+
+    def stream(self, prompt):
+        for chunk in _chunks(self.text[:self.cut]):
+            yield AIMessageChunk(content=chunk)
+        time.sleep(1.0)
+        yield AIMessageChunk(content=self.text[self.cut:])
+
+
+def test_stream_cut_off_mid_array_keeps_parsed_items(monkeypatch):
+    monkeypatch.setenv("DEALGRAPH_RISK_DEADLINE", "0.3")
+    deal = Deal(deal_id="s", raw_text="Liability capped at $100 [total]. Provider may terminate immediately.")
+    cut = PAYLOAD.index("Termination")
+    try:
+        clients.set_wrapper(lambda agent, build: _CutOff(PAYLOAD, cut))
+        out = risk_agent({"deal": deal, "stream_risks": True})
+        # nothing closed before the deadline: deterministic fallback
+        clients.set_wrapper(lambda agent, build: _CutOff(PAYLOAD, PAYLOAD.index("Liability") + 5))
+        empty = risk_agent({"deal": deal, "stream_risks": True})
+    finally:
+        clients.set_wrapper(None)
+
+    assert out["degraded"] is True and out["degraded_nodes"] == ["risk"]
+    assert out["risk_parse_ok"] is False
+    assert json.loads(out["risk_analysis"])["risks"] == RISKS[:1]
+    assert [i.category for i in out["streamed_risk_items"]] == ["Liability"]
+    assert out["llm_usage"][0]["estimated"] is True
+
+    assert empty["degraded"] is True and empty["streamed_risk_items"] is None
+    cats = {r["category"] for r in json.loads(empty["risk_analysis"])["risks"]}
+    assert "Termination" in cats
@@ -0,0 +1,67 @@
+# tests/test_usage.py
+import pytest
+from langchain_core.messages import AIMessage
+
+from agents.usage import BatchBudget, BudgetExceeded, RunBudget, admit, check_budget, usage_entry, usage_summary
+from graph.routing import budget_tier
+
+
+def test_usage_entry_prefers_reported_tokens_and_estimates_otherwise():
+    resp = AIMessage(content="x" * 400,
+                     usage_metadata={"input_tokens": 1000, "output_tokens": 50, "total_tokens": 1050})
+    entry = usage_entry("risk", "strong", "p" * 40, resp)
+    assert (entry["input_tokens"], entry["output_tokens"], entry["estimated"]) == (1000, 50, False)
+    assert entry["cost_usd"] > 0
+
+    guessed = usage_entry("risk", "strong", "p" * 40, AIMessage(content="x" * 400))
+    assert (guessed["input_tokens"], guessed["output_tokens"], guessed["estimated"]) == (10, 100, True)
+
+    summary = usage_summary([entry, guessed])
+    assert summary["calls"] == 2 and summary["estimated_calls"] == 1
+    assert summary["by_agent"]["risk"]["input_tokens"] == 1010
+
+
+def test_check_budget_blocks_calls_past_the_deal_budget():
+    check_budget({"model_tier": "strong"}, "judge", "prompt")  # no budget: never blocks
+    with pytest.raises(BudgetExceeded):
+        check_budget({"model_tier": "rules"}, "judge", "prompt")
+    spent = [{"agent": "risk", "cost_usd": 0.01}]
+    with pytest.raises(BudgetExceeded):
+        check_budget({"model_tier": "strong", "budget_usd": 0.01, "llm_usage": spent}, "judge", "prompt")
+    check_budget({"model_tier": "strong", "budget_usd": 1.0, "llm_usage": spent}, "judge", "prompt")
+
+
+def test_budget_tier_picks_the_strongest_affordable_tier():
+    est = {"strong": 0.01, "fast": 0.002, "rules": 0.0}
+    assert budget_tier("strong", est, None) == "strong"
+    assert budget_tier("strong", est, 0.005) == "fast"
+    assert budget_tier("fast", est, 0.05) == "fast"  # never upgrades
+    assert budget_tier("strong", est, 0.001) == "rules"
+
+
+def test_run_budget_admission_downgrades_then_defers():
+    est = {"tier": "strong", "strong": 0.008, "fast": 0.002}
+    run = RunBudget(0.012)
+
+    budget, reserved, action = admit(run, est)
+    assert action == "admitted" and reserved == pytest.approx(0.01)
+    budget, reserved2, action = admit(run, est)  # 0.002 left: fast still fits
+    assert action == "downgraded" and budget == pytest.approx(0.002)
+    assert admit(run, est, defer=True)[2] == "deferred"
+
+    run.settle(reserved, 0.004)  # actual spend below the reservation frees budget
+    assert run.remaining() == pytest.approx(0.006)
+    assert run.snapshot()["deferred"] == 1 and run.snapshot()["downgraded"] == 1
+
+
+def test_batch_budget_reserve_settles_what_the_deal_spent():
+    budget = BatchBudget(run_budget=1.0, defer=True)
+    with budget.reserve("Customer pays $5,000/month.") as admission:
+        assert admission.action == "admitted" and admission.state() == {"budget_usd": admission.budget_usd}
+        assert budget.run.snapshot()["reserved_usd"] > 0
+        admission.spent_usd = 0.25
+    assert budget.run.snapshot()["reserved_usd"] == 0 and budget.run.spent_usd == 0.25
+
+    budget.run.reserve(budget.run.remaining())
+    with budget.reserve("Customer pays $5,000/month.") as admission:
+        assert admission.deferred and admission.state() == {}